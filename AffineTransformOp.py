@@ -1,71 +1,232 @@
-#### AffineTransformOp.py 
-#### Defines a class for performing an affine transformation on 2x2 points 
+#### AffineTransformOp.py
+#### Defines a class for performing an affine transformation on 2x2 points
 #### Author: Maxie D. Schmidt
-#### Created: 2016.02.19 
+#### Created: 2016.02.19
 
+from collections import OrderedDict
+import numpy as np
 from sage.all import vector, matrix
 
 IDENTITY_MATRIX = matrix([[1, 0], [0, 1]])
 def minverse(mtrx): return mtrx.inverse()
 
-## 
+##
+ # The maximum number of composed transformations kept in the cache used
+ # by compose_ops
+##
+COMPOSE_CACHE_SIZE = 4096;
+
+## LRUCache
+ # A small bounded least-recently-used cache (an OrderedDict keeps the keys
+ # in order of last use, so the oldest entry is evicted first when full)
+##
+class LRUCache(object):
+
+     ## __init__
+      # Initialization function for the LRUCache class
+      # @param maxsize The maximum number of entries stored in the cache
+     ##
+     def __init__(self, maxsize):
+          self.maxsize = maxsize;
+          self.entries = OrderedDict();
+          self.hits = 0;
+          self.misses = 0;
+     ## def
+
+     ## get
+      # Looks up a key in the cache (marking it as recently used)
+      # @param key The key to look up
+      # @return    The cached value, or None if the key is not cached
+     ##
+     def get(self, key):
+          if key not in self.entries:
+               self.misses += 1;
+               return None;
+          ## if
+          value = self.entries.pop(key);
+          self.entries[key] = value;
+          self.hits += 1;
+          return value;
+     ## def
+
+     ## put
+      # Stores a value in the cache (evicting the least recently used
+      # entry if the cache is full)
+     ##
+     def put(self, key, value):
+          if key in self.entries:
+               self.entries.pop(key);
+          elif len(self.entries) >= self.maxsize:
+               self.entries.popitem(last = False);
+          ## if
+          self.entries[key] = value;
+     ## def
+
+     ## clear
+      # Removes all entries from the cache
+     ##
+     def clear(self):
+          self.entries.clear();
+          self.hits, self.misses = 0, 0;
+
+     ## __len__
+      # Returns the number of entries in the cache
+     ##
+     def __len__(self):
+          return len(self.entries);
+
+## class
+
+##
  # AffineTransformOp
- # Defines a 2x2 affine transformation on points in R^2
+ # Defines a 2x2 affine transformation on points in R^2. The transformation
+ # x -> M * x + T is stored as one read-only 2x3 float array [M | T] so that
+ # applying it to a batch of points costs one matrix product.
 ##
-class AffineTransformOp(object): 
-     
+class AffineTransformOp(object):
+
      ## __init__
       # Initialization function for the AffineTransformOp class
       # @param mOp   The transformation matrix
       # @param tOp   The translation term in the transformation
-      # @param sfunc An optional simplify function to post-process 
-      #              symbolic matrices
+      # @param sfunc An optional function to post-process the transformed
+      #              points returned by apply_to_point
+     ##
+     def __init__(self, mOp, tOp, sfunc = None):
+          affine = np.empty((2, 3), dtype = np.float64);
+          for i in range(0, 2):
+               affine[i, 0], affine[i, 1] = float(mOp[i][0]), float(mOp[i][1]);
+               affine[i, 2] = float(tOp[i]);
+          ## for
+          affine.flags.writeable = False;
+          self.affine = affine;
+          self.key = affine.tobytes();
+          self.simp_func = sfunc;
+     ## def
+
+     ## from_array
+      # Static method that builds a transformation from a 2x3 array [M | T]
      ##
-     def __init__(self, mOp, tOp, sfunc = None): 
-          self.matrix_M = mOp; 
-          self.matrix_T = tOp; 
-          self.simp_func = sfunc; 
+     @staticmethod
+     def from_array(affine, sfunc = None):
+          return AffineTransformOp(affine[:, 0:2], affine[:, 2], sfunc);
 
      ## apply
-      # Applies another affine transformation to the local transformation 
+      # Applies another affine transformation to the local transformation
       # @param apply_op The affine transformation object we are applying
-      # @return         A new affine transformation object representing the 
+      # @return         A new affine transformation object representing the
       #                 result
      ##
-     def apply(self, apply_op): 
-          matrix_M = apply_op.matrix_M * self.matrix_M; 
-          matrix_T = apply_op.matrix_M * self.matrix_T + apply_op.matrix_T; 
-          matrix_M = copy(matrix_M); 
-          matrix_T = copy(matrix_T); 
-          if self.simp_func != None:  
-               matrix_M = self.simp_func(matrix_M); 
-               matrix_T = self.simp_func(matrix_T); 
-          ## if 
-          return AffineTransformOp(matrix_M, matrix_T, self.simp_func); 
+     def apply(self, apply_op):
+          return compose_ops(apply_op, self);
 
      ## apply_to_point
       # Applies this affine transformation to a point
       # @param point The point to be transformed
-      # @return      The transformed point
+      # @return      The transformed point (a Sage vector)
      ##
-     def apply_to_point(self, point): 
-          tpoint = self.matrix_M * point + self.matrix_T; 
-          if self.simp_func != None: 
+     def apply_to_point(self, point):
+          (x, y), A = (float(point[0]), float(point[1])), self.affine;
+          tpoint = vector([A[0, 0] * x + A[0, 1] * y + A[0, 2],
+                           A[1, 0] * x + A[1, 1] * y + A[1, 2]]);
+          if self.simp_func != None:
                tpoint = self.simp_func(tpoint);
-          return tpoint; 
+          return tpoint;
+
+     ## apply_to_points
+      # Applies this affine transformation to a batch of points
+      # @param points An array of 2D points with shape (..., 2)
+      # @param out    An optional output array of the same shape
+      # @return       The float array of transformed points
+     ##
+     def apply_to_points(self, points, out = None):
+          points = np.asarray(points, dtype = np.float64);
+          out = np.matmul(points, self.affine[:, 0:2].T, out = out);
+          out += self.affine[:, 2];
+          return out;
+     ## def
+
+     ## matrix_M
+      # The matrix term in the transformation as a 2x2 float array
+     ##
+     @property
+     def matrix_M(self):
+          return self.affine[:, 0:2];
+
+     ## matrix_T
+      # The translation term in the transformation as a float array
+     ##
+     @property
+     def matrix_T(self):
+          return self.affine[:, 2];
 
      ## M
       # Access to the matrix term in the transformation
      ##
      @property
-     def M(self): 
-          return copy(self.matrix_M); 
+     def M(self):
+          return matrix([[float(mij) for mij in row] for row in self.affine[:, 0:2]]);
 
      ## T
       # Access to the translation term in the transformation
-     ##     
+     ##
      @property
-     def T(self): 
-          return copy(self.matrix_T); 
+     def T(self):
+          return vector([float(ti) for ti in self.affine[:, 2]]);
+
+## class
 
-## class 
+_compose_cache = LRUCache(COMPOSE_CACHE_SIZE);
+
+## compose_ops
+ # Composes a word of affine transformations. The composition of every
+ # suffix of the word is memoized in a bounded LRU cache keyed by the
+ # transformation arrays (and the simp_func of the composition), so 
+ # repeated words (and words sharing a suffix) are only multiplied out once.
+ # As in AffineTransformOp.apply, each composition keeps the simp_func of 
+ # the innermost transformation opk, which simplifies the matrix and 
+ # translation terms of each partial composition.
+ # @param ops The transformations [op1, op2, ..., opk]
+ # @return    The transformation op1 o op2 o ... o opk (so that opk is
+ #            applied to a point first)
+##
+def compose_ops(*ops):
+     if len(ops) == 0:
+          return AffineTransformOp(IDENTITY_MATRIX, vector([0, 0]));
+     elif len(ops) == 1:
+          return ops[0];
+     ## if
+     simp_func = ops[-1].simp_func;
+     cached = _compose_cache.get((b"".join([op.key for op in ops]), simp_func));
+     if cached is not None:
+          return cached;
+     ## if
+     composed, key = ops[-1], ops[-1].key;
+     for op in reversed(ops[:-1]):
+          key = op.key + key;
+          cached = _compose_cache.get((key, simp_func));
+          if cached is None:
+               A, B = op.affine, composed.affine;
+               affine = np.empty((2, 3), dtype = np.float64);
+               affine[:, 0:2] = np.dot(A[:, 0:2], B[:, 0:2]);
+               affine[:, 2] = np.dot(A[:, 0:2], B[:, 2]) + A[:, 2];
+               if simp_func is None:
+                    cached = AffineTransformOp.from_array(affine);
+               else:
+                    matrix_M = simp_func(matrix([[float(mij) for mij in row] 
+                                                 for row in affine[:, 0:2]]));
+                    matrix_T = simp_func(vector([float(ti) for ti in affine[:, 2]]));
+                    cached = AffineTransformOp(matrix_M, matrix_T, simp_func);
+               ## if
+               _compose_cache.put((key, simp_func), cached);
+          ## if
+          composed = cached;
+     ## for
+     return composed;
+## def
+
+## clear_compose_cache
+ # Empties the cache of composed transformations used by compose_ops
+##
+def clear_compose_cache():
+     _compose_cache.clear();
@@ -0,0 +1,256 @@
+#### AlgebraicCoords.py
+#### Defines exact integer coordinate arrays in the quadratic rings Z[phi] and
+#### Z[sqrt(2)] used by the Penrose and Ammann-Beenker families of tilings
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+from math import sqrt
+
+## QuadraticIntegerRing
+ # Implements vectorized arithmetic in a ring Z[w] where the generator w
+ # satisfies w^2 = trace * w + norm_term. Elements a + b*w are stored as
+ # integer coefficient pairs in the last axis of int64 NumPy arrays.
+##
+class QuadraticIntegerRing(object):
+
+     ## __init__
+      # Initialization function for the QuadraticIntegerRing class
+      # @param name       A short name for the generator (i.e., "phi")
+      # @param trace      The integer t in w^2 = t * w + u
+      # @param norm_term  The integer u in w^2 = t * w + u
+      # @param generator  The floating point value of the generator w
+     ##
+     def __init__(self, name, trace, norm_term, generator):
+          self.name = name;
+          self.trace = trace;
+          self.norm_term = norm_term;
+          self.generator = float(generator);
+     ## def
+
+     ## element
+      # Returns the ring element a + b * w as a coefficient array
+     ##
+     def element(self, a, b):
+          return np.array([a, b], dtype = np.int64);
+
+     ## mul
+      # Multiplies two (broadcastable) arrays of ring elements
+      # @param x An int64 array with last axis of length 2
+      # @param y An int64 array with last axis of length 2
+      # @return  The coefficient array of the products x * y
+     ##
+     def mul(self, x, y):
+          a, b, c, d = x[..., 0], x[..., 1], y[..., 0], y[..., 1];
+          bd = b * d;
+          return np.stack([a * c + self.norm_term * bd,
+                           a * d + b * c + self.trace * bd], axis = -1);
+     ## def
+
+     ## conjugate
+      # Returns the Galois conjugates of an array of ring elements
+     ##
+     def conjugate(self, x):
+          return np.stack([x[..., 0] + self.trace * x[..., 1], -x[..., 1]], axis = -1);
+
+     ## norm
+      # Returns the (integer) norms x * conjugate(x) of an array of elements
+     ##
+     def norm(self, x):
+          return self.mul(x, self.conjugate(x))[..., 0];
+
+     ## divide
+      # Divides an array of ring elements by a fixed element exactly
+      # @param x An int64 array with last axis of length 2
+      # @param e The ring element to divide by
+      # @return  The coefficient array of the quotients x / e
+      # @raise   ArithmeticError if some quotient does not lie in the ring
+     ##
+     def divide(self, x, e):
+          e = np.asarray(e, dtype = np.int64);
+          numer, enorm = self.mul(x, self.conjugate(e)), int(self.norm(e));
+          if np.any(numer % enorm != 0):
+               raise ArithmeticError("Inexact division in Z[%s]" % self.name);
+          ## if
+          return numer // enorm;
+     ## def
+
+     ## to_float
+      # Converts an array of ring elements to floating point values
+     ##
+     def to_float(self, x):
+          return x[..., 0] + self.generator * x[..., 1];
+
+     ## from_float
+      # Recognizes an array of floats as ring elements a + b * w with small
+      # integer coefficients (intended for setting up initial tiles only)
+      # @param values    An array of floating point values
+      # @param max_coeff The largest coefficient |b| to search for
+      # @param tol       The tolerance for a recognized value
+      # @return          The coefficient array (last axis of length 2)
+      # @raise           ValueError if some value is not recognized
+     ##
+     def from_float(self, values, max_coeff = 64, tol = 1e-9):
+          values = np.asarray(values, dtype = np.float64);
+          bcoeffs = np.arange(-max_coeff, max_coeff + 1);
+          resid = values[..., np.newaxis] - self.generator * bcoeffs;
+          acoeffs = np.round(resid);
+          errs = np.abs(resid - acoeffs);
+          bidx = np.argmin(errs, axis = -1);
+          besterr = np.take_along_axis(errs, bidx[..., np.newaxis], axis = -1)[..., 0];
+          if np.any(besterr > tol):
+               raise ValueError("Unable to represent coordinates exactly in Z[%s]" % \
+                                self.name);
+          ## if
+          a = np.take_along_axis(acoeffs, bidx[..., np.newaxis], axis = -1)[..., 0];
+          return np.stack([a, bcoeffs[bidx]], axis = -1).astype(np.int64);
+     ## def
+
+## class
+
+##
+ # The golden ratio ring Z[phi] (phi^2 = phi + 1) used by the Penrose and
+ # Tubingen triangle tilings, and the ring Z[sqrt(2)] used by the
+ # Ammann-Beenker tilings
+##
+ZPHI = QuadraticIntegerRing("phi", 1, 1, (1 + sqrt(5)) / 2.0);
+ZSQRT2 = QuadraticIntegerRing("sqrt2", 0, 2, sqrt(2));
+
+PHI = ZPHI.element(0, 1);
+PHI_SQUARED = ZPHI.element(1, 1);
+SQRT2 = ZSQRT2.element(0, 1);
+SILVER_RATIO_INVERSE = ZSQRT2.element(-1, 1);
+
+## ExactCoords
+ # An array of 2D points whose coordinates are stored exactly as
+ # x = xscale * (a + b * w) and y = yscale * (c + d * w) with integer
+ # coefficients. The fixed per-axis scale factors let the tilings whose
+ # coordinates involve an extra irrational factor (for example, the
+ # sin(pi / 5) in the x-coordinates of the Penrose wheel) still use integer
+ # coefficient pairs. Points are stored in an int64 array of shape
+ # (..., 2, 2) indexed by [point, axis, coefficient].
+##
+class ExactCoords(object):
+
+     ## __init__
+      # Initialization function for the ExactCoords class
+      # @param ring   A QuadraticIntegerRing object
+      # @param coeffs An int64 array of shape (..., 2, 2)
+      # @param scale  The pair of floating point (xscale, yscale) factors
+     ##
+     def __init__(self, ring, coeffs, scale = (1.0, 1.0)):
+          self.ring = ring;
+          self.coeffs = np.asarray(coeffs, dtype = np.int64);
+          self.scale = (float(scale[0]), float(scale[1]));
+     ## def
+
+     ## from_points
+      # Static method that converts floating point 2D points to exact
+      # coordinates in the given ring
+      # @param ring   A QuadraticIntegerRing object
+      # @param points An array (or list) of 2D points
+      # @param scale  The pair of (xscale, yscale) factors
+     ##
+     @staticmethod
+     def from_points(ring, points, scale = (1.0, 1.0)):
+          points = np.array([[float(pt[0]), float(pt[1])] for pt in points]);
+          coeffs = np.stack([ring.from_float(points[:, 0] / scale[0]),
+                             ring.from_float(points[:, 1] / scale[1])], axis = 1);
+          return ExactCoords(ring, coeffs, scale);
+     ## def
+
+     ## to_float
+      # Converts the exact points to a (..., 2) float64 array
+     ##
+     def to_float(self):
+          return np.stack([self.scale[0] * self.ring.to_float(self.coeffs[..., 0, :]),
+                           self.scale[1] * self.ring.to_float(self.coeffs[..., 1, :])],
+                          axis = -1);
+     ## def
+
+     ## keys
+      # Returns the points as rows of four integers for exact hashing
+     ##
+     def keys(self):
+          return self.coeffs.reshape(-1, 4);
+
+     ## unique
+      # Returns the distinct points of the array (by exact comparison)
+     ##
+     def unique(self):
+          ukeys = np.unique(self.keys(), axis = 0);
+          return ExactCoords(self.ring, ukeys.reshape(-1, 2, 2), self.scale);
+     ## def
+
+     ## reshape
+      # Returns the points reshaped to the given leading shape
+     ##
+     def reshape(self, *shape):
+          return ExactCoords(self.ring, self.coeffs.reshape(shape + (2, 2)), self.scale);
+
+     ## __len__
+      # Returns the number of points in the (flat) array
+     ##
+     def __len__(self):
+          return len(self.coeffs);
+
+## class
+
+## concatenate_exact
+ # Joins a list of ExactCoords arrays over the same ring and scale
+ # @param exact_list A list of ExactCoords objects
+ # @return           The concatenated ExactCoords object
+##
+def concatenate_exact(exact_list):
+     ring, scale = exact_list[0].ring, exact_list[0].scale;
+     for ec in exact_list:
+          if ec.ring is not ring or ec.scale != scale:
+               raise ValueError("Cannot join exact coordinates over different rings");
+          ## if
+     ## for
+     return ExactCoords(ring, np.concatenate([ec.coeffs for ec in exact_list]), scale);
+## def
+
+## tiles_of_type
+ # Selects the tiles of one prototile type from a flat exact tile array
+ # @param tile_types The array of prototile type codes of the tiles
+ # @param offsets    The array of num_tiles + 1 offsets into coeffs
+ # @param coeffs     The (num_vertices, 2, 2) exact vertex coefficients
+ # @param tile_type  The prototile type to select
+ # @param kverts     The number of vertices in tiles of this type
+ # @return           The indices of the selected tiles and their vertex
+ #                   coefficients as a (num_selected, kverts, 2, 2) array
+##
+def tiles_of_type(tile_types, offsets, coeffs, tile_type, kverts):
+     tidx = np.nonzero(tile_types == tile_type)[0];
+     vidx = offsets[tidx][:, np.newaxis] + np.arange(kverts);
+     return tidx, coeffs[vidx];
+## def
+
+## merge_subtiles
+ # Joins the subtiles computed for each prototile type into one flat exact
+ # tile array. The subtiles are ordered by the index of their parent tile
+ # (and then by their order in subtiles), which is the same order as
+ # calling to_subtiles on each tile in turn.
+ # @param subtiles A list of (parent_indices, tile_type, vertex_list) tuples
+ #                 where vertex_list is a list of (num_parents, 2, 2)
+ #                 coefficient arrays for the subtile vertices
+ # @return         The tile types, offsets and (num_vertices, 2, 2) vertex
+ #                 coefficients of the subtiles
+##
+def merge_subtiles(subtiles):
+     parents = np.concatenate([pidx for (pidx, ttype, verts) in subtiles]);
+     tile_types = np.concatenate([np.full(len(pidx), ttype, dtype = np.uint8) \
+                                  for (pidx, ttype, verts) in subtiles]);
+     lengths = np.concatenate([np.full(len(pidx), len(verts), dtype = np.int64) \
+                               for (pidx, ttype, verts) in subtiles]);
+     coeffs = np.concatenate([np.stack(verts, axis = 1).reshape(-1, 2, 2) \
+                              for (pidx, ttype, verts) in subtiles]);
+     starts = np.cumsum(lengths) - lengths;
+     order = np.argsort(parents, kind = 'mergesort');
+     lengths = lengths[order];
+     offsets = np.zeros(len(lengths) + 1, dtype = np.int64);
+     offsets[1:] = np.cumsum(lengths);
+     vidx = np.repeat(starts[order] - offsets[:-1], lengths) + np.arange(offsets[-1]);
+     return tile_types[order], offsets, coeffs[vidx];
+## def
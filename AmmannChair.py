@@ -6,6 +6,8 @@
 from sage.all import *
 from AffineTransformOp import AffineTransformOp
 from Tiling import Tiling 
+from TileSet import TileSet
+from SubstitutionEngine import AffineSubstitutionEngine, IDENTITY_AFFINE
 
 ##
  # Python constants to denote the individual tile types in the 
@@ -51,6 +53,10 @@ class AmmannChair_Tiling(Tiling):
                                        (gamma ** 5) * vector([1, 0])); 
           self.SOP = AffineTransformOp((gamma ** -2) * matrix([[1, 0], [0, -1]]), \
                                        (gamma**6) * vector([0, 1])); 
+          
+          # batched substitution engine for the two-level recurrence 
+          # (LOP acts on the previous level, SOP on the second previous level):
+          self.engine = AffineSubstitutionEngine([self.LOP], [self.SOP]); 
      ## def 
      
      ## desc 
@@ -69,28 +75,42 @@ class AmmannChair_Tiling(Tiling):
       # Gets the next list of tiles after one subsequent substitution step
       # @param prev_tiles        A list of the tiles after one step back
       # @param second_prev_tiles A list of the tiles two steps back
-      # @return                  A list of tiles after one more step
+      # @return                  An array of tiles after one more step
      ##
      def get_next_tiling(self, prev_tiles, second_prev_tiles = []): 
-          rpts = Tiling.transform_full_points_list(prev_tiles, self.LOP); 
-          rpts.extend(Tiling.transform_full_points_list(second_prev_tiles, self.SOP));
-          return rpts;  
+          return self.engine.next_tiles(prev_tiles, second_prev_tiles); 
      ## def 
      
+     ## get_root_tiles
+      # Returns the identity map as the root of the substitution tree (the 
+      # tree is walked over the compositions of the substitution maps, whose 
+      # images of the initial tile are the tiles)
+     ##
+     def get_root_tiles(self): 
+          return [IDENTITY_AFFINE]; 
+     
+     ## get_subtile_steps
+      # Returns the compositions of a map with each of the substitution maps
+     ##
+     def get_subtile_steps(self, affine): 
+          return self.engine.map_steps(affine); 
+     
+     ## tile_to_points
+      # Returns the image of the initial tile under a composition of maps
+     ##
+     def tile_to_points(self, affine): 
+          return self.engine.map_tile(affine, self.INIT_TILE); 
+     
      ## get_tiles
       # Gets the polygonal Ammann Chair tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A list of tiles in the computed substitution tiling
      ##
-     def get_tiles(self): 
-          init_tile = self.INIT_TILE; 
-          prev_tiles = [init_tile];
-          pprev_tiles = [init_tile]; 
-          for n in range(1, self.N): 
-               next_tiles = self.get_next_tiling(prev_tiles, pprev_tiles); 
-               pprev_tiles = prev_tiles; 
-               prev_tiles = next_tiles; 
-          ## for 
-          return prev_tiles; 
+     def get_tiles(self, window = None): 
+          tile_array = self.engine.substitute(self.INIT_TILE, self.N - 1, 
+                                              self.window_culler(window), self); 
+          return TileSet.from_array(tile_array); 
      ## def 
 
 ## class 
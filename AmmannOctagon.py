@@ -6,8 +6,12 @@
 #### Created: 2016.03.15
 
 from math import sin, cos
+import numpy as np
 from sage.all import *
 from Tiling import Tiling
+from TileSet import TileSet
+from AlgebraicCoords import ZSQRT2, SQRT2, SILVER_RATIO_INVERSE, ExactCoords, \
+                            tiles_of_type, merge_subtiles
 
 ## d1, d2, sc, s2p1
  # Python floats representing several abbreviations for the constant values 
@@ -18,6 +22,16 @@ d2 = float(sqrt(2));
 sc = float(cos(pi / 4)); 
 s2p1 = float(sqrt(2) + 1); 
 
+## 
+ # Exact Z[sqrt(2)] analogs of d1, d2 and d1 * d2, and the per-axis scale 
+ # factors of the exact coordinates (the coordinates are stored doubled so 
+ # that the vertices at (cos(pi / 4), sin(pi / 4)) have integer coefficients)
+##
+EXACT_D1 = SILVER_RATIO_INVERSE; 
+EXACT_D2 = SQRT2; 
+EXACT_D1D2 = ZSQRT2.mul(SILVER_RATIO_INVERSE, SQRT2); 
+EXACT_SCALE = (0.5, 0.5); 
+
 ## 
  # Python constants denoting three of the initial tile shapes
 ##
@@ -267,11 +281,14 @@ class Ammann_Tiling(Tiling):
       # @param tiling_type     Should be one of: RHOMB_TILE, TRIANGLE_TILE, 
       #                        SQUARE_TILE, 8 (for an 8-star tile), or 
       #                        88 (for an octagonal tile)
+      # @param exact           Whether to compute the tiles with exact 
+      #                        coordinates in Z[sqrt(2)] (defaults to False)
      ##
-     def __init__(self, num_steps_N, tiling_name_str, tiling_type): 
+     def __init__(self, num_steps_N, tiling_name_str, tiling_type, exact = False): 
           self.num_steps = num_steps_N; 
           self.tiling_name = tiling_name_str; 
           self.tiling_type = tiling_type; 
+          self.exact = exact; 
           if tiling_type == RHOMB_TILE: 
                self.INIT_TILE = AmmannTile.get_initial_rhomb(); 
           elif tiling_type == TRIANGLE_TILE: 
@@ -298,39 +315,130 @@ class Ammann_Tiling(Tiling):
      def get_initial_tile(self): 
           return self.INIT_TILE; 
      
-     ## get_next_tiling
-      # Gets the next list of tiles after one subsequent substitution step
-      # @param prev_tiles        A list of the tiles after one step back
-      # @return                  A list of tiles after one more step
+     ## get_root_tiles
+      # Returns the initial tiles at the root of the substitution tree
      ##
-     def get_next_tiling(self, prev_tiles): 
-          next_tiles = []; 
-          for tile in prev_tiles: 
-               subtiles = tile.to_subtiles(); 
-               next_tiles.extend(subtiles); 
-          ## for 
-          return next_tiles; 
+     def get_root_tiles(self): 
+          return self.get_initial_tile(); 
+     
+     ## subdivide_exact
+      # Static method that performs one substitution step on the exact 
+      # (Z[sqrt(2)] coefficient) representation of the tiles using the same 
+      # rules as AmmannTile.to_subtiles
+      # @param tile_types The array of tile types
+      # @param offsets    The array of offsets of the tiles into coeffs
+      # @param coeffs     The (num_vertices, 2, 2) exact vertex coefficients
+      # @return           The tile types, offsets and coefficients after one 
+      #                   more step (in the same order as get_next_tiling)
+     ##
+     @staticmethod
+     def subdivide_exact(tile_types, offsets, coeffs): 
+          mul, div = ZSQRT2.mul, ZSQRT2.divide; 
+          d1, d2, d1d2 = EXACT_D1, EXACT_D2, EXACT_D1D2; 
+          
+          sidx, squares = tiles_of_type(tile_types, offsets, coeffs, SQUARE_TILE, 4); 
+          x, y, z, w = squares[:, 0], squares[:, 1], squares[:, 2], squares[:, 3]; 
+          c1 = x + div(mul(d1, y - x) + w - x, d2); 
+          c2 = x + div(mul(d1, (y - x) + (w - x)), d2); 
+          c3 = y + div(mul(d1, (x - y) + (z - y)), d2); 
+          c4, c5, c6 = mul(d1, z - y), mul(d1, z - w), mul(d1, w - x); 
+          c7 = mul(d1d2, y - x); 
+          subtiles = [
+               (sidx, RHOMB_TILE, [x, c2, c1, x + c6]), 
+               (sidx, RHOMB_TILE, [c1, c1 + c5, z, w + mul(d2, c5)]), 
+               (sidx, RHOMB_TILE, [y, y + c4, c1 + c5, c3]), 
+               (sidx, RHOMB_TILE, [c2, x + c7, y, c3]), 
+               (sidx, SQUARE_TILE, [c1 + c5, c1, c2, c3]), 
+               (sidx, TRIANGLE_TILE, [x, x + c7, c2]), 
+               (sidx, TRIANGLE_TILE, [w, x + c6, c1]), 
+               (sidx, TRIANGLE_TILE, [w, w + mul(d2, c5), c1]), 
+               (sidx, TRIANGLE_TILE, [z, y + c4, c1 + c5]), 
+          ]; 
+          
+          ridx, rhombs = tiles_of_type(tile_types, offsets, coeffs, RHOMB_TILE, 4); 
+          x, y, z, w = rhombs[:, 0], rhombs[:, 1], rhombs[:, 2], rhombs[:, 3]; 
+          c1 = x + mul(d1, y - x); 
+          c2, c3, c4 = mul(d1, w - x), mul(d1, w - z), mul(d1, y - z); 
+          c5, c6 = mul(d1d2, z - y), mul(d1d2, z - w); 
+          subtiles += [
+               (ridx, RHOMB_TILE, [x, c1, c1 + c2, x + c2]), 
+               (ridx, RHOMB_TILE, [y, z + c3 + c4, w, c1 + c2]), 
+               (ridx, RHOMB_TILE, [z + c3 + c4, y + c5, z, w + c6]), 
+               (ridx, TRIANGLE_TILE, [y, c1, c1 + c2]), 
+               (ridx, TRIANGLE_TILE, [y, y + c5, z + c3 + c4]), 
+               (ridx, TRIANGLE_TILE, [w, w + c6, z + c3 + c4]), 
+               (ridx, TRIANGLE_TILE, [w, x + c2, c1 + c2]), 
+          ]; 
+          
+          tidx, triangles = tiles_of_type(tile_types, offsets, coeffs, TRIANGLE_TILE, 3); 
+          x, y, z = triangles[:, 0], triangles[:, 1], triangles[:, 2]; 
+          c1 = x + div(mul(d1, y - x), d2); 
+          c2 = x + div(y - x, d2); 
+          c3 = mul(d1, z - x); 
+          c4 = y + mul(d1d2, z - y); 
+          subtiles += [
+               (tidx, RHOMB_TILE, [x, c1, c1 + c3, x + c3]), 
+               (tidx, RHOMB_TILE, [c2, c4, z, c1 + c3]), 
+               (tidx, TRIANGLE_TILE, [c2, c1, c1 + c3]), 
+               (tidx, TRIANGLE_TILE, [y, c4, c2]), 
+               (tidx, TRIANGLE_TILE, [z, x + c3, c1 + c3]), 
+          ]; 
+          return merge_subtiles(subtiles); 
      ## def 
      
      ## get_tiles
       # Gets the polygonal Ammann tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A list of tiles in the computed substitution tiling
      ##
-     def get_tiles(self): 
+     def get_tiles(self, window = None): 
           
-          tile_list = self.get_initial_tile(); 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, atile) in enumerate(tile_list): 
-               rtiles_list.append(atile.to_points()); 
-          ## for 
-          return rtiles_list; 
+          if self.exact: 
+               return self.get_tiles_exact(window); 
+          ## if 
+          return Tiling.get_tiles(self, window); 
 
      ## def 
+     
+     ## get_tiles_exact
+      # Gets the polygonal Ammann tiles after N steps where the vertex 
+      # coordinates are computed exactly in Z[sqrt(2)]
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A TileSet with exact vertex coordinates
+     ##
+     def get_tiles_exact(self, window = None): 
+          (start, level_arrays) = (0, None) if window is not None else \
+                                  self.resume_level(self.N - 1); 
+          if level_arrays is None: 
+               init_tiles = self.get_initial_tile(); 
+               init_points = [pt for tile in init_tiles for pt in tile.to_points()]; 
+               coeffs = ExactCoords.from_points(ZSQRT2, init_points, EXACT_SCALE).coeffs; 
+               tile_types = np.array([tile.tile_type for tile in init_tiles], dtype = np.uint8); 
+               offsets = np.zeros(len(init_tiles) + 1, dtype = np.int64); 
+               offsets[1:] = np.cumsum([len(tile.to_points()) for tile in init_tiles]); 
+          else: 
+               tile_types, offsets = level_arrays['tile_types'], level_arrays['offsets']; 
+               coeffs = level_arrays['coeffs']; 
+          ## if 
+          for n in range(start + 1, self.N): 
+               tile_types, offsets, coeffs = \
+                    Ammann_Tiling.subdivide_exact(tile_types, offsets, coeffs); 
+               if window is not None: 
+                    exact = ExactCoords(ZSQRT2, coeffs, EXACT_SCALE); 
+                    tiles = self.window_select(TileSet.from_exact(exact, offsets, tile_types), 
+                                               self.N - n - 1, window); 
+                    tile_types, offsets, coeffs = \
+                         tiles.tile_types, tiles.offsets, tiles.exact.coeffs; 
+               else: 
+                    self.store_level(n, {'tile_types': tile_types, 'offsets': offsets, 
+                                         'coeffs': coeffs}); 
+               ## if 
+          ## for 
+          exact = ExactCoords(ZSQRT2, coeffs, EXACT_SCALE); 
+          return TileSet.from_exact(exact, offsets, tile_types); 
+     ## def 
 
 ## class 
 
@@ -7,6 +7,8 @@
 from sage.all import *
 from AffineTransformOp import AffineTransformOp
 from Tiling import Tiling 
+from TileSet import TileSet
+from SubstitutionEngine import AffineSubstitutionEngine, IDENTITY_AFFINE
 
 ## 
  # Python floats for constants we use as shorthand in the code below
@@ -48,6 +50,9 @@ class Armchair_Tiling(Tiling):
                                         vector([0, 1]));                              
           self.T4OP = AffineTransformOp(0.5 * matrix([[-1, 0], [0, -1]]), 
                                         vector([1, 3]));  
+          
+          # batched substitution engine applying all of the maps above at once:
+          self.engine = AffineSubstitutionEngine([self.T1OP, self.T2OP, self.T3OP, self.T4OP]); 
      ## def 
      
      ## desc 
@@ -65,29 +70,42 @@ class Armchair_Tiling(Tiling):
      ## get_next_tiling
       # Gets the next list of tiles after one subsequent substitution step
       # @param prev_tiles        A list of the tiles after one step back
-      # @return                  A list of tiles after one more step
+      # @return                  An array of tiles after one more step
      ##
      def get_next_tiling(self, prev_tiles): 
-          init_pts = prev_tiles; 
-          rpts = Tiling.transform_full_points_list(init_pts, self.T1OP); 
-          rpts.extend(Tiling.transform_full_points_list(init_pts, self.T2OP)); 
-          rpts.extend(Tiling.transform_full_points_list(init_pts, self.T3OP)); 
-          rpts.extend(Tiling.transform_full_points_list(init_pts, self.T4OP));  
-          return rpts; 
+          return self.engine.next_tiles(prev_tiles); 
      ## def 
      
+     ## get_root_tiles
+      # Returns the identity map as the root of the substitution tree (the 
+      # tree is walked over the compositions of the substitution maps, whose 
+      # images of the initial tile are the tiles)
+     ##
+     def get_root_tiles(self): 
+          return [IDENTITY_AFFINE]; 
+     
+     ## get_subtile_steps
+      # Returns the compositions of a map with each of the substitution maps
+     ##
+     def get_subtile_steps(self, affine): 
+          return self.engine.map_steps(affine); 
+     
+     ## tile_to_points
+      # Returns the image of the initial tile under a composition of maps
+     ##
+     def tile_to_points(self, affine): 
+          return self.engine.map_tile(affine, self.get_initial_tile()); 
+     
      ## get_tiles
       # Gets the polygonal Chair3 tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A list of tiles in the computed substitution tiling
      ##
-     def get_tiles(self): 
-          init_tile = self.get_initial_tile(); 
-          tile_list = [init_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list; 
-          ## for 
-          return tile_list; 
+     def get_tiles(self, window = None): 
+          tile_array = self.engine.substitute(self.get_initial_tile(), self.N - 1, 
+                                              self.window_culler(window), self); 
+          return TileSet.from_array(tile_array); 
      ## def 
 
 ## class 
@@ -0,0 +1,166 @@
+#### BinnedKDE.py
+#### Defines a binned Gaussian kernel density estimate of a statistic which
+#### is computed by an FFT convolution on a fine grid
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+
+from LocalSageHistogram import HistogramEngine
+
+##
+ # The default number of points of the grid of the density estimates
+##
+KDE_GRID_POINTS = 2**14;
+
+##
+ # The number of bandwidths beyond which the Gaussian kernel is truncated
+ # (and by which the grid extends past the range of the estimate)
+##
+KDE_KERNEL_WIDTHS = 4.0;
+
+## BinnedKDE
+ # A Gaussian kernel density estimate of the (optionally weighted) values
+ # of a statistic on an equally spaced grid. The values are binned onto the
+ # grid with linear binning (each value splits its weight between its two
+ # neighboring grid points) and the binned weights are convolved with the
+ # sampled kernel by FFT, so the estimate costs O(G log G) for a grid of G
+ # points after one O(n) pass over the values, independently of the number
+ # of values. The grid is computed once per statistic and the density is
+ # looked up on it for all of the histogram plots. The density is normalized
+ # by the total weight of all of the values, including the values beyond
+ # the grid, unless it is restricted to a range with range_points.
+##
+class BinnedKDE(object):
+
+     ## __init__
+      # Initialization function for the BinnedKDE class
+      # @param hdata     A 1D array or list of the values
+      # @param weights   An optional array of the weights (multiplicities) of
+      #                  the values
+      # @param bandwidth The bandwidth of the kernel, or the name of a rule
+      #                  of thumb to compute it ("scott" or "silverman")
+      # @param xran      An optional range of the estimate (defaults to the
+      #                  range of the values)
+      # @param num_grid  The number of grid points
+      # @param engine    An optional HistogramEngine of the values (which
+      #                  holds the sorted values and their prefix weights)
+     ##
+     def __init__(self, hdata, weights = None, bandwidth = "scott", xran = None,
+                  num_grid = KDE_GRID_POINTS, engine = None):
+          if engine is None:
+               engine = HistogramEngine(hdata, weights);
+          ## if
+          self.engine = engine;
+          self.total_weight = float(engine.prefix_weights[-1]);
+          self.bandwidth = BinnedKDE.select_bandwidth(engine, bandwidth, xran);
+          (xmin, xmax) = engine.bin_edges(1, xran).tolist();
+          kernel_width = KDE_KERNEL_WIDTHS * self.bandwidth;
+          self.grid = np.linspace(xmin - kernel_width, xmax + kernel_width, num_grid);
+          self.density = self.convolve(self.bin_weights());
+     ## def
+
+     ## select_bandwidth
+      # Static method that computes the bandwidth of the kernel (the rules of
+      # thumb only use the values within the range of the estimate, since 
+      # the spread of all of the heavy-tailed statistics would smooth the 
+      # estimate over the whole range)
+      # @param engine    The HistogramEngine of the values
+      # @param bandwidth A positive number, or "scott" (1.06 sigma n^(-1/5))
+      #                  or "silverman" (0.9 min(sigma, IQR / 1.34) n^(-1/5))
+      # @param xran      An optional range [xmin, xmax] of the values used by
+      #                  the rules of thumb (defaults to all of the values)
+      # @return          The bandwidth
+     ##
+     @staticmethod
+     def select_bandwidth(engine, bandwidth, xran = None):
+          if not isinstance(bandwidth, str):
+               return float(bandwidth);
+          ## if
+          (values, prefix_weights) = (engine.sorted_data, engine.prefix_weights);
+          weights = np.diff(prefix_weights);
+          if xran is not None:
+               lo = np.searchsorted(values, xran[0], side = 'left');
+               hi = np.searchsorted(values, xran[1], side = 'right');
+               (values, weights) = (values[lo:hi], weights[lo:hi]);
+          ## if
+          num_values = max(weights.sum(), 1.0);
+          mean = values.dot(weights) / num_values;
+          sigma = np.sqrt(max(0.0, ((values - mean)**2).dot(weights) / num_values));
+          if bandwidth == "scott":
+               spread, factor = sigma, 1.06;
+          elif bandwidth == "silverman":
+               cdf = np.cumsum(weights) / num_values;
+               (q25, q75) = np.interp([0.25, 0.75], cdf, values) if len(values) > 0 \
+                            else (0.0, 0.0);
+               iqr = (q75 - q25) / 1.34;
+               spread, factor = min(sigma, iqr) if iqr > 0 else sigma, 0.9;
+          else:
+               raise ValueError("Unknown KDE bandwidth rule: " + bandwidth);
+          ## if
+          h = factor * spread * num_values ** (-0.2);
+          return h if h > 0 else 1.0;
+     ## def
+
+     ## bin_weights
+      # Linearly bins the weights of the values onto the grid (the values
+      # beyond the grid are left out)
+     ##
+     def bin_weights(self):
+          (values, grid) = (self.engine.sorted_data, self.grid);
+          weights = np.diff(self.engine.prefix_weights);
+          lo = np.searchsorted(values, grid[0], side = 'left');
+          hi = np.searchsorted(values, grid[-1], side = 'right');
+          (values, weights) = (values[lo:hi], weights[lo:hi]);
+          dx = grid[1] - grid[0];
+          positions = (values - grid[0]) / dx;
+          left = np.minimum(positions.astype(np.int64), len(grid) - 2);
+          frac = positions - left;
+          binned = np.bincount(left, weights * (1.0 - frac), minlength = len(grid));
+          binned[1:] += np.bincount(left + 1, weights * frac, minlength = len(grid))[1:];
+          return binned;
+     ## def
+
+     ## convolve
+      # Convolves the binned weights with the Gaussian kernel sampled at the
+      # grid spacing (truncated at KDE_KERNEL_WIDTHS bandwidths) by FFT, and
+      # normalizes the result to a density (the sampled kernel is normalized
+      # to unit mass on the grid, so the density integrates to one even when
+      # the bandwidth is close to or below the grid spacing)
+     ##
+     def convolve(self, binned):
+          num_grid = len(self.grid);
+          dx = self.grid[1] - self.grid[0];
+          kernel_len = int(min(num_grid - 1, np.ceil(KDE_KERNEL_WIDTHS * self.bandwidth / dx)));
+          offsets = dx * np.arange(-kernel_len, kernel_len + 1) / self.bandwidth;
+          kernel = np.exp(-0.5 * offsets**2);
+          kernel /= kernel.sum() * dx;
+          fft_len = 2**int(np.ceil(np.log2(num_grid + 2 * kernel_len + 1)));
+          conv = np.fft.irfft(np.fft.rfft(binned, fft_len) * np.fft.rfft(kernel, fft_len), fft_len);
+          density = conv[kernel_len:kernel_len + num_grid] / max(self.total_weight, 1e-300);
+          return np.maximum(density, 0.0);
+     ## def
+
+     ## evaluate
+      # Interpolates the density estimate at a set of points
+     ##
+     def evaluate(self, x):
+          return np.interp(x, self.grid, self.density, left = 0.0, right = 0.0);
+
+     ## range_points
+      # Returns the (x, density) points of the grid within a range, with the
+      # density renormalized to the values within the range (as the pdf
+      # histograms of LocalHistogram with an xran)
+      # @param xmin The lower end of the range
+      # @param xmax The upper end of the range
+      # @return     The list of the (x, density) points
+     ##
+     def range_points(self, xmin, xmax):
+          in_range = (self.grid >= xmin) & (self.grid <= xmax);
+          (x, y) = (self.grid[in_range], self.density[in_range]);
+          mass = 0.5 * np.dot(y[0:-1] + y[1:], np.diff(x));
+          y = y / mass if mass > 0 else y;
+          return zip(x.tolist(), y.tolist());
+     ## def
+
+## class
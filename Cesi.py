@@ -4,9 +4,10 @@
 #### Author: Maxie D. Schmidt
 #### Created: 2016.08.16 
 
+import numpy as np
 from sage.all import *
 from AffineTransformOp import AffineTransformOp
-from Tiling import Tiling, edist, X, Y, solve_system
+from Tiling import Tiling, edist, X, Y, solve_circles
 
 ## 
  # Python constants to denote the distinct tile types in the substitution tiling
@@ -51,6 +52,13 @@ class CesiTile(object):
                return [self.pa, self.pb, self.pc, self.pd]; 
      ## def 
      
+     ## points_to_array
+      # Static method that converts a list of 2D vectors to a float array
+     ##
+     @staticmethod
+     def points_to_array(points): 
+          return np.array([[float(X(pt)), float(Y(pt))] for pt in points]); 
+     
      ## to_subtiles
       # Returns a list of golden triangle subtiles after one more 
       # substitution step
@@ -60,25 +68,24 @@ class CesiTile(object):
           Ax, Bx, Cx, Dx = X(A), X(B), X(C), X(D)
           Ay, By, Cy, Dy = Y(A), Y(B), Y(C), Y(D)
           if self.tile_type == P0_TILE: 
-               r = edist(A, B) / 2.0
+               r = float(edist(A, B)) / 2.0
                #r2 = (c + s) / 2.0
-               [M1x, M1y] = solve_system([Ax, Ay], r * (c+s), [Bx, By], r * (2-c-s))
-               [M2x, M2y] = solve_system([Bx, By], r * (c+s), [Cx, Cy], r * (2-c-s))
-               [M3x, M3y] = solve_system([Dx, Dy], r * (c+s), [Cx, Cy], r * (2-c-s))
-               [M4x, M4y] = solve_system([Ax, Ay], r * (c+s), [Dx, Dy], r * (2-c-s))
                #[M5x, M5y] = solve_system([M4x, M4y], r * (c+s), \
                #                          [M2x, M2y], r * (2-c-s))
-               [M5x, M5y] = solve_system([Ax, Ay], r * n(sqrt(2)) * (c+s), \
-                                         [Cx, Cy], r * n(sqrt(2)) * (2-c-s))
-               M1, M2, M3, M4, M5 = vector([M1x, M1y]), vector([M2x, M2y]), \
-                                    vector([M3x, M3y]), vector([M4x, M4y]), \
-                                    vector([M5x, M5y]) 
-               [M6x, M6y] = solve_system([Ax, Ay], r * c, [M1x, M1y], r * s)
-               [M7x, M7y] = solve_system([M1x, M1y], r * c, [M5x, M5y], r * s)
-               [M8x, M8y] = solve_system([M5x, M5y], r * c, [M4x, M4y], r * s)
-               [M9x, M9y] = solve_system([M4x, M4y], r * c, [Ax, Ay], r * s)
-               M6, M7, M8, M9 = vector([M6x, M6y]), vector([M7x, M7y]), \
-                                vector([M8x, M8y]), vector([M9x, M9y]) 
+               # The points M1-M5 do not depend on each other, so compute 
+               # them with one batch of circle intersections (and then the 
+               # points M6-M9 with a second batch): 
+               rscale = np.array([1, 1, 1, 1, float(n(sqrt(2)))]); 
+               M15 = solve_circles(CesiTile.points_to_array([A, B, D, A, A]), 
+                                   r * float(c+s) * rscale, 
+                                   CesiTile.points_to_array([B, C, C, D, C]), 
+                                   r * float(2-c-s) * rscale); 
+               M1, M2, M3, M4, M5 = [vector([float(M[0]), float(M[1])]) for M in M15]; 
+               M69 = solve_circles(CesiTile.points_to_array([A, M1, M5, M4]), 
+                                   r * float(c), 
+                                   CesiTile.points_to_array([M1, M5, M4, A]), 
+                                   r * float(s)); 
+               M6, M7, M8, M9 = [vector([float(M[0]), float(M[1])]) for M in M69]; 
                return [
                     CesiTile(P0_TILE, 
                              pa = M6, 
@@ -218,27 +225,16 @@ class Cesi_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
      ##
-     def get_tiles(self): 
+     def get_root_tiles(self): 
           
           init_tile = self.get_initial_tile(); 
           init_gt_tile = CesiTile(P0_TILE, init_tile[0], init_tile[1], \
-                                  init_tile[2], init_tile[3]); 
-          tile_list = [init_gt_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list; 
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, gt_tile) in enumerate(tile_list): 
-               rtiles_list.append(gt_tile.to_points()); 
-          ## for 
-          return rtiles_list; 
-
+                                  init_tile[2], init_tile[3]);
+          return [init_gt_tile]; 
      ## def 
 
 ## class 
@@ -154,27 +154,16 @@ class Danzer7Fold_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal GoldenTriangle tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
      ##
-     def get_tiles(self): 
+     def get_root_tiles(self): 
           
           init_tile = self.get_initial_tile(); 
           init_gt_tile = Danzer7FoldTile(BLUE_TILE, init_tile[0], init_tile[1], \
-                                         init_tile[2]); 
-          tile_list = [init_gt_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list; 
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, gt_tile) in enumerate(tile_list): 
-               rtiles_list.append(gt_tile.to_points()); 
-          ## for 
-          return rtiles_list; 
-
+                                         init_tile[2]);
+          return [init_gt_tile]; 
      ## def 
 
 ## class 
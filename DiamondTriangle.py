@@ -5,8 +5,10 @@
 #### Created: 2016.09.16 
 
 from sage.all import *
+import numpy as np
 from AffineTransformOp import AffineTransformOp
 from Tiling import Tiling, edist, X, Y
+from VertexPool import VertexPool
 
 ## 
  # Python constants to denote the distinct tile types in the substitution tiling
@@ -15,7 +17,8 @@ BTILE = 1;
 OTILE = 2; 
 
 ## DTriangleTile
- # A class that represents the triangular tiles in the tiling
+ # A class that represents the triangular tiles in the tiling (the vertices 
+ # of the tiles are the IDs of points in a shared VertexPool)
 ##
 class DTriangleTile(object): 
 
@@ -23,136 +26,146 @@ class DTriangleTile(object):
       # Initialization function for the DTriangleTile
       # @param tile_type Tile type in the substitution tiling. Should be 
       #                  one of BTILE or OTILE
-      # @param pa        The vector coordinate of the vertex A in the triangle
-      # @param pb        The vector coordinate of the vertex B in the triangle
-      # @param pc        The vector coordinate of the vertex C in the triangle
+      # @param pool      The VertexPool holding the vertex coordinates
+      # @param pa        The vertex ID of the vertex A in the triangle
+      # @param pb        The vertex ID of the vertex B in the triangle
+      # @param pc        The vertex ID of the vertex C in the triangle
      ##
-     def __init__(self, tile_type, pa, pb, pc, pd = None): 
+     def __init__(self, tile_type, pool, pa, pb, pc, pd = None): 
           self.tile_type = tile_type 
+          self.pool = pool 
           self.pa = pa 
           self.pb = pb 
           self.pc = pc 
           self.pd = pd
      ## def 
 
-     ## to_points
-      # Returns a list of the vertex point vectors in the tile
+     ## vertex_ids
+      # The list of the vertex IDs of the tile
      ##
-     def to_points(self): 
+     @property
+     def vertex_ids(self): 
           if self.tile_type == OTILE:
                return [self.pa, self.pb, self.pc]
           else: 
                return [self.pa, self.pb, self.pc, self.pd]
      ## def 
      
+     ## to_points
+      # Returns a list of the vertex point vectors in the tile
+     ##
+     def to_points(self): 
+          return [self.pool.point(vid) for vid in self.vertex_ids]
+     ## def 
+     
      ## to_subtiles
       # Returns a list of subtiles after one more 
-      # substitution step
+      # substitution step (the new vertices are looked up in the 
+      # edge point cache of the pool, so they are shared with the 
+      # subtiles of the neighbouring tiles)
      ##
      def to_subtiles(self): 
           A, B, C, D = self.pa, self.pb, self.pc, self.pd    
+          pool, edgept = self.pool, self.pool.edge_point
           if self.tile_type == OTILE: 
-               t1AB, t1AC = 2.0 / 3.0 * A + 1.0 / 3.0 * B,\
-                            2.0 / 3.0 * A + 1.0 / 3.0 * C
-               t2AC, t2CB = 2.0 / 3.0 * C + 1.0 / 3.0 * A,\
-                            2.0 / 3.0 * C + 1.0 / 3.0 * B
-               t3CB, t3BA = 2.0 / 3.0 * B + 1.0 / 3.0 * C,\
-                            2.0 / 3.0 * B + 1.0 / 3.0 * A
-               midptt1, midptt2, midptt3 = (t1AB + t1AC) / 2.0, \
-                    (t2AC + t2CB) / 2.0, (t3CB + t3BA) / 2.0
-               mptAB, mptBC, mptAC = (t1AB + t3BA) / 2.0, \
-                    (t3CB + t2CB) / 2.0, (t1AC + t2AC) / 2.0
-               trimidpt = (midptt2 + mptAB) / 2.0
-               pt1AB, pt2AB = 2.0 / 3.0 * midptt1 + 1.0 / 3.0 * midptt3, \
-                              2.0 / 3.0 * midptt3 + 1.0 / 3.0 * midptt1
-               pt1AC, pt2AC = 2.0 / 3.0 * midptt1 + 1.0 / 3.0 * midptt2, \
-                              2.0 / 3.0 * midptt2 + 1.0 / 3.0 * midptt1
-               pt1BC, pt2BC = 2.0 / 3.0 * midptt2 + 1.0 / 3.0 * midptt3, \
-                              2.0 / 3.0 * midptt3 + 1.0 / 3.0 * midptt2
+               t1AB, t1AC = edgept(A, B, 1.0 / 3.0), edgept(A, C, 1.0 / 3.0)
+               t2AC, t2CB = edgept(C, A, 1.0 / 3.0), edgept(C, B, 1.0 / 3.0)
+               t3CB, t3BA = edgept(B, C, 1.0 / 3.0), edgept(B, A, 1.0 / 3.0)
+               midptt1, midptt2, midptt3 = edgept(t1AB, t1AC, 0.5), \
+                    edgept(t2AC, t2CB, 0.5), edgept(t3CB, t3BA, 0.5)
+               mptAB, mptBC, mptAC = edgept(t1AB, t3BA, 0.5), \
+                    edgept(t3CB, t2CB, 0.5), edgept(t1AC, t2AC, 0.5)
+               trimidpt = edgept(midptt2, mptAB, 0.5)
+               pt1AB, pt2AB = edgept(midptt1, midptt3, 1.0 / 3.0), \
+                              edgept(midptt3, midptt1, 1.0 / 3.0)
+               pt1AC, pt2AC = edgept(midptt1, midptt2, 1.0 / 3.0), \
+                              edgept(midptt2, midptt1, 1.0 / 3.0)
+               pt1BC, pt2BC = edgept(midptt2, midptt3, 1.0 / 3.0), \
+                              edgept(midptt3, midptt2, 1.0 / 3.0)
                return[ 
-                    DTriangleTile(OTILE, 
+                    DTriangleTile(OTILE, pool, 
                                   pa = A, 
                                   pb = t1AB, 
                                   pc = t1AC), 
-                    DTriangleTile(OTILE, 
+                    DTriangleTile(OTILE, pool, 
                                   pa = C, 
                                   pb = t2AC, 
                                   pc = t2CB), 
-                    DTriangleTile(OTILE, 
+                    DTriangleTile(OTILE, pool, 
                                   pa = B, 
                                   pb = t3CB, 
                                   pc = t3BA), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = t1AB, 
                                   pb = mptAB, 
                                   pc = pt1AB, 
                                   pd = midptt1),  
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt2AB, 
                                   pb = mptAB, 
                                   pc = pt1AB, 
                                   pd = trimidpt), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = t3BA, 
                                   pb = mptAB, 
                                   pc = pt2AB, 
                                   pd = midptt3), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt2AB, 
                                   pb = midptt3, 
                                   pc = pt2BC, 
                                   pd = trimidpt), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = t3CB, 
                                   pb = midptt3, 
                                   pc = pt2BC, 
                                   pd = mptBC),  
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt2BC, 
                                   pb = trimidpt, 
                                   pc = pt1BC, 
                                   pd = mptBC),  
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt1BC, 
                                   pb = mptBC, 
                                   pc = t2CB, 
                                   pd = midptt2), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt1BC, 
                                   pb = trimidpt, 
                                   pc = pt2AC, 
                                   pd = midptt2), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt2AC, 
                                   pb = mptAC, 
                                   pc = t2AC, 
                                   pd = midptt2), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt1AC, 
                                   pb = trimidpt, 
                                   pc = pt2AC, 
                                   pd = mptAC), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt1AC, 
                                   pb = midptt1, 
                                   pc = t1AC, 
                                   pd = mptAC), 
-                    DTriangleTile(BTILE, 
+                    DTriangleTile(BTILE, pool, 
                                   pa = pt1AB, 
                                   pb = midptt1, 
                                   pc = pt1AC, 
                                   pd = trimidpt), 
                ]; 
           else: # BTILE 
-               t11, t12, t21, t22 = 1.0 / 3.0 * D + 2.0 / 3.0 * C, \
-                                    1.0 / 3.0 * D + 2.0 / 3.0 * A, \
-                                    1.0 / 3.0 * B + 2.0 / 3.0 * C, \
-                                    1.0 / 3.0 * B + 2.0 / 3.0 * A
-               mptt1, mptt2 = (t11 + t12) / 2.0, (t21 + t22) / 2.0
-               centpt1, centpt2 = 2.0 / 3.0 * A + 1.0 / 3.0 * C, \
-                                  2.0 / 3.0 * C + 1.0 / 3.0 * A
+               #t11, t12, t21, t22 = edgept(C, D, 1.0 / 3.0), \
+               #                     edgept(A, D, 1.0 / 3.0), \
+               #                     edgept(C, B, 1.0 / 3.0), \
+               #                     edgept(A, B, 1.0 / 3.0)
+               #mptt1, mptt2 = edgept(t11, t12, 0.5), edgept(t21, t22, 0.5)
+               #centpt1, centpt2 = edgept(A, C, 1.0 / 3.0), \
+               #                   edgept(C, A, 1.0 / 3.0)
                
-               return [DTriangleTile(BTILE, A, B, C, D)]
+               return [DTriangleTile(BTILE, pool, A, B, C, D)]
                #### !!!! Fill these coordinates in for the HOWTO !!!! ####
                #return [ 
                     #DTriangleTile(OTILE, 
@@ -246,27 +259,25 @@ class DiamondTriangle_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal GoldenTriangle tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
      ##
-     def get_tiles(self): 
+     def get_root_tiles(self): 
           
           init_tile = self.get_initial_tile(); 
-          init_gt_tile = DTriangleTile(OTILE, init_tile[0], init_tile[2], init_tile[1]); 
-          tile_list = [init_gt_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list; 
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, gt_tile) in enumerate(tile_list): 
-               rtiles_list.append(gt_tile.to_points()); 
-          ## for 
-          return rtiles_list; 
-
+          pool = VertexPool(); 
+          (pa, pb, pc) = pool.add_points([init_tile[0], init_tile[2], init_tile[1]]); 
+          init_gt_tile = DTriangleTile(OTILE, pool, pa, pb, pc);
+          return [init_gt_tile]; 
      ## def 
+     
+     ## tiles_to_tileset
+      # Converts a list of tiles to an indexed TileSet of the points of 
+      # the vertex pool referenced by the tiles
+     ##
+     def tiles_to_tileset(self, tile_list, dtype = np.float64): 
+          return VertexPool.tiles_to_tileset(tile_list, dtype); 
 
 ## class 
 
@@ -5,7 +5,9 @@
 #### Created: 2016.04.04
 
 from sage.all import *
+import numpy as np
 from Tiling import Tiling, edist, X, Y, V, midpoint2
+from VertexPool import VertexPool
 
 BLUE_TILE = 1;
 YELLOW_TILE = 2; 
@@ -14,23 +16,33 @@ ORANGE_TILE = 3;
 one_third = float(1.0 / 3.0); 
 two_thirds = float(2.0 / 3.0); 
 
+## Fibonacci2DTile
+ # A tile in the tiling whose vertices a, b, c, d are the IDs of points in a 
+ # shared VertexPool (the new vertices of the subtiles are looked up in the 
+ # edge point cache of the pool, so they are shared by neighbouring tiles)
+##
 class Fibonacci2DTile(object):
 
-     def __init__(self, tile_type, a, b, c, d = None): 
+     def __init__(self, tile_type, pool, a, b, c, d = None): 
           self.tile_type = tile_type; 
+          self.pool = pool; 
           self.a = a; 
           self.b = b;
           self.c = c;
           self.d = d;     
      ## def 
 
-     def to_points(self): 
+     @property
+     def vertex_ids(self): 
           return [self.a, self.b, self.c, self.d];
+
+     def to_points(self): 
+          return [self.pool.point(vid) for vid in self.vertex_ids];
      ## def 
 
      def to_subtiles_blue(self): 
           return [
-               Fibonacci2DTile(YELLOW_TILE, 
+               Fibonacci2DTile(YELLOW_TILE, self.pool, 
                                self.a, 
                                self.b, 
                                self.c, 
@@ -40,19 +52,20 @@ class Fibonacci2DTile(object):
      
      def to_subtiles_yellow(self):
           A, B, C, D = self.a, self.b, self.c, self.d;
-          mp1 = midpoint2(two_thirds, A, B)
-          mp2 = midpoint2(two_thirds, B, C)
-          mp3 = midpoint2(one_third, C, D)
-          mp4 = midpoint2(one_third, D, A)
-          cp = midpoint2(one_third, mp3, mp1)
+          pool, edgept = self.pool, self.pool.edge_point; 
+          mp1 = edgept(A, B, two_thirds)
+          mp2 = edgept(B, C, two_thirds)
+          mp3 = edgept(C, D, one_third)
+          mp4 = edgept(D, A, one_third)
+          cp = edgept(mp3, mp1, one_third)
           return [
-               Fibonacci2DTile(ORANGE_TILE, 
+               Fibonacci2DTile(ORANGE_TILE, pool, 
                                a = mp1, b = B, c = mp2, d = cp), 
-               Fibonacci2DTile(YELLOW_TILE, 
+               Fibonacci2DTile(YELLOW_TILE, pool, 
                                a = A, b = mp1, c = cp, d = mp4), 
-               Fibonacci2DTile(BLUE_TILE, 
+               Fibonacci2DTile(BLUE_TILE, pool, 
                                a = cp, b = mp2, c = C, d = mp3), 
-               Fibonacci2DTile(ORANGE_TILE, 
+               Fibonacci2DTile(ORANGE_TILE, pool, 
                                a = mp4, b = D, c = mp3, d = cp)
           ];
      ## def
@@ -60,17 +73,16 @@ class Fibonacci2DTile(object):
      def to_subtiles_orange(self):
           #return [self]
           A, B, C, D = self.a, self.b, self.c, self.d;
-          mp1 = midpoint2(two_thirds, B, C)
-          mp2 = midpoint2(one_third, D, A)
-          sqtile_offset = 2 * edist(A, B)
-          sqtile_offsetV = V(sqtile_offset, sqtile_offset)
+          pool, edgept = self.pool, self.pool.edge_point; 
+          mp1 = edgept(B, C, two_thirds)
+          mp2 = edgept(D, A, one_third)
           return [
-               Fibonacci2DTile(ORANGE_TILE, 
+               Fibonacci2DTile(ORANGE_TILE, pool, 
                                mp2, 
                                D, 
                                C, 
                                mp1), 
-               Fibonacci2DTile(YELLOW_TILE, 
+               Fibonacci2DTile(YELLOW_TILE, pool, 
                                A, 
                                B, 
                                mp1, 
@@ -117,22 +129,22 @@ class Fibonacci2D_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     def get_tiles(self): 
-          
-          tile_list = [Fibonacci2DTile(YELLOW_TILE, 
-                                       self.INIT_TILE[0], self.INIT_TILE[1], 
-                                       self.INIT_TILE[2], self.INIT_TILE[3])
-                      ]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, ftile) in enumerate(tile_list): 
-               rtiles_list.append(ftile.to_points()); 
-          ## for 
-          return rtiles_list; 
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
+     ##
+     def get_root_tiles(self): 
+          pool = VertexPool(); 
+          (a, b, c, d) = pool.add_points(self.INIT_TILE); 
+          return [Fibonacci2DTile(YELLOW_TILE, pool, a, b, c, d)]; 
+     ## def 
+     
+     ## tiles_to_tileset
+      # Converts a list of tiles to an indexed TileSet of the points of 
+      # the vertex pool referenced by the tiles
+     ##
+     def tiles_to_tileset(self, tile_list, dtype = np.float64): 
+          return VertexPool.tiles_to_tileset(tile_list, dtype); 
 
 ## class 
 
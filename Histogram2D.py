@@ -1,100 +1,200 @@
 import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
+from scipy.sparse import csr_matrix, coo_matrix
 from sage.all import *
 from sage.plot.histogram import Histogram
 
+## JointHistogram
+ # A 2D histogram of (x, y) data, such as the joint slope gaps returned by
+ # Tiling.compute_joint_slope_gaps, on fixed bin edges. The data is binned
+ # with one vectorized pass per chunk (np.histogram2d, or a sparse matrix
+ # of the counts for the very fine grids whose bins are mostly empty), so
+ # the counts of large data sets can be accumulated chunk by chunk and the
+ # partial histograms of several workers can be merged. The heatmaps and
+ # surfaces are rendered from the binned counts.
+##
+class JointHistogram(object):
+
+     ## __init__
+      # Initialization function for the JointHistogram class
+      # @param xedges The bin edges of the x coordinates
+      # @param yedges The bin edges of the y coordinates
+      # @param sparse Whether to store the counts in a sparse matrix
+     ##
+     def __init__(self, xedges, yedges, sparse = False):
+          self.xedges = np.asarray(xedges, dtype = np.float64)
+          self.yedges = np.asarray(yedges, dtype = np.float64)
+          self.sparse = sparse
+          shape = (len(self.xedges) - 1, len(self.yedges) - 1)
+          self.counts = csr_matrix(shape, dtype = np.int64) if sparse else \
+                        np.zeros(shape, dtype = np.int64)
+     ##
+
+     ## from_points
+      # Static method that bins a data set on numbins x numbins equal width
+      # bins spanning the range of the data
+      # @param xypoints An (n, 2) array, or a list of (x, y) pairs
+      # @param numbins  The number of bins along each axis
+      # @param sparse   Whether to store the counts in a sparse matrix
+     ##
+     @staticmethod
+     def from_points(xypoints, numbins, sparse = False):
+          xypoints = np.asarray(xypoints, dtype = np.float64).reshape(-1, 2)
+          (minx, miny), (maxx, maxy) = xypoints.min(axis = 0), xypoints.max(axis = 0)
+          joint_hist = JointHistogram(np.linspace(minx, maxx, numbins + 1),
+                                      np.linspace(miny, maxy, numbins + 1), sparse)
+          joint_hist.add(xypoints)
+          return joint_hist
+     ##
+
+     ## bin_indices
+      # Returns the bin indices of the x and y coordinates of the data (the
+      # bins are half-open, except for the last bins, as in np.histogram2d)
+      # and the mask of the data within the bins
+     ##
+     def bin_indices(self, xypoints):
+          xypoints = np.asarray(xypoints, dtype = np.float64).reshape(-1, 2)
+          indices, in_range = [], np.ones(len(xypoints), dtype = bool)
+          for (coords, edges) in [(xypoints[:, 0], self.xedges), (xypoints[:, 1], self.yedges)]:
+               idx = np.searchsorted(edges, coords, side = 'right') - 1
+               idx[coords == edges[-1]] = len(edges) - 2
+               in_range &= (idx >= 0) & (idx < len(edges) - 1)
+               indices.append(idx)
+          ##
+          return (indices[0], indices[1], in_range)
+     ##
+
+     ## add
+      # Adds a chunk of (x, y) data to the histogram (the data outside of the
+      # bins is ignored)
+      # @param xypoints An (n, 2) array, or a list of (x, y) pairs
+     ##
+     def add(self, xypoints):
+          xypoints = np.asarray(xypoints, dtype = np.float64).reshape(-1, 2)
+          if not self.sparse:
+               H, _, _ = np.histogram2d(xypoints[:, 0], xypoints[:, 1],
+                                        bins = (self.xedges, self.yedges))
+               self.counts += H.astype(np.int64)
+               return
+          ##
+          (xidx, yidx, in_range) = self.bin_indices(xypoints)
+          self.counts = self.counts + coo_matrix( \
+               (np.ones(in_range.sum(), dtype = np.int64), (xidx[in_range], yidx[in_range])),
+               shape = self.counts.shape).tocsr()
+     ##
+
+     ## merge
+      # Adds the counts of another histogram on the same bins (for example,
+      # a partial histogram of another chunk of the data)
+     ##
+     def merge(self, other):
+          if self.sparse:
+               self.counts = self.counts + csr_matrix(other.counts)
+          else:
+               self.counts += other.grid()
+          ##
+          return self
+     ##
+
+     ## grid
+      # Returns the dense (num x bins, num y bins) array of the counts
+     ##
+     def grid(self):
+          return self.counts.toarray() if self.sparse else self.counts
+     ##
+
+     ## density
+      # Returns the dense array of the counts normalized to a probability
+      # density on the bins
+     ##
+     def density(self):
+          areas = np.outer(np.diff(self.xedges), np.diff(self.yedges))
+          grid = self.grid()
+          return grid / float(max(1, grid.sum())) / areas
+     ##
+
+     ## bin_values
+      # Looks up the values of a grid (for example, the density) at the bins
+      # of a set of points (zero for the points outside of the bins)
+      # @param xypoints An (n, 2) array, or a list of (x, y) pairs
+      # @param grid     The grid of values (defaults to the counts)
+     ##
+     def bin_values(self, xypoints, grid = None):
+          grid = self.grid() if grid is None else grid
+          (xidx, yidx, in_range) = self.bin_indices(xypoints)
+          values = np.zeros(len(xidx))
+          values[in_range] = grid[xidx[in_range], yidx[in_range]]
+          return values
+     ##
+
+     ## heatmap
+      # Saves a heatmap image of the density of the histogram
+      # @param image_path The path of the image
+      # @param title      An optional title of the image
+     ##
+     def heatmap(self, image_path, title = ""):
+          fig = plt.figure(figsize = (7, 6))
+          ax = fig.add_subplot(111)
+          ax.set_title(title)
+          X, Y = np.meshgrid(self.xedges, self.yedges)
+          mesh = ax.pcolormesh(X, Y, self.density().T)
+          fig.colorbar(mesh)
+          fig.savefig(image_path, bbox_inches = 'tight')
+          plt.close(fig)
+     ##
+
+     ## surface
+      # Returns a Sage 3D surface plot of the density over the bin centers
+     ##
+     def surface(self, **plot_opts):
+          xcenters = 0.5 * (self.xedges[0:-1] + self.xedges[1:])
+          ycenters = 0.5 * (self.yedges[0:-1] + self.yedges[1:])
+          X, Y = np.meshgrid(xcenters, ycenters, indexing = 'ij')
+          xyz_data = np.column_stack((X.ravel(), Y.ravel(), self.density().ravel()))
+          return list_plot3d(xyz_data.tolist(), **plot_opts)
+     ##
+
+## class
+
 def DensityHistogram(xypoints, numbins):
 
-     xpoints = map(lambda (x, y): x, xypoints)
-     ypoints = map(lambda (x, y): y, xypoints)
-     minx, maxx, miny, maxy = min(xpoints), max(xpoints), \
-                              min(ypoints), max(ypoints)
-     xedges = np.arange(minx, maxx, (maxx - minx) / float(numbins))
-     yedges = np.arange(miny, maxy, (maxy - miny) / float(numbins))
-     H, xedges, yedges = np.histogram2d(ypoints, xpoints, bins = (xedges, yedges))
-     
-     fig = plt.figure(figsize=(7, 3))
-     ax = fig.add_subplot(132)
-     ax.set_title('pcolormesh: exact bin edges')
-     X, Y = np.meshgrid(xedges, yedges)
-     ax.pcolormesh(X, Y, H)
-     ax.set_aspect('equal')
-     #plt.savefig('./output/foo.png', bbox_inches='tight')
-     #plt.show()
-
-     g = histogram([xpoints, ypoints])
-     g.save('./output/foo2.png')
+     joint_hist = JointHistogram.from_points(xypoints, numbins)
+     joint_hist.heatmap('./output/foo.png', 'pcolormesh: exact bin edges')
 
 ## def
 
-def get_xybin_value(x, y, xedges, yedges, hist_data): 
-     xbin_idx = np.digitize([x], xedges, right = False)
-     ybin_idx = np.digitize([y], yedges, right = False)
-     if xbin_idx <= len(xedges) - 1 and ybin_idx <= len(yedges) - 1 and \
-        xbin_idx < len(hist_data) and ybin_idx < len(hist_data[xbin_idx - 1]): 
-          return hist_data[ybin_idx - 1][xbin_idx - 1]
-     else: 
-          return 0.0
-##
-
 def Histogram3D(xypoints, numbins):
 
-     xpoints = map(lambda (x, y): x, xypoints)
-     ypoints = map(lambda (x, y): y, xypoints)
-     minx, maxx, miny, maxy = min(xpoints), max(xpoints), \
-                              min(ypoints), max(ypoints)
-     dx, dy = (maxx - minx) / float(numbins), (maxy - miny) / float(numbins)
-     xedges = [0.0] + np.arange(minx, maxx + dx, dx)
-     yedges = [0.0] + np.arange(miny, maxy + dy, dy)
-     H, xedges, yedges = np.histogram2d(ypoints, xpoints, 
-                                        bins = (xedges, yedges), 
-                                        normed = False)
-     
-     print H, len(H), len(H[0]), type(H)
-     print xedges, len(xedges)
-     print yedges, len(yedges)
+     xypoints = np.asarray(xypoints, dtype = np.float64).reshape(-1, 2)
+     joint_hist = JointHistogram.from_points(xypoints, numbins)
+     H, xedges, yedges = joint_hist.grid(), joint_hist.xedges, joint_hist.yedges
 
      plt.figure(1)
      plt.subplot(211)
-     extent = [yedges[0], yedges[-1], xedges[-1], xedges[0]]
-     plt.imshow(H, extent = extent, interpolation = 'nearest')
+     extent = [xedges[0], xedges[-1], yedges[0], yedges[-1]]
+     plt.imshow(H.T, extent = extent, interpolation = 'nearest', origin = 'lower')
      plt.colorbar()
      plt.savefig('./output/foo-density-hist3d.png')
 
      plt.subplot(212)
-     xidx = np.clip(np.digitize(xpoints, xedges), 0, H.shape[0]-1)
-     yidx = np.clip(np.digitize(ypoints, yedges), 0, H.shape[1]-1)
-     c = H[xidx, yidx]
-     print c
-     plt.scatter(xpoints, ypoints, c=c, alpha = 0.5)
+     c = joint_hist.bin_values(xypoints)
+     plt.scatter(xypoints[:, 0], xypoints[:, 1], c=c, alpha = 0.5)
      plt.colorbar()
      plt.savefig('./output/foo-density-scatter.png')
 
      plt.figure(2)
-     plt.hexbin(xpoints, ypoints)
+     plt.hexbin(xypoints[:, 0], xypoints[:, 1])
      plt.colorbar()
      plt.savefig('./output/foo-mpl-combined.png')
 
-     hist_fxy = lambda x, y: get_xybin_value(x, y, xedges, yedges, H)
-     P = plot3d(hist_fxy, (minx, maxx), (miny, maxy), adaptive = True, 
-                color = rainbow(60, 'rgbtuple'), max_bend = 0.1, 
-                max_depth = 15, mesh = False, aspect_ratio = 1)
+     P = joint_hist.surface()
      P.save('./output/foo-hist3d.png')
-     
-     list_plot3d_data = []
-     for x in xedges: 
-          for y in yedges:
-               list_plot3d_data += [(x, y, get_xybin_value(x, y, xedges, yedges, H))]
-          ##
-     ##
-     LP = list_plot3d(list_plot3d_data)
+
+     LP = list_plot3d(np.column_stack((np.repeat(xedges[0:-1], len(yedges) - 1),
+                                       np.tile(yedges[0:-1], len(xedges) - 1),
+                                       H.ravel())).tolist())
      LP.save('./output/foo-listplot3d-hist3d.png')
 
 
 ## def
-
-
-
-
-
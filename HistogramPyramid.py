@@ -0,0 +1,199 @@
+#### HistogramPyramid.py
+#### Defines a fine fixed-resolution count histogram of a statistic which is
+#### stored on disk so the histogram plots can be regenerated without
+#### recomputing the statistic
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+
+##
+ # The number of bins of the finest level of the histogram pyramids (a power
+ # of two, so each coarser level halves the number of bins)
+##
+PYRAMID_BINS = 2**20;
+
+##
+ # The fraction of the values at each end which are left out of the default
+ # range of the fine bins (the slopes and the slope gaps are heavy-tailed, so
+ # the full range of the values would make a fine bin wider than the plots)
+##
+PYRAMID_CLIP_QUANTILE = 0.001;
+
+## HistogramPyramid
+ # The counts of the values of a statistic (for example, the scaled pair
+ # correlation distances or the slope gaps of a tiling) in PYRAMID_BINS equal
+ # width bins on [xmin, xmax], together with the exact number, minimum,
+ # maximum, sum and sum of squares of the values. The coarser levels of the
+ # pyramid (level k sums 2^k consecutive fine bins) and the quantiles are
+ # derived from the fine counts, so any binning and plot range of the
+ # statistic can be computed within [xmin, xmax] without the values. The 
+ # values below xmin and beyond xmax which were not binned (the clipped tails
+ # of the values, or the pair distances beyond the cutoff of 
+ # PairHistogram.from_points) are only counted in num_underflow and 
+ # num_overflow.
+##
+class HistogramPyramid(object):
+
+     ## __init__
+      # Initialization function for the HistogramPyramid class
+      # @param counts       The array of the counts of the fine bins
+      # @param xmin         The left edge of the fine bins
+      # @param xmax         The right edge of the fine bins
+      # @param stats        The array (number, minimum, maximum, sum, sum of
+      #                     squares) of all of the values
+      # @param num_points   The number of tiling points of the statistic
+      # @param num_overflow  The number of values beyond xmax
+      # @param num_underflow The number of values below xmin
+     ##
+     def __init__(self, counts, xmin, xmax, stats, num_points = 0, num_overflow = 0,
+                  num_underflow = 0):
+          self.counts = np.asarray(counts, dtype = np.int64);
+          self.xmin = float(xmin);
+          self.xmax = float(xmax);
+          self.stats = np.asarray(stats, dtype = np.float64);
+          self.num_points = int(num_points);
+          self.num_overflow = int(num_overflow);
+          self.num_underflow = int(num_underflow);
+     ## def
+
+     ## from_values
+      # Static method that computes the pyramid of a list of values
+      # @param values     A 1D array or list of the values
+      # @param num_points The number of tiling points of the statistic
+      # @param num_bins   The number of fine bins
+      # @param xran       An optional range [xmin, xmax] of the fine bins 
+      #                   (defaults to the range of the values without the 
+      #                   PYRAMID_CLIP_QUANTILE tails at each end)
+     ##
+     @staticmethod
+     def from_values(values, num_points = 0, num_bins = PYRAMID_BINS, xran = None):
+          values = np.asarray(values, dtype = np.float64).ravel();
+          if len(values) == 0:
+               return HistogramPyramid(np.zeros(num_bins), 0.0, 1.0,
+                                       [0, 0, 0, 0, 0], num_points);
+          ## if
+          if xran is None:
+               xran = HistogramPyramid.clipped_range(values);
+          ## if
+          (xmin, xmax) = (float(xran[0]), float(xran[1]));
+          (xmin, xmax) = (xmin, xmax) if xmin < xmax else (xmin - 0.5, xmax + 0.5);
+          in_range = values[(values >= xmin) & (values <= xmax)];
+          bin_indices = ((in_range - xmin) * (num_bins / (xmax - xmin))).astype(np.int64);
+          np.clip(bin_indices, 0, num_bins - 1, out = bin_indices);
+          counts = np.bincount(bin_indices, minlength = num_bins);
+          num_underflow = int(np.count_nonzero(values < xmin));
+          num_overflow = len(values) - len(in_range) - num_underflow;
+          stats = [len(values), values.min(), values.max(), values.sum(), values.dot(values)];
+          return HistogramPyramid(counts, xmin, xmax, stats, num_points, 
+                                  num_overflow, num_underflow);
+     ## def
+
+     ## clipped_range
+      # Static method that returns the range of the values without the 
+      # PYRAMID_CLIP_QUANTILE tails at each end (the order statistics are 
+      # rounded outwards, so all of a small number of values are kept)
+      # @param values A nonempty 1D array of the values
+     ##
+     @staticmethod
+     def clipped_range(values):
+          last = len(values) - 1;
+          lo = int(np.floor(PYRAMID_CLIP_QUANTILE * last));
+          hi = int(np.ceil((1.0 - PYRAMID_CLIP_QUANTILE) * last));
+          ends = np.partition(values, [lo, hi]);
+          return (ends[lo], ends[hi]);
+     ## def
+
+     ## from_pair_histogram
+      # Static method that converts the counts of a PairHistogram (binned
+      # on [0, dmax]) to a pyramid
+      # @param pc_hist    A PairHistogram (with a power of two fine bins)
+      # @param num_points The number of tiling points
+     ##
+     @staticmethod
+     def from_pair_histogram(pc_hist, num_points = 0):
+          return HistogramPyramid(pc_hist.counts, 0.0, pc_hist.dmax, pc_hist.stats,
+                                  num_points, pc_hist.num_overflow);
+
+     ## num_bins
+      # Returns the number of fine bins
+     ##
+     @property
+     def num_bins(self):
+          return len(self.counts);
+
+     ## mean
+      # Returns the mean of the values
+     ##
+     def mean(self):
+          return self.stats[3] / max(1.0, self.stats[0]);
+
+     ## variance
+      # Returns the (population) variance of the values
+     ##
+     def variance(self):
+          return max(0.0, self.stats[4] / max(1.0, self.stats[0]) - self.mean()**2);
+
+     ## level
+      # Returns the counts of a coarser level of the pyramid
+      # @param k The level (the bins of level k are 2^k fine bins wide)
+     ##
+     def level(self, k):
+          return self.counts.reshape(-1, 2**k).sum(axis = 1);
+
+     ## edges
+      # Returns the bin edges of a level of the pyramid
+      # @param k The level (defaults to the fine bins)
+     ##
+     def edges(self, k = 0):
+          return np.linspace(self.xmin, self.xmax, self.num_bins // 2**k + 1);
+
+     ## centers
+      # Returns the bin centers of a level of the pyramid
+      # @param k The level (defaults to the fine bins)
+     ##
+     def centers(self, k = 0):
+          edges = self.edges(k);
+          return 0.5 * (edges[0:-1] + edges[1:]);
+     ## def
+
+     ## quantiles
+      # Computes the quantiles of the values (interpolating linearly within
+      # the fine bins, and including the num_underflow and num_overflow 
+      # values in the total, so the quantiles below xmin and beyond xmax are 
+      # returned as xmin and xmax)
+      # @param probs A list of probabilities in [0, 1]
+      # @return      The list of the corresponding quantiles
+     ##
+     def quantiles(self, probs):
+          cdf = np.zeros(self.num_bins + 1);
+          num_total = self.num_underflow + self.counts.sum() + self.num_overflow;
+          cdf[0] = self.num_underflow;
+          cdf[1:] = self.num_underflow + np.cumsum(self.counts);
+          cdf /= float(max(1, num_total));
+          return list(np.interp(probs, cdf, self.edges()));
+     ## def
+
+     ## to_arrays
+      # Returns the dict of the arrays stored for the pyramid
+     ##
+     def to_arrays(self):
+          return {'counts': self.counts, 'range': np.array([self.xmin, self.xmax]),
+                  'stats': self.stats, 'num_points': np.array(self.num_points),
+                  'num_overflow': np.array(self.num_overflow),
+                  'num_underflow': np.array(self.num_underflow)};
+
+     ## from_arrays
+      # Static method that restores a pyramid from its stored arrays (the
+      # pyramids stored without num_underflow were binned over the full 
+      # range of the values)
+      # @param arrays A dict of arrays returned by to_arrays
+     ##
+     @staticmethod
+     def from_arrays(arrays):
+          (xmin, xmax) = arrays['range'].tolist();
+          return HistogramPyramid(arrays['counts'], xmin, xmax, arrays['stats'],
+                                  int(arrays['num_points']), int(arrays['num_overflow']),
+                                  int(arrays.get('num_underflow', 0)));
+
+## class
@@ -2,25 +2,89 @@ import numpy as np
 import matplotlib.pyplot as plt
 from sage.all import *
 
+## HistogramEngine
+ # Sorts the (optionally weighted) histogram data once and computes the 
+ # histograms of the data for any set of bin edges from the prefix sums of 
+ # the sorted weights (with np.searchsorted), so the histograms for each of 
+ # the bin counts in a plot do not re-scan the data. The bins are the same 
+ # as the ones of np.histogram: half-open [a, b), except that the last bin 
+ # is closed and the data outside of the bins is ignored.
+##
+class HistogramEngine(object):
+
+     ## __init__
+      # Initialization function for the HistogramEngine class
+      # @param hdata   A 1D array or list of the data
+      # @param weights An optional array of the weights of the data
+     ##
+     def __init__(self, hdata, weights = None):
+          hdata = np.asarray(hdata, dtype = np.float64).ravel()
+          order = np.argsort(hdata, kind = 'mergesort')
+          self.sorted_data = hdata[order]
+          weights = np.ones(len(hdata)) if weights is None else \
+                    np.asarray(weights, dtype = np.float64).ravel()[order]
+          self.prefix_weights = np.zeros(len(hdata) + 1)
+          np.cumsum(weights, out = self.prefix_weights[1:])
+     ##
+
+     ## bin_edges
+      # Returns the bin edges for a number of bins (equal width bins on xran,
+      # or on the range of the data, as in np.histogram) or a list of edges
+     ##
+     def bin_edges(self, bins, xran = None):
+          if np.ndim(bins) > 0:
+               return np.asarray(bins, dtype = np.float64)
+          ##
+          if xran is None:
+               xran = (self.sorted_data[0], self.sorted_data[-1]) \
+                      if len(self.sorted_data) > 0 else (0.0, 1.0)
+          ##
+          (xmin, xmax) = (float(xran[0]), float(xran[1]))
+          if xmin == xmax:
+               (xmin, xmax) = (xmin - 0.5, xmax + 0.5)
+          ##
+          return np.linspace(xmin, xmax, int(bins) + 1)
+     ##
+
+     ## histogram
+      # Computes the histogram of the data
+      # @param bins    The number of bins, or an array of bin edges
+      # @param xran    An optional range of the equal width bins
+      # @param density Whether to normalize the histogram to a density
+      # @return        A pair (histogram values, bin edges) as np.histogram
+     ##
+     def histogram(self, bins, xran = None, density = True):
+          edges = self.bin_edges(bins, xran)
+          positions = np.searchsorted(self.sorted_data, edges, side = 'left')
+          positions[-1] = np.searchsorted(self.sorted_data, edges[-1], side = 'right')
+          counts = np.diff(self.prefix_weights[positions])
+          if density:
+               counts = counts / float(counts.sum()) / np.diff(edges)
+          ##
+          return (counts, edges)
+     ##
+
+##
+
 class LocalHistogram(object):
 
      def __init__(self, hdata, bins, xran = None, cumulative = False, probability = True, 
                   rgbcolor = 'darkorange', legend_label = "", thickness = 1.0, 
-                  aspect_ratio = 'automatic'): 
+                  aspect_ratio = 'automatic', weights = None, engine = None): 
                   
-          histy, histx = np.histogram(np.array(hdata), bins = bins, 
-                                      density = True, #density = not probability, 
-                                      range = xran)
-          histx, histy = map(list, [histx, histy])
+          if engine is None: 
+               engine = HistogramEngine(hdata, weights)
+          ##
+          histy, histx = engine.histogram(bins, xran, 
+                                          density = True) #density = not probability
           if probability: 
-               total_points = sum(histy)
-               histy = list(np.array(histy) / float(total_points))
+               total_points = histy.sum()
+               histy = histy / float(total_points)
           ##
           if cumulative: 
-               yd = np.array(histy)
-               yd = [yd[0:idx+1] for idx in range(0, len(histy))]
-               histy = map(sum, yd)
+               histy = np.cumsum(histy)
           ##
+          histx, histy = map(list, [histx, histy])
           
           self._histx = histx
           self._histy = histy
@@ -28,10 +92,11 @@ class LocalHistogram(object):
           
           if xran != None: 
                xmin, xmax = xran
-               self._hist_points = \
-                    list(filter(lambda (x, y): x>=xmin and x<=xmax, self._hist_points))
-               self._histx = np.array(self._hist_points)[:,0]
-               self._histy = np.array(self._hist_points)[:,1]
+               hist_points = np.array(self._hist_points).reshape(-1, 2)
+               in_range = (hist_points[:, 0] >= xmin) & (hist_points[:, 0] <= xmax)
+               self._hist_points = map(tuple, hist_points[in_range].tolist())
+               self._histx = hist_points[in_range, 0]
+               self._histy = hist_points[in_range, 1]
           ##      
           self._plthist = plot_step_function(self._hist_points, vertical_lines = True, 
                                             thickness = thickness, rgbcolor = rgbcolor, 
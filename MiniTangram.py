@@ -159,27 +159,15 @@ class MiniTangram_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal MiniTangram tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
      ##
-     def get_tiles(self): 
-          
-          tile_list = [MiniTangramTile(SQUARE_TILE, 
-                                       self.INIT_TILE[0], self.INIT_TILE[1], 
-                                       self.INIT_TILE[2], self.INIT_TILE[3])
-                      ]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, mtile) in enumerate(tile_list): 
-               rtiles_list.append(mtile.to_points()); 
-          ## for 
-          return rtiles_list; 
-
+     def get_root_tiles(self): 
+          return [MiniTangramTile(SQUARE_TILE, 
+                                  self.INIT_TILE[0], self.INIT_TILE[1], 
+                                  self.INIT_TILE[2], self.INIT_TILE[3])
+                 ]; 
      ## def 
 
 ## class 
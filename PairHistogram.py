@@ -0,0 +1,315 @@
+#### PairHistogram.py
+#### Defines a fine-grained histogram accumulator of the pair correlation
+#### distances of a tiling which is filled one block of distances at a time
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.stats import t as student_t
+
+from Tiling import pair_distance_blocks, pair_row_blocks, point_array, parallel_map_chunks
+
+##
+ # The default number of fine bins of the pair correlation histograms (the
+ # coarse histograms which are plotted are re-binned from these bins)
+##
+PC_FINE_BINS = 2**20;
+
+##
+ # The number of fine bins and of independent batches of the sampled pair 
+ # correlation histograms (the spread of the histograms of the batches 
+ # gives the confidence intervals of the bins)
+##
+PC_SAMPLE_BINS = 2**14;
+PC_SAMPLE_BATCHES = 32;
+
+## PairHistogram
+ # A histogram of the pair distances of a tiling with num_bins equal width
+ # bins on [0, dmax]. The distances are added in blocks (see
+ # Tiling.pair_distance_blocks), so only the bin counts are kept in memory
+ # instead of the O(n^2) list of distances built by
+ # Tiling.compute_pc_edists. Each unordered pair of points is counted once
+ # (compute_pc_edists lists each pair twice, which does not change the
+ # normalized histograms). The coarse histograms and the quantiles of the
+ # distances are computed from the fine bins, so they agree with the ones
+ # computed from the full list up to the fine bin width dmax / num_bins.
+ # The pairs at distances greater than dmax, which are skipped by the
+ # cutoff mode of from_points, are only counted in num_overflow. The 
+ # histograms estimated from random samples of the pairs (see 
+ # PairHistogram.sample_points) keep the counts of num_batches independent 
+ # batches of samples in separate rows of batch_counts. The number, 
+ # minimum, maximum, sum and sum of squares of the binned distances are 
+ # kept in stats.
+##
+class PairHistogram(object):
+
+     ## __init__
+      # Initialization function for the PairHistogram class
+      # @param dmax        The upper bound of the distances
+      # @param num_bins    The number of fine bins
+      # @param num_batches The number of batches of the counts
+     ##
+     def __init__(self, dmax, num_bins = PC_FINE_BINS, num_batches = 1):
+          self.dmax = float(dmax) if dmax > 0 else 1.0;
+          self.num_bins = num_bins;
+          self.num_batches = num_batches;
+          self.batch_counts = np.zeros((num_batches, num_bins), dtype = np.int64);
+          self.num_overflow = 0;
+          self.stats = np.array([0.0, np.inf, -np.inf, 0.0, 0.0]);
+     ## def
+
+     ## add
+      # Adds a block of distances to the histogram
+      # @param dists   A 1D array of distances in [0, dmax]
+      # @param batches An optional array of the batch of each distance
+     ##
+     def add(self, dists, batches = None):
+          dists = np.asarray(dists, dtype = np.float64);
+          if len(dists) > 0:
+               self.stats += [len(dists), 0.0, 0.0, dists.sum(), dists.dot(dists)];
+               self.stats[1] = min(self.stats[1], dists.min());
+               self.stats[2] = max(self.stats[2], dists.max());
+          ## if
+          bin_indices = (dists * (self.num_bins / self.dmax)).astype(np.int64);
+          np.clip(bin_indices, 0, self.num_bins - 1, out = bin_indices);
+          if batches is not None:
+               bin_indices += self.num_bins * np.asarray(batches, dtype = np.int64);
+          ## if
+          self.batch_counts += np.bincount(bin_indices, \
+               minlength = self.num_batches * self.num_bins).reshape(self.num_batches, -1);
+     ## def
+
+     ## merge
+      # Adds the counts of another histogram with the same bins (for 
+      # example, a partial histogram computed by a parallel worker)
+      # @param other A PairHistogram with the same dmax, bins and batches
+      # @return      This PairHistogram
+     ##
+     def merge(self, other):
+          self.batch_counts += other.batch_counts;
+          self.num_overflow += other.num_overflow;
+          self.stats[[0, 3, 4]] += other.stats[[0, 3, 4]];
+          self.stats[1] = min(self.stats[1], other.stats[1]);
+          self.stats[2] = max(self.stats[2], other.stats[2]);
+          return self;
+     ## def
+
+     ## counts
+      # Returns the counts of the fine bins (summed over the batches)
+     ##
+     @property
+     def counts(self):
+          return self.batch_counts.sum(axis = 0);
+
+     ## num_pairs
+      # Returns the number of distances added to the histogram
+     ##
+     @property
+     def num_pairs(self):
+          return int(self.counts.sum());
+
+     ## edges
+      # Returns the num_bins + 1 edges of the fine bins
+     ##
+     def edges(self):
+          return np.linspace(0.0, self.dmax, self.num_bins + 1);
+
+     ## centers
+      # Returns the centers of the fine bins
+     ##
+     def centers(self):
+          edges = self.edges();
+          return 0.5 * (edges[0:-1] + edges[1:]);
+     ## def
+
+     ## rescale
+      # Multiplies all of the distances in the histogram by a constant factor
+      # @param factor A positive scaling factor
+     ##
+     def rescale(self, factor):
+          self.dmax *= float(factor);
+          self.stats *= [1.0, factor, factor, factor, factor**2];
+     ## def
+
+     ## quantiles
+      # Computes the quantiles of the distances (interpolating linearly
+      # within the fine bins, and including the num_overflow distances
+      # beyond dmax in the total, so the quantiles which lie beyond dmax
+      # are returned as dmax)
+      # @param probs A list of probabilities in [0, 1]
+      # @return      The list of the corresponding quantiles
+     ##
+     def quantiles(self, probs):
+          cdf = np.zeros(self.num_bins + 1);
+          num_total = self.num_pairs + self.num_overflow;
+          cdf[1:] = np.cumsum(self.counts) / float(max(1, num_total));
+          return list(np.interp(probs, cdf, self.edges()));
+     ## def
+
+     ## coarse_histogram
+      # Re-bins the fine bins into a normalized (density) histogram with 
+      # confidence intervals estimated from the spread of the histograms of 
+      # the batches (Student t intervals of the batch means, which have 
+      # zero width for a single batch)
+      # @param bins       The number of coarse bins, or the array of bin edges
+      # @param xran       An optional range [xmin, xmax] of the coarse bins
+      # @param confidence The confidence level of the intervals
+      # @return           A tuple (densities, bin edges, confidence half-widths)
+     ##
+     def coarse_histogram(self, bins, xran = None, confidence = 0.95):
+          centers = self.centers();
+          (densities, edges) = np.histogram(centers, bins = bins, range = xran,
+                                            weights = self.counts, density = True);
+          half_widths = np.zeros(len(densities));
+          if self.num_batches > 1:
+               batch_densities = [np.histogram(centers, bins = edges, weights = counts)[0] \
+                                  for counts in self.batch_counts];
+               batch_densities = [counts / float(max(1, counts.sum())) / np.diff(edges) \
+                                  for counts in batch_densities];
+               t_quantile = student_t.ppf(0.5 + 0.5 * confidence, self.num_batches - 1);
+               half_widths = t_quantile * np.std(batch_densities, axis = 0, ddof = 1) / \
+                             np.sqrt(self.num_batches);
+          ## if
+          return (densities, edges, half_widths);
+     ## def
+
+     ## from_points
+      # Static method that computes the pair distance histogram of a list of
+      # points with the blocked distance kernel
+      # @param points        An (n, 2) array, or a list of 2D points
+      # @param edist_squared Whether to bin the squared distances
+      # @param num_bins      The number of fine bins
+      # @param dists_path    An optional path of a file to which the exact
+      #                      distances are streamed as raw float64 values
+      #                      (see PairHistogram.load_distances)
+      # @param rmax          An optional cutoff on the (non-squared)
+      #                      distances: only the pairs within distance rmax
+      #                      are enumerated and binned
+      # @param num_workers   The number of worker processes (the row blocks 
+      #                      of the pair matrix are split between the 
+      #                      workers, which inherit the point array and 
+      #                      return partial histograms; the distances are 
+      #                      only streamed to dists_path by a single process)
+      # @return              The PairHistogram of the distances
+     ##
+     @staticmethod
+     def from_points(points, edist_squared = False, num_bins = PC_FINE_BINS,
+                     dists_path = None, rmax = None, num_workers = 1):
+          points = point_array(points);
+          dmax = 0.0;
+          if len(points) > 0:
+               extent = points.max(axis = 0) - points.min(axis = 0);
+               dmax = np.sqrt(extent.dot(extent));
+          ## if
+          if rmax is not None:
+               dmax = min(dmax, float(rmax));
+          ## if
+          pc_hist = PairHistogram(dmax**2 if edist_squared else dmax, num_bins);
+          points_tree = cKDTree(points) if rmax is not None else None;
+          row_starts = pair_row_blocks(len(points));
+          if num_workers > 1 and dists_path is None and len(row_starts) > 1:
+               def block_histogram(row_starts):
+                    partial_hist = PairHistogram(pc_hist.dmax, num_bins);
+                    for dists in pair_distance_blocks(points, edist_squared, rmax = rmax,
+                                                      row_starts = row_starts,
+                                                      points_tree = points_tree):
+                         partial_hist.add(dists);
+                    ## for
+                    return partial_hist;
+               ## def
+               for partial_hist in parallel_map_chunks(block_histogram, row_starts,
+                                                       num_workers):
+                    pc_hist.merge(partial_hist);
+               ## for
+               row_starts = [];
+          ## if
+          dists_file = open(dists_path, 'wb') if dists_path is not None else None;
+          try:
+               for dists in pair_distance_blocks(points, edist_squared, rmax = rmax,
+                                                 row_starts = row_starts,
+                                                 points_tree = points_tree):
+                    pc_hist.add(dists);
+                    if dists_file is not None:
+                         dists.tofile(dists_file);
+                    ## if
+               ## for
+          finally:
+               if dists_file is not None:
+                    dists_file.close();
+               ## if
+          ## try
+          if rmax is not None:
+               multiplicities = np.unique(points, axis = 0, return_counts = True)[1];
+               num_zero = int(np.sum(multiplicities * (multiplicities - 1) // 2));
+               pc_hist.num_overflow = len(points) * (len(points) - 1) // 2 - \
+                                      num_zero - pc_hist.num_pairs;
+          ## if
+          return pc_hist;
+     ## def
+
+     ## sample_points
+      # Static method that estimates the pair distance histogram of a list 
+      # of points from random samples drawn with a reproducible seed, so the 
+      # running time does not depend on the number of points. Without a 
+      # cutoff, num_samples random pairs of distinct points are drawn. With 
+      # a cutoff rmax, num_samples random anchor points are drawn and the 
+      # distances from each anchor to all of its neighbors within rmax are 
+      # binned (the remaining partners of the anchors are counted in 
+      # num_overflow). The samples are split into PC_SAMPLE_BATCHES batches 
+      # for the confidence intervals of coarse_histogram.
+      # @param points        An (n, 2) array, or a list of 2D points
+      # @param num_samples   The number of random pairs (or anchor points)
+      # @param edist_squared Whether to bin the squared distances
+      # @param rmax          An optional cutoff on the (non-squared) distances
+      # @param seed          The seed of the random number generator
+      # @param num_bins      The number of fine bins
+      # @return              The sampled PairHistogram
+     ##
+     @staticmethod
+     def sample_points(points, num_samples, edist_squared = False, rmax = None,
+                       seed = 0, num_bins = PC_SAMPLE_BINS):
+          points = point_array(points);
+          extent = points.max(axis = 0) - points.min(axis = 0);
+          dmax = np.sqrt(extent.dot(extent));
+          if rmax is not None:
+               dmax = min(dmax, float(rmax));
+          ## if
+          pc_hist = PairHistogram(dmax**2 if edist_squared else dmax, num_bins, 
+                                  PC_SAMPLE_BATCHES);
+          rng = np.random.RandomState(seed);
+          batches = np.arange(num_samples) * PC_SAMPLE_BATCHES // num_samples;
+          if rmax is None:
+               first = rng.randint(0, len(points), size = num_samples);
+               second = rng.randint(0, len(points) - 1, size = num_samples);
+               second += (second >= first);
+               dists = np.sum((points[first] - points[second])**2, axis = 1);
+               dists = dists if edist_squared else np.sqrt(dists);
+               pc_hist.add(dists[dists != 0.0], batches[dists != 0.0]);
+               return pc_hist;
+          ## if
+          anchors = rng.randint(0, len(points), size = num_samples);
+          neighbors = cKDTree(points).query_ball_point(points[anchors], rmax);
+          num_neighbors = np.array([len(nbrs) for nbrs in neighbors], dtype = np.int64);
+          partners = np.concatenate([np.zeros(0, dtype = np.int64)] + \
+                                    [np.asarray(nbrs, dtype = np.int64) for nbrs in neighbors]);
+          anchor_indices = np.repeat(anchors, num_neighbors);
+          dists = np.sum((points[anchor_indices] - points[partners])**2, axis = 1);
+          dists = dists if edist_squared else np.sqrt(dists);
+          nonzero = dists != 0.0;
+          pc_hist.add(dists[nonzero], np.repeat(batches, num_neighbors)[nonzero]);
+          pc_hist.num_overflow = num_samples * len(points) - int(num_neighbors.sum());
+          return pc_hist;
+     ## def
+
+     ## load_distances
+      # Static method that maps a file of distances written by
+      # PairHistogram.from_points into memory
+      # @param dists_path The path of the distances file
+      # @return           A read-only 1D memmap array of the distances
+     ##
+     @staticmethod
+     def load_distances(dists_path):
+          return np.memmap(dists_path, dtype = np.float64, mode = 'r');
+
+## class
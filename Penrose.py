@@ -7,10 +7,13 @@
 import math
 import cmath
 import sys
+import numpy as np
 
 from sage.all import *
 from AffineTransformOp import AffineTransformOp
-from Tiling import Tiling
+from Tiling import Tiling, parallel_map_chunks
+from TileSet import TileSet
+from AlgebraicCoords import ZPHI, PHI, ExactCoords, tiles_of_type, merge_subtiles
 
 ## 
  # Python constants denoting the type of the tile
@@ -25,6 +28,13 @@ COLOR_BLUE = 1;
 DEFAULT_RADIUS_R = 10; 
 GOLDEN_RATIO = float(golden_ratio); 
 
+## 
+ # The per-axis scale factors for the exact Z[phi] coordinates of the 
+ # initial wheel of triangles: x = sin(pi / 5) / 2 * (a + b * phi) and 
+ # y = (c + d * phi) / 2
+##
+PENROSE_EXACT_SCALE = (math.sin(math.pi / 5) / 2.0, 0.5); 
+
 ## Penrose_Tiling
  # A Tiling subclass implementing the penrose rhomb tiling 
  # See: http://tilings.math.uni-bielefeld.de/substitution/penrose-rhomb/
@@ -36,10 +46,13 @@ class Penrose_Tiling(Tiling):
       # @param num_steps_N     The number of substitution steps in the tiling
       # @param tiling_name_str Optional tiling name string 
       #                        (defaults to "Penrose")
+      # @param exact           Whether to compute the tiles with exact 
+      #                        coordinates in Z[phi] (defaults to False)
      ##
-     def __init__(self, num_steps_N, tiling_name_str = "Penrose"): 
+     def __init__(self, num_steps_N, tiling_name_str = "Penrose", exact = False): 
           self.num_steps = num_steps_N; 
           self.tiling_name = tiling_name_str; 
+          self.exact = exact; 
           
           radiusR = DEFAULT_RADIUS_R; 
           point_to_vector = lambda pt: Penrose_Tiling.complex_to_vector(pt);
@@ -82,6 +95,54 @@ class Penrose_Tiling(Tiling):
          return result
      ## def 
      
+     ## subdivide_steps
+      # Performs several substitution steps on a list of triangles
+      # @param triangles A list of (color, A, B, C) triangles
+      # @param num_steps The number of substitution steps
+      # @return          The list of the triangles after the steps
+     ##
+     def subdivide_steps(self, triangles, num_steps): 
+          for i in range(num_steps): 
+               triangles = self.subdivide(triangles); 
+          ## for 
+          return triangles; 
+     ## def 
+     
+     ## triangles_to_arrays
+      # Static method that converts a list of (color, A, B, C) triangles 
+      # into an array of the colors and an (n, 3) complex array of vertices
+     ##
+     @staticmethod
+     def triangles_to_arrays(triangles): 
+          colors = np.array([tri[0] for tri in triangles], dtype = np.uint8); 
+          vertices = np.array([tri[1:] for tri in triangles], dtype = np.complex128); 
+          return (colors, vertices.reshape(-1, 3)); 
+     ## def 
+     
+     ## subdivide_exact
+      # Static method that performs one substitution step on the exact 
+      # (Z[phi] coefficient) representation of the triangles
+      # @param colors    The array of triangle colors
+      # @param offsets   The array of offsets of the triangles into coeffs
+      # @param coeffs    The (num_vertices, 2, 2) exact vertex coefficients
+      # @return          The colors, offsets and coefficients after one 
+      #                  more step (in the same order as subdivide)
+     ##
+     @staticmethod
+     def subdivide_exact(colors, offsets, coeffs): 
+          ridx, red = tiles_of_type(colors, offsets, coeffs, COLOR_RED, 3); 
+          A, B, C = red[:, 0], red[:, 1], red[:, 2]; 
+          P = A + ZPHI.divide(B - A, PHI); 
+          subtiles = [(ridx, COLOR_RED, [C, P, B]), (ridx, COLOR_BLUE, [P, C, A])]; 
+          bidx, blue = tiles_of_type(colors, offsets, coeffs, COLOR_BLUE, 3); 
+          A, B, C = blue[:, 0], blue[:, 1], blue[:, 2]; 
+          Q = B + ZPHI.divide(A - B, PHI); 
+          R = B + ZPHI.divide(C - B, PHI); 
+          subtiles += [(bidx, COLOR_BLUE, [R, C, A]), (bidx, COLOR_BLUE, [Q, R, B]), 
+                       (bidx, COLOR_RED, [R, Q, A])]; 
+          return merge_subtiles(subtiles); 
+     ## def 
+     
      ## complex_to_vector
       # Static method that converts an input 2D vector point into its 
       # corresponding complex number representation
@@ -90,16 +151,12 @@ class Penrose_Tiling(Tiling):
      def complex_to_vector(point): 
           return vector([point.real, point.imag]); 
      
-     ## get_tiles
-      # Gets the polygonal Penrose tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_initial_wheel
+      # Creates an initial wheel of red triangles around the origin 
+      # (from the comments section of the reference)
+      # @return A list of (color, A, B, C) triangles with complex vertices
      ##
-     def get_tiles(self): 
-          
-          #radiusR = DEFAULT_RADIUS_R; 
-          #triangles = [(COLOR_RED, 0, 4 * radiusR, 4 * radiusR * ((0j-1)**-.2))]
-          # Create an initial wheel of red triangles around the origin 
-          # (from the comments section of the reference): 
+     def get_initial_wheel(self): 
           radiusR = DEFAULT_RADIUS_R; 
           triangles = []
           for i in xrange(10):
@@ -110,17 +167,137 @@ class Penrose_Tiling(Tiling):
                ##
                triangles.append((COLOR_RED, B, 0j, C)) 
           ##         
-          
-          for i in range(self.num_steps):
-               triangles = self.subdivide(triangles)
-    
-          point_to_vector = lambda pt: Penrose_Tiling.complex_to_vector(pt);
-          
-          tile_list = []; 
-          for (color, A, B, C) in triangles:
-               tile_list.append([point_to_vector(A), point_to_vector(B), point_to_vector(C)]); 
-          return tile_list; 
-
+          return triangles; 
+     ## def 
+     
+     ## get_root_tiles
+      # Returns the initial wheel of triangles at the root of the 
+      # substitution tree
+     ##
+     def get_root_tiles(self): 
+          return self.get_initial_wheel(); 
+     
+     ## num_substitution_steps
+      # Returns the number of substitution steps applied to the wheel
+     ##
+     def num_substitution_steps(self): 
+          return self.num_steps; 
+     
+     ## get_subtiles
+      # Returns the subtriangles of a (color, A, B, C) triangle
+     ##
+     def get_subtiles(self, triangle): 
+          return self.subdivide([triangle]); 
+     
+     ## tile_to_points
+      # Returns the 2D vertex points of a (color, A, B, C) triangle
+     ##
+     def tile_to_points(self, triangle): 
+          return [(P.real, P.imag) for P in triangle[1:]]; 
+     
+     ## get_tile_type
+      # Returns the color of a (color, A, B, C) triangle
+     ##
+     def get_tile_type(self, triangle): 
+          return triangle[0]; 
+     
+     ## tiles_to_tileset
+      # Converts a list of (color, A, B, C) triangles to a TileSet
+     ##
+     def tiles_to_tileset(self, tile_list, dtype = np.float64): 
+          (colors, vertices) = Penrose_Tiling.triangles_to_arrays(tile_list); 
+          tile_vertices = np.stack([vertices.real, vertices.imag], axis = -1); 
+          return TileSet.from_array(tile_vertices, colors, dtype); 
+     ## def 
+     
+     ## tiles_to_level_arrays
+      # Converts a list of (color, A, B, C) triangles to the arrays of their 
+      # colors and complex vertices stored in the level cache
+     ##
+     def tiles_to_level_arrays(self, tile_list): 
+          (colors, vertices) = Penrose_Tiling.triangles_to_arrays(tile_list); 
+          return {'colors': colors, 'vertices': vertices}; 
+     ## def 
+     
+     ## level_arrays_to_tiles
+      # Inverse of tiles_to_level_arrays
+     ##
+     def level_arrays_to_tiles(self, arrays): 
+          return [(int(color), A, B, C) for (color, (A, B, C)) in 
+                  zip(arrays['colors'], arrays['vertices'].tolist())]; 
+     ## def 
+     
+     ## get_tiles
+      # Gets the polygonal Penrose tiles after N steps (the whole level of 
+      # triangles is subdivided at once with the subdivide rule of the 
+      # class, and the windowed tiles are substituted by Tiling.get_tiles)
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A list of tiles in the computed substitution tiling
+     ##
+     def get_tiles(self, window = None): 
+          if self.exact: 
+               return self.get_tiles_exact(window); 
+          elif window is not None: 
+               return Tiling.get_tiles(self, window); 
+          ## if 
+          (start, level_arrays) = self.resume_level(self.num_steps); 
+          if level_arrays is None: 
+               triangles = self.get_initial_wheel(); 
+          else: 
+               triangles = self.level_arrays_to_tiles(level_arrays); 
+          ## if 
+          for i in range(start, self.num_steps):
+               if self.use_parallel(len(triangles)): 
+                    num_steps_left = self.num_steps - i; 
+                    subdivide_chunk = lambda chunk: self.tiles_to_tileset( 
+                                      self.subdivide_steps(chunk, num_steps_left)); 
+                    return TileSet.concatenate(parallel_map_chunks(subdivide_chunk, triangles, 
+                                                                   self.num_workers)); 
+               ## if 
+               triangles = self.subdivide(triangles); 
+               if self.caches_levels(): 
+                    self.store_level(i + 1, self.tiles_to_level_arrays(triangles)); 
+               ## if 
+          ## for 
+          return self.tiles_to_tileset(triangles); 
+     ## def 
+     
+     ## get_tiles_exact
+      # Gets the polygonal Penrose tiles after N steps where the vertex 
+      # coordinates are computed exactly in Z[phi] (with the subdivide_exact 
+      # rule of the class)
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A TileSet with exact vertex coordinates
+     ##
+     def get_tiles_exact(self, window = None): 
+          (start, level_arrays) = (0, None) if window is not None else \
+                                  self.resume_level(self.num_steps); 
+          if level_arrays is None: 
+               triangles = self.get_initial_wheel(); 
+               points = [(P.real, P.imag) for (color, A, B, C) in triangles for P in (A, B, C)]; 
+               coeffs = ExactCoords.from_points(ZPHI, points, PENROSE_EXACT_SCALE).coeffs; 
+               colors = np.array([color for (color, A, B, C) in triangles], dtype = np.uint8); 
+               offsets = np.arange(0, 3 * len(triangles) + 1, 3); 
+          else: 
+               colors, offsets = level_arrays['colors'], level_arrays['offsets']; 
+               coeffs = level_arrays['coeffs']; 
+          ## if 
+          for i in range(start, self.num_steps): 
+               colors, offsets, coeffs = self.subdivide_exact(colors, offsets, coeffs); 
+               if window is not None: 
+                    exact = ExactCoords(ZPHI, coeffs, PENROSE_EXACT_SCALE); 
+                    tiles = self.window_select(TileSet.from_exact(exact, offsets, colors), 
+                                               self.num_steps - i - 1, window); 
+                    colors, offsets, coeffs = tiles.tile_types, tiles.offsets, tiles.exact.coeffs; 
+               else: 
+                    self.store_level(i + 1, {'colors': colors, 'offsets': offsets, 
+                                             'coeffs': coeffs}); 
+               ## if 
+          ## for 
+          exact = ExactCoords(ZPHI, coeffs, PENROSE_EXACT_SCALE); 
+          return TileSet.from_exact(exact, offsets, colors); 
      ## def 
 
 ## class 
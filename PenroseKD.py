@@ -5,41 +5,31 @@
 #### See: http://tilings.math.uni-bielefeld.de/substitution/penrose-kite-dart/
 #### Adapted From: http://preshing.com/20110831/penrose-tiling-explained/
 
-import math
-import cmath
 import sys
 
 from sage.all import *
-from AffineTransformOp import AffineTransformOp
-from Tiling import Tiling
-
-## 
- # Python constants denoting the type of the tile
-##
-COLOR_RED = 0; 
-COLOR_BLUE = 1; 
-
-## 
- # Python constants defining a default "large radius R" and a floating 
- # point constant for the golden ratio
-##
-DEFAULT_RADIUS_R = 10; 
-GOLDEN_RATIO = float(golden_ratio); 
+from Penrose import Penrose_Tiling, COLOR_RED, COLOR_BLUE, GOLDEN_RATIO
+from AlgebraicCoords import ZPHI, PHI, tiles_of_type, merge_subtiles
 
 ## PenroseKD_Tiling
- # A Tiling subclass implementing the penrose kite-dart tiling 
+ # A Tiling subclass implementing the penrose kite-dart tiling (which 
+ # substitutes the same initial wheel of triangles as the rhomb tiling, so 
+ # it only replaces the subdivision rules of Penrose_Tiling)
 ##
-class PenroseKD_Tiling(Tiling): 
+class PenroseKD_Tiling(Penrose_Tiling): 
 
      ## __init__
       # Initialization function for the PenroseKD_Tiling class 
       # @param num_steps_N     The number of substitution steps in the tiling
       # @param tiling_name_str Optional tiling name string 
       #                        (defaults to "PenroseKD")
+      # @param exact           Whether to compute the tiles with exact 
+      #                        coordinates in Z[phi] (defaults to False)
      ##
-     def __init__(self, num_steps_N, tiling_name_str = "PenroseKD"): 
+     def __init__(self, num_steps_N, tiling_name_str = "PenroseKD", exact = False): 
           self.num_steps = num_steps_N; 
           self.tiling_name = tiling_name_str; 
+          self.exact = exact; 
           self.INIT_TILE = [];
      ## def 
      
@@ -77,44 +67,28 @@ class PenroseKD_Tiling(Tiling):
          return result
      ## def 
      
-     ## complex_to_vector
-      # Static method that converts an input 2D vector point into its 
-      # corresponding complex number representation
+     ## subdivide_exact
+      # Static method that performs one substitution step on the exact 
+      # (Z[phi] coefficient) representation of the triangles
+      # @param colors    The array of triangle colors
+      # @param offsets   The array of offsets of the triangles into coeffs
+      # @param coeffs    The (num_vertices, 2, 2) exact vertex coefficients
+      # @return          The colors, offsets and coefficients after one 
+      #                  more step (in the same order as subdivide)
      ##
      @staticmethod
-     def complex_to_vector(point): 
-          return vector([point.real, point.imag]); 
-     
-     ## get_tiles
-      # Gets the polygonal Penrose tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
-     ##
-     def get_tiles(self): 
-          
-          # Create an initial wheel of red triangles around the origin 
-          # (from the comments section of the reference): 
-          radiusR = DEFAULT_RADIUS_R; 
-          triangles = []
-          for i in xrange(10):
-               B = cmath.rect(1, (2*i - 1) * math.pi / radiusR)
-               C = cmath.rect(1, (2*i + 1) * math.pi / radiusR)
-               if i % 2 == 0:
-                    B, C = C, B # Make sure to mirror every second triangle
-               ##
-               triangles.append((COLOR_RED, B, 0j, C)) 
-          ##
-          
-          for i in range(self.num_steps):
-               triangles = self.subdivide(triangles)
-    
-          point_to_vector = lambda pt: PenroseKD_Tiling.complex_to_vector(pt);
-          
-          tile_list = []; 
-          for (color, A, B, C) in triangles:
-               tile_list.append([point_to_vector(A), point_to_vector(B), \
-                                 point_to_vector(C)]); 
-          return tile_list; 
-
+     def subdivide_exact(colors, offsets, coeffs): 
+          ridx, red = tiles_of_type(colors, offsets, coeffs, COLOR_RED, 3); 
+          A, B, C = red[:, 0], red[:, 1], red[:, 2]; 
+          Q = A + ZPHI.divide(B - A, PHI); 
+          R = B + ZPHI.divide(C - B, PHI); 
+          subtiles = [(ridx, COLOR_BLUE, [R, Q, B]), (ridx, COLOR_RED, [Q, A, R]), 
+                      (ridx, COLOR_RED, [C, A, R])]; 
+          bidx, blue = tiles_of_type(colors, offsets, coeffs, COLOR_BLUE, 3); 
+          A, B, C = blue[:, 0], blue[:, 1], blue[:, 2]; 
+          P = C + ZPHI.divide(A - C, PHI); 
+          subtiles += [(bidx, COLOR_BLUE, [B, P, A]), (bidx, COLOR_RED, [P, C, B])]; 
+          return merge_subtiles(subtiles); 
      ## def 
 
 ## class 
@@ -9,6 +9,7 @@ import sys
 from math import sin, cos, tan
 from sage.all import *
 from Tiling import Tiling
+from TileSet import TileSet
 
 ## cot
  # Defines the cotangent function not present in the Python math library
@@ -693,7 +694,7 @@ class Pentagon_Tiling(Tiling):
                
                ## for y
           ## for x
-          return tiles; 
+          return TileSet.from_tiles(tiles); 
 
      ## def 
 
@@ -104,21 +104,24 @@ class Pinwheel_Tiling(Tiling):
           return Inflate(prev_tiles); 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal Pinwheel tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_inflation_factor
+      # Returns the factor sqrt(5) by which each substitution step scales 
+      # the tiles
      ##
-     def get_tiles(self): 
-          
-          init_tile = self.get_initial_tile(); 
-          tile_list = [init_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          return tile_list;
-
-     ## def 
+     def get_inflation_factor(self): 
+          return SCALE_FACTOR; 
+     
+     ## get_root_tiles
+      # Returns the initial tile at the root of the substitution tree
+     ##
+     def get_root_tiles(self): 
+          return [self.get_initial_tile()]; 
+     
+     ## get_subtiles
+      # Returns the subtiles of a tile after one more substitution step
+     ##
+     def get_subtiles(self, tile): 
+          return Inflate([tile]); 
 
 ## class 
 
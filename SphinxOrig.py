@@ -181,29 +181,31 @@ class Sphinx_Tiling(Tiling):
           return Inflate(prev_tiles); 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal Sphinx tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_inflation_factor
+      # Returns the factor by which each substitution step scales the 
+      # tile positions
      ##
-     def get_tiles(self): 
-          
-          init_tile = [1, vector([0, 0])]; 
-          tile_list = [init_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          
-          tile_points = []; 
-          for tile in tile_list: 
-               tile_coords = TileCoordinates(tile[0], tile[1]); 
-               two_coords = map(TwoCoordinates, tile_coords); 
-               tile_points.append(two_coords); 
-          ## for 
-          
-          return tile_points; 
-
-     ## def 
+     def get_inflation_factor(self): 
+          return float(SCALE_FACTOR); 
+     
+     ## get_root_tiles
+      # Returns the initial [type, position] tile at the root of the 
+      # substitution tree
+     ##
+     def get_root_tiles(self): 
+          return [[1, vector([0, 0])]]; 
+     
+     ## get_subtiles
+      # Returns the subtiles of a tile after one more substitution step
+     ##
+     def get_subtiles(self, tile): 
+          return Inflate([tile]); 
+     
+     ## tile_to_points
+      # Returns the 2D vertex points of a [type, position] tile
+     ##
+     def tile_to_points(self, tile): 
+          return map(TwoCoordinates, TileCoordinates(tile[0], tile[1])); 
 
 ## class 
 
@@ -0,0 +1,244 @@
+#### SubstitutionEngine.py
+#### Defines a vectorized substitution engine for tilings whose subtiles are
+#### images of the previous tiles under a fixed list of affine maps
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+
+##
+ # The identity map as a 2x3 affine array [M | T]
+##
+IDENTITY_AFFINE = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]);
+
+## affine_op_to_arrays
+ # Converts an AffineTransformOp object into a pair of NumPy arrays
+ # @param op An AffineTransformOp object
+ # @return   A 2x2 float array for the matrix term and a length 2 float
+ #           array for the translation term of the transformation
+##
+def affine_op_to_arrays(op):
+     return np.array(op.matrix_M), np.array(op.matrix_T);
+## def
+
+## as_tile_array
+ # Converts a list of tiles (lists of 2D vectors) with the same number of
+ # vertices into a (n_tiles, k_vertices, 2) float array
+ # @param tiles A list of tiles or an array of tiles
+ # @return      The corresponding float64 NumPy array
+##
+def as_tile_array(tiles):
+     if isinstance(tiles, np.ndarray):
+          return tiles.astype(np.float64, copy = False);
+     ## if
+     return np.array([[[float(pt[0]), float(pt[1])] for pt in tile]
+                      for tile in tiles], dtype = np.float64);
+## def
+
+## apply_affine_batch
+ # Applies one affine map to every vertex of an array of tiles at once
+ # @param M     The 2x2 matrix term of the map
+ # @param T     The translation term of the map
+ # @param tiles A (n_tiles, k_vertices, 2) array of tiles
+ # @param out   An optional output array of the same shape as tiles
+ # @return      The (n_tiles, k_vertices, 2) array of transformed tiles
+##
+def apply_affine_batch(M, T, tiles, out = None):
+     out = np.matmul(tiles, M.T, out = out);
+     out += T;
+     return out;
+## def
+
+## compose_affine_batch
+ # Composes each of an array of affine maps with a fixed affine map
+ # @param maps A (n_maps, 2, 3) array of affine maps [M | T]
+ # @param M    The 2x2 matrix term of the map applied first
+ # @param T    The translation term of the map applied first
+ # @return     The (n_maps, 2, 3) array of the compositions x -> maps(M x + T)
+##
+def compose_affine_batch(maps, M, T):
+     composed = np.empty(maps.shape, dtype = np.float64);
+     composed[:, :, 0:2] = np.matmul(maps[:, :, 0:2], M);
+     composed[:, :, 2] = np.matmul(maps[:, :, 0:2], T) + maps[:, :, 2];
+     return composed;
+## def
+
+## apply_affine_maps
+ # Computes the images of one tile under each of an array of affine maps
+ # @param maps A (n_maps, 2, 3) array of affine maps [M | T]
+ # @param tile A (k_vertices, 2) array of the tile vertices
+ # @return     The (n_maps, k_vertices, 2) array of the image tiles
+##
+def apply_affine_maps(maps, tile):
+     return np.matmul(tile, np.swapaxes(maps[:, :, 0:2], 1, 2)) + maps[:, np.newaxis, :, 2];
+## def
+
+## AffineSubstitutionEngine
+ # Performs the substitution steps of a tiling in which every tile at level
+ # k+1 is the image of a tile at level k under one of a fixed list of
+ # affine maps (for example, AmmannChair2 or Chair3). All tiles of a level
+ # are stored in one (n_tiles, k_vertices, 2) array so that each step costs
+ # one batched matrix product and translation per map. Two-level
+ # recurrences like the AmmannChair tiling, where the next level is built
+ # from the maps applied to both the previous and the second previous level,
+ # are handled by the optional second_ops parameter.
+##
+class AffineSubstitutionEngine(object):
+
+     ## __init__
+      # Initialization function for the AffineSubstitutionEngine class
+      # @param ops        A list of AffineTransformOp objects applied to the
+      #                   tiles of the previous level
+      # @param second_ops An optional list of AffineTransformOp objects
+      #                   applied to the tiles two levels back
+     ##
+     def __init__(self, ops, second_ops = None):
+          self.ops = list(ops);
+          self.second_ops = list(second_ops) if second_ops != None else [];
+          self.op_arrays = [affine_op_to_arrays(op) for op in self.ops];
+          self.second_op_arrays = [affine_op_to_arrays(op) for op in self.second_ops];
+     ## def
+
+     ## is_two_level
+      # Returns whether the substitution rule uses the second previous level
+     ##
+     @property
+     def is_two_level(self):
+          return len(self.second_ops) > 0;
+
+     ## next_tiles
+      # Computes the tiles after one more substitution step. The tiles are
+      # ordered as in Tiling.transform_full_points_list: all images under
+      # the first map, then all images under the second map, and so on
+      # @param prev_tiles        The tiles after one step back
+      # @param second_prev_tiles The tiles after two steps back (only used
+      #                          by two-level recurrences)
+      # @return                  A (n_tiles, k_vertices, 2) array of tiles
+     ##
+     def next_tiles(self, prev_tiles, second_prev_tiles = None):
+          prev_tiles = as_tile_array(prev_tiles);
+          terms = [(op_arrays, prev_tiles) for op_arrays in self.op_arrays];
+          if self.is_two_level and second_prev_tiles is not None and \
+             len(second_prev_tiles) > 0:
+               second_prev_tiles = as_tile_array(second_prev_tiles);
+               terms += [(op_arrays, second_prev_tiles) \
+                         for op_arrays in self.second_op_arrays];
+          ## if
+          num_tiles = sum([len(tiles) for (op_arrays, tiles) in terms]);
+          kverts = prev_tiles.shape[1];
+          next_tiles = np.empty((num_tiles, kverts, 2), dtype = np.float64);
+          tidx = 0;
+          for ((M, T), tiles) in terms:
+               apply_affine_batch(M, T, tiles, out = next_tiles[tidx:tidx + len(tiles)]);
+               tidx += len(tiles);
+          ## for
+          return next_tiles;
+     ## def
+
+     ## child_maps
+      # Composes an array of maps with each of the substitution maps. Every
+      # tile after k steps is the image of the initial tile under a word
+      # op1 o op2 o ... o opk of the maps, and since the substitution maps
+      # dissect the initial tile, the tiles which descend from such a word
+      # (i.e., the longer words beginning with it) lie inside of its image.
+      # @param maps A (n_maps, 2, 3) array of composed maps [M | T]
+      # @return     A list of ((n_maps, 2, 3) array, num_steps) pairs for the
+      #             maps composed with each substitution map (num_steps is
+      #             two for the maps applied to the second previous level)
+     ##
+     def child_maps(self, maps):
+          children = [(compose_affine_batch(maps, M, T), 1) for (M, T) in self.op_arrays];
+          children += [(compose_affine_batch(maps, M, T), 2) \
+                       for (M, T) in self.second_op_arrays];
+          return children;
+     ## def
+
+     ## map_steps
+      # Returns the compositions of one map with each of the substitution
+      # maps paired with the number of steps they consume (in the format of
+      # Tiling.get_subtile_steps)
+      # @param affine A 2x3 array of a composed map [M | T]
+     ##
+     def map_steps(self, affine):
+          return [(maps[0], dsteps) for (maps, dsteps) \
+                  in self.child_maps(affine[np.newaxis])];
+     ## def
+
+     ## map_tile
+      # Returns the image of a tile under a composed map
+      # @param affine A 2x3 array of a composed map [M | T]
+      # @param tile   The tile (a list of 2D vectors)
+      # @return       The (k_vertices, 2) array of the image tile
+     ##
+     def map_tile(self, affine, tile):
+          return apply_affine_maps(affine[np.newaxis], as_tile_array([tile])[0])[0];
+     ## def
+
+     ## substitute
+      # Performs a number of substitution steps starting from one tile
+      # @param init_tile The initial tile (a list of 2D vectors)
+      # @param num_steps The number of substitution steps to perform
+      # @param cull      An optional function cull(tiles, steps) returning a
+      #                  boolean mask of the (supertile) tiles to keep given
+      #                  the number of steps left for them (for example,
+      #                  Tiling.window_culler)
+      # @param levels    An optional object with the resume_level(max_level)
+      #                  and store_level(level, arrays) methods of a Tiling,
+      #                  used to start from the deepest cached level and to
+      #                  cache each new level (unused when culling)
+      # @return          A (n_tiles, k_vertices, 2) array of tiles
+     ##
+     def substitute(self, init_tile, num_steps, cull = None, levels = None):
+          if cull is not None:
+               return self.substitute_culled(init_tile, num_steps, cull);
+          ## if
+          (start, level_arrays) = (0, None) if levels is None else \
+                                  levels.resume_level(num_steps);
+          if level_arrays is None:
+               prev_tiles = as_tile_array([init_tile]);
+               second_prev_tiles = prev_tiles;
+          else:
+               prev_tiles = level_arrays['prev_tiles'];
+               second_prev_tiles = level_arrays['second_prev_tiles'];
+          ## if
+          for n in range(start, num_steps):
+               next_tiles = self.next_tiles(prev_tiles, second_prev_tiles);
+               second_prev_tiles = prev_tiles;
+               prev_tiles = next_tiles;
+               if levels is not None:
+                    levels.store_level(n + 1, {'prev_tiles': prev_tiles,
+                                               'second_prev_tiles': second_prev_tiles});
+               ## if
+          ## for
+          return prev_tiles;
+     ## def
+
+     ## substitute_culled
+      # Performs a number of substitution steps starting from one tile while
+      # pruning the supertiles rejected by a cull function. The composed
+      # maps are expanded from the outermost map inwards (see child_maps),
+      # so each supertile contains all of its descendant tiles.
+      # @param init_tile The initial tile (a list of 2D vectors)
+      # @param num_steps The number of substitution steps to perform
+      # @param cull      A function cull(tiles, steps) as in substitute
+      # @return          A (n_tiles, k_vertices, 2) array of tiles
+     ##
+     def substitute_culled(self, init_tile, num_steps, cull):
+          init_tile = as_tile_array([init_tile])[0];
+          maps = IDENTITY_AFFINE[np.newaxis];
+          steps = np.array([num_steps]);
+          tiles_list = [];
+          while len(maps) > 0:
+               tiles = apply_affine_maps(maps, init_tile);
+               keep = cull(tiles, np.maximum(steps, 0));
+               (maps, steps, tiles) = (maps[keep], steps[keep], tiles[keep]);
+               tiles_list.append(tiles[steps <= 0]);
+               (maps, steps) = (maps[steps > 0], steps[steps > 0]);
+               children = self.child_maps(maps);
+               maps = np.concatenate([cmaps for (cmaps, dsteps) in children]);
+               steps = np.concatenate([steps - dsteps for (cmaps, dsteps) in children]);
+          ## while
+          return np.concatenate(tiles_list);
+     ## def
+
+## class
@@ -0,0 +1,392 @@
+#### TileSet.py
+#### Defines an array-backed container for the polygonal tiles of a tiling
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+from sage.all import vector
+from AlgebraicCoords import ExactCoords, concatenate_exact
+
+##
+ # The floating point types supported for the stored tile vertices
+##
+TILESET_DTYPES = (np.float64, np.float32);
+
+## TileSet
+ # A compact replacement for the lists of lists of Sage vectors returned by
+ # Tiling.get_tiles. The vertices of all tiles are stored in one contiguous
+ # (num_vertices, 2) array, the tile boundaries in an offsets array (so that
+ # tile i consists of the vertices offsets[i]:offsets[i+1]), and the
+ # prototile type of each tile in a uint8 array. An indexed TileSet instead
+ # stores each distinct vertex once (see VertexPool) together with an array
+ # of the vertex IDs of the tiles. Indexing and iteration
+ # still return lists of Sage vectors (built lazily) so that older code
+ # written against the list of tiles representation keeps working.
+##
+class TileSet(object):
+
+     ## __init__
+      # Initialization function for the TileSet class
+      # @param vertices   A (num_vertices, 2) array of the tile vertices
+      # @param offsets    An array of num_tiles + 1 offsets into vertices
+      # @param tile_types An optional array of prototile type codes
+      #                   (defaults to all zeros)
+      # @param dtype      The floating point type of the stored vertices
+      #                   (one of np.float64 or np.float32)
+      # @param exact      An optional AlgebraicCoords.ExactCoords object
+      #                   holding the exact coordinates of the vertices
+      #                   (the vertices parameter may then be None, in which
+      #                   case the float vertices are converted from these)
+      # @param vertex_ids An optional array of num_vertices indices into 
+      #                   the vertices parameter, which then holds the 
+      #                   distinct points shared by the tiles
+     ##
+     def __init__(self, vertices, offsets, tile_types = None, dtype = np.float64, 
+                  exact = None, vertex_ids = None):
+          if dtype not in TILESET_DTYPES:
+               raise ValueError("Unsupported TileSet dtype: %s" % str(dtype));
+          ## if
+          self._exact = exact;
+          if vertices is None and exact is not None:
+               vertices = exact.to_float();
+          ## if
+          self._vertices = np.ascontiguousarray(vertices, dtype = dtype).reshape(-1, 2);
+          self._offsets = np.ascontiguousarray(offsets, dtype = np.int64);
+          self._vertex_ids = None;
+          if vertex_ids is not None:
+               self._vertex_ids = np.ascontiguousarray(vertex_ids, dtype = np.int64);
+          ## if
+          num_tiles = len(self._offsets) - 1;
+          if tile_types is None:
+               tile_types = np.zeros(num_tiles, dtype = np.uint8);
+          ## if
+          self._tile_types = np.ascontiguousarray(tile_types, dtype = np.uint8);
+          if num_tiles < 0 or len(self._tile_types) != num_tiles or \
+             self._offsets[-1] != self.num_vertices:
+               raise ValueError("Inconsistent TileSet vertex, offset and type arrays");
+          ## if
+     ## def
+
+     ## from_tiles
+      # Static method that builds a TileSet from a list of polygonal tiles
+      # @param tiles      A list of tiles (each a list of 2D vectors)
+      # @param tile_types An optional list of prototile type codes
+      # @param dtype      The floating point type of the stored vertices
+      # @return           The corresponding TileSet object
+     ##
+     @staticmethod
+     def from_tiles(tiles, tile_types = None, dtype = np.float64):
+          if isinstance(tiles, TileSet):
+               return tiles;
+          ## if
+          lengths = [len(tile) for tile in tiles];
+          offsets = np.zeros(len(lengths) + 1, dtype = np.int64);
+          offsets[1:] = np.cumsum(lengths);
+          vertices = np.empty((offsets[-1], 2), dtype = dtype);
+          vidx = 0;
+          for tile in tiles:
+               for pt in tile:
+                    vertices[vidx, 0], vertices[vidx, 1] = float(pt[0]), float(pt[1]);
+                    vidx += 1;
+               ## for
+          ## for
+          return TileSet(vertices, offsets, tile_types, dtype);
+     ## def
+
+     ## from_tile_objects
+      # Static method that builds a TileSet from a list of tile objects
+      # (for example, CesiTile or AmmannTile) which implement to_points and
+      # optionally store a tile_type attribute
+      # @param tile_objs A list of tile objects
+      # @param dtype     The floating point type of the stored vertices
+      # @return          The corresponding TileSet object
+     ##
+     @staticmethod
+     def from_tile_objects(tile_objs, dtype = np.float64):
+          tile_objs = list(tile_objs);
+          tiles = [tobj.to_points() for tobj in tile_objs];
+          tile_types = [getattr(tobj, 'tile_type', 0) for tobj in tile_objs];
+          return TileSet.from_tiles(tiles, tile_types, dtype);
+     ## def
+
+     ## from_array
+      # Static method that builds a TileSet from an array of tiles which
+      # all have the same number of vertices
+      # @param tile_array A (num_tiles, k_vertices, 2) array of tile vertices
+      # @param tile_types An optional array of prototile type codes
+      # @param dtype      The floating point type of the stored vertices
+      # @return           The corresponding TileSet object
+     ##
+     @staticmethod
+     def from_array(tile_array, tile_types = None, dtype = np.float64):
+          tile_array = np.asarray(tile_array, dtype = dtype);
+          num_tiles, kverts = tile_array.shape[0], tile_array.shape[1];
+          offsets = np.arange(0, num_tiles * kverts + 1, kverts, dtype = np.int64) \
+                    if kverts > 0 else np.zeros(num_tiles + 1, dtype = np.int64);
+          return TileSet(tile_array.reshape(-1, 2), offsets, tile_types, dtype);
+     ## def
+
+     ## from_exact
+      # Static method that builds a TileSet from exact vertex coordinates
+      # @param exact      An ExactCoords object with one point per vertex
+      # @param offsets    An array of num_tiles + 1 offsets into the vertices
+      # @param tile_types An optional array of prototile type codes
+      # @param dtype      The floating point type of the stored vertices
+      # @return           The corresponding TileSet object
+     ##
+     @staticmethod
+     def from_exact(exact, offsets, tile_types = None, dtype = np.float64):
+          return TileSet(None, offsets, tile_types, dtype, exact);
+     ## def
+
+     ## concatenate
+      # Static method that joins several TileSet objects into one
+      # (preserving the order of the tiles)
+      # @param tilesets A list of TileSet objects
+      # @return         A single TileSet containing all of the tiles
+     ##
+     @staticmethod
+     def concatenate(tilesets):
+          tilesets = list(tilesets);
+          if len(tilesets) == 0:
+               return TileSet(np.zeros((0, 2)), np.zeros(1, dtype = np.int64));
+          ## if
+          dtype = tilesets[0].dtype;
+          vertices = np.concatenate([ts.vertices for ts in tilesets]);
+          lengths = np.concatenate([ts.lengths for ts in tilesets]);
+          offsets = np.zeros(len(lengths) + 1, dtype = np.int64);
+          offsets[1:] = np.cumsum(lengths);
+          tile_types = np.concatenate([ts.tile_types for ts in tilesets]);
+          exact = None;
+          if all([ts.exact is not None for ts in tilesets]):
+               exact = concatenate_exact([ts.exact for ts in tilesets]);
+          ## if
+          return TileSet(vertices, offsets, tile_types, dtype, exact);
+     ## def
+
+     ## select
+      # Returns a new TileSet of the tiles picked out by a boolean mask
+      # (preserving the order of the tiles)
+      # @param mask A boolean array with one entry per tile
+      # @return     The TileSet of the selected tiles
+     ##
+     def select(self, mask):
+          mask = np.asarray(mask, dtype = bool);
+          lengths = self.lengths[mask];
+          offsets = np.zeros(len(lengths) + 1, dtype = np.int64);
+          offsets[1:] = np.cumsum(lengths);
+          vmask = np.repeat(mask, self.lengths);
+          if self._vertex_ids is not None:
+               return TileSet(self._vertices, offsets, self._tile_types[mask], self.dtype,
+                              vertex_ids = self._vertex_ids[vmask]);
+          ## if
+          exact = None;
+          if self._exact is not None:
+               exact = ExactCoords(self._exact.ring, self._exact.coeffs[vmask],
+                                   self._exact.scale);
+          ## if
+          return TileSet(self._vertices[vmask], offsets, self._tile_types[mask],
+                         self.dtype, exact);
+     ## def
+
+     ## take
+      # Returns a TileSet with the tiles at a list of indices (in the order 
+      # of the indices)
+      # @param indices An array of tile indices
+      # @return        The TileSet of the selected tiles
+     ##
+     def take(self, indices):
+          indices = np.asarray(indices, dtype = np.int64);
+          lengths = self.lengths[indices];
+          offsets = np.zeros(len(lengths) + 1, dtype = np.int64);
+          offsets[1:] = np.cumsum(lengths);
+          vindices = np.repeat(self._offsets[indices] - offsets[0:-1], lengths) + \
+                     np.arange(offsets[-1]);
+          if self._vertex_ids is not None:
+               return TileSet(self._vertices, offsets, self._tile_types[indices], self.dtype,
+                              vertex_ids = self._vertex_ids[vindices]);
+          ## if
+          exact = None;
+          if self._exact is not None:
+               exact = ExactCoords(self._exact.ring, self._exact.coeffs[vindices],
+                                   self._exact.scale);
+          ## if
+          return TileSet(self._vertices[vindices], offsets, self._tile_types[indices],
+                         self.dtype, exact);
+     ## def
+
+     ## vertices
+      # The (num_vertices, 2) array of all (non-unique) tile vertices 
+      # (gathered from the distinct points on each access when indexed)
+     ##
+     @property
+     def vertices(self):
+          if self._vertex_ids is not None:
+               return self._vertices[self._vertex_ids];
+          ## if
+          return self._vertices;
+
+     ## vertex_ids
+      # The array of the vertex IDs of the tiles of an indexed TileSet (or
+      # None when the vertices of each tile are stored separately)
+     ##
+     @property
+     def vertex_ids(self):
+          return self._vertex_ids;
+
+     ## pooled_vertices
+      # Returns the tile vertices without the copies of the shared vertices
+      # of an indexed TileSet, i.e., the distinct points referenced by some
+      # tile (otherwise returns all of the tile vertices)
+     ##
+     def pooled_vertices(self):
+          if self._vertex_ids is None:
+               return self._vertices;
+          ## if
+          used = np.zeros(len(self._vertices), dtype = bool);
+          used[self._vertex_ids] = True;
+          return self._vertices[used];
+     ## def
+
+     ## exact
+      # The ExactCoords object for the vertices (or None when the tiling
+      # was computed in floating point)
+     ##
+     @property
+     def exact(self):
+          return self._exact;
+
+     ## offsets
+      # The array of num_tiles + 1 offsets of the tiles into vertices
+     ##
+     @property
+     def offsets(self):
+          return self._offsets;
+
+     ## lengths
+      # The number of vertices in each tile
+     ##
+     @property
+     def lengths(self):
+          return np.diff(self._offsets);
+
+     ## tile_types
+      # The uint8 array of prototile type codes of each tile
+     ##
+     @property
+     def tile_types(self):
+          return self._tile_types;
+
+     ## dtype
+      # The floating point type of the stored vertices
+     ##
+     @property
+     def dtype(self):
+          return self._vertices.dtype.type;
+
+     ## num_tiles
+      # The number of tiles in the set
+     ##
+     @property
+     def num_tiles(self):
+          return len(self._offsets) - 1;
+
+     ## num_vertices
+      # The total (non-unique) number of tile vertices in the set
+     ##
+     @property
+     def num_vertices(self):
+          if self._vertex_ids is not None:
+               return len(self._vertex_ids);
+          ## if
+          return len(self._vertices);
+
+     ## tile_vertices
+      # Returns a view of the vertex array for one tile
+      # @param idx The index of the tile
+      # @return    A (k_vertices, 2) array view
+     ##
+     def tile_vertices(self, idx):
+          if self._vertex_ids is not None:
+               return self._vertices[self._vertex_ids[self._offsets[idx]:self._offsets[idx + 1]]];
+          ## if
+          return self._vertices[self._offsets[idx]:self._offsets[idx + 1]];
+
+     ## as_array
+      # Returns the tiles as a (num_tiles, k_vertices, 2) array when all of
+      # the tiles have the same number of vertices (otherwise returns None)
+     ##
+     def as_array(self):
+          lengths = self.lengths;
+          if len(lengths) == 0:
+               return self.vertices.reshape(0, 0, 2);
+          elif np.all(lengths == lengths[0]):
+               return self.vertices.reshape(len(lengths), lengths[0], 2);
+          ## if
+          return None;
+
+     ## vertex_list
+      # Returns all (non-unique) tile vertices as a list of Sage vectors
+     ##
+     def vertex_list(self):
+          return [vector([float(x), float(y)]) for (x, y) in self.vertices];
+
+     ## unique_vertices
+      # Returns the distinct tile vertices as a (num_points, 2) array sorted
+      # by x and then y coordinates. When exact coordinates are available
+      # the duplicate vertices are removed by comparing the integer
+      # coefficients, so no rounding of the coordinates is needed.
+     ##
+     def unique_vertices(self):
+          if self._exact is not None:
+               upoints = self._exact.unique().to_float();
+          else:
+               upoints = np.unique(self.pooled_vertices(), axis = 0);
+          ## if
+          return upoints[np.lexsort((upoints[:, 1], upoints[:, 0]))];
+     ## def
+
+     ## to_list
+      # Converts the set to the older list of lists of Sage vectors format
+     ##
+     def to_list(self):
+          return [self[idx] for idx in range(0, self.num_tiles)];
+
+     ## __len__
+      # Returns the number of tiles in the set
+     ##
+     def __len__(self):
+          return self.num_tiles;
+
+     ## __getitem__
+      # Returns the vertices of a tile as a list of Sage vectors, or a new
+      # TileSet object (with the exact coordinates or vertex ids of the 
+      # tiles) when indexed by a slice
+     ##
+     def __getitem__(self, idx):
+          if isinstance(idx, slice):
+               return self.take(np.arange(self.num_tiles)[idx]);
+          ## if
+          if idx < 0:
+               idx += self.num_tiles;
+          ## if
+          if idx < 0 or idx >= self.num_tiles:
+               raise IndexError("TileSet index out of range");
+          ## if
+          return [vector([float(x), float(y)]) for (x, y) in self.tile_vertices(idx)];
+
+     ## __iter__
+      # Iterates over the tiles as lists of Sage vectors
+     ##
+     def __iter__(self):
+          for idx in range(0, self.num_tiles):
+               yield self[idx];
+          ## for
+
+     ## __str__
+      # Returns a short string description of the set
+     ##
+     def __str__(self):
+          return "TileSet(%d tiles, %d vertices)" % (self.num_tiles, self.num_vertices);
+
+## class
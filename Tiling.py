@@ -5,10 +5,14 @@
 
 import numpy as np
 import pprint 
+import pickle 
+import multiprocessing 
 from math import sin, cos
+from scipy.spatial import cKDTree
 
 from sage.all import *
 from AffineTransformOp import AffineTransformOp
+from TileSet import TileSet
 
 __major_version__ = "0.0";
 __release__ = "1"; 
@@ -16,6 +20,12 @@ __version__ = "%s.%s" % (__major_version__, __release__);
 
 NUMCPUS = 8
 FPNUM_DIGITS = 6
+TILE_CHUNK_SIZE = 65536
+WINDOW_CALIBRATION_STEPS = 3
+WINDOW_CALIBRATION_TILES = 4096
+PARALLEL_CHUNKS_PER_WORKER = 4
+DEDUP_SUPERTILES = 256
+PC_BLOCK_SIZE = 2048
 
 ## pifp
  # A python float of the PI constant
@@ -41,7 +51,8 @@ def round_coordinate(coord): return round(coord, FPNUM_DIGITS)
 def round_vector(v): return V(round_coordinate(X(v)), round_coordinate(Y(v)))
 
 def filter_nonzero(gaplst, round_prec = 0.0001): 
-     return list(filter(lambda gap: abs(gap) > round_prec, gaplst))
+     gaps = np.asarray(gaplst, dtype = np.float64); 
+     return gaps[np.abs(gaps) > round_prec].tolist(); 
 ##
 
 def get_solutionsXY(solns):
@@ -52,7 +63,18 @@ def get_solutionsXY(solns):
      return XYsols
 ##
 
-def solve_system(Axy, RA, Bxy, RB, cond_func = lambda x, y: True):
+## solve_system_symbolic
+ # Computes the intersection points of two circles by solving the system of 
+ # equations symbolically with Sage (this is much slower than solve_system, 
+ # but it is kept for checking the numerical routines below)
+ # @param Axy       The center of the first circle
+ # @param RA        The radius of the first circle
+ # @param Bxy       The center of the second circle
+ # @param RB        The radius of the second circle
+ # @param cond_func A predicate selecting which root (x, y) to return
+ # @return          The first root satisfying cond_func (or None)
+##
+def solve_system_symbolic(Axy, RA, Bxy, RB, cond_func = lambda x, y: True):
      [Ax, Ay], [Bx, By] = Axy, Bxy
      nfunc = lambda x: Rational(x)
      [Ax, Ay, Bx, By, RA, RB] = map(nfunc, [Ax, Ay, Bx, By, RA, RB]) # inexact reals throw errors ... 
@@ -71,6 +93,85 @@ def solve_system(Axy, RA, Bxy, RB, cond_func = lambda x, y: True):
      return None
 ## def
 
+##
+ # Branch selectors for the two intersection points of a pair of circles: 
+ # the point to the left (counterclockwise side) or to the right of the 
+ # directed line from the first center to the second center
+##
+CIRCLE_BRANCH_LEFT = 1; 
+CIRCLE_BRANCH_RIGHT = -1; 
+
+## circle_intersections
+ # Computes the two intersection points of pairs of circles in batch using 
+ # the closed-form solution. When the circles do not meet (i.e., when the 
+ # roots are complex) both points are the real part of the complex roots, 
+ # which is the point on the line between the centers closest to both 
+ # circles. Concentric circles give NaN coordinates.
+ # @param A  A (n, 2) array of the centers of the first circles
+ # @param RA A length n array (or scalar) of the radii of the first circles
+ # @param B  A (n, 2) array of the centers of the second circles
+ # @param RB A length n array (or scalar) of the radii of the second circles
+ # @return   The (n, 2) arrays of the left and right intersection points
+##
+def circle_intersections(A, RA, B, RB): 
+     A, B = np.asarray(A, dtype = np.float64), np.asarray(B, dtype = np.float64); 
+     RA, RB = np.asarray(RA, dtype = np.float64), np.asarray(RB, dtype = np.float64); 
+     AB = B - A; 
+     dist2 = AB[..., 0] ** 2 + AB[..., 1] ** 2; 
+     with np.errstate(divide = 'ignore', invalid = 'ignore'): 
+          dist = np.sqrt(dist2); 
+          a = (RA ** 2 - RB ** 2 + dist2) / (2.0 * dist); 
+          h = np.sqrt(np.maximum(RA ** 2 - a ** 2, 0.0)); 
+          unitAB = AB / dist[..., np.newaxis]; 
+     ## with 
+     M = A + a[..., np.newaxis] * unitAB; 
+     perp = np.stack([-unitAB[..., 1], unitAB[..., 0]], axis = -1); 
+     offset = h[..., np.newaxis] * perp; 
+     return M + offset, M - offset; 
+## def 
+
+## solve_circles
+ # Computes one intersection point for each of a batch of pairs of circles
+ # @param A      A (n, 2) array of the centers of the first circles
+ # @param RA     A length n array (or scalar) of the first radii
+ # @param B      A (n, 2) array of the centers of the second circles
+ # @param RB     A length n array (or scalar) of the second radii
+ # @param branch CIRCLE_BRANCH_LEFT, CIRCLE_BRANCH_RIGHT, or a length n 
+ #               array of these selectors
+ # @return       The (n, 2) array of the selected intersection points
+##
+def solve_circles(A, RA, B, RB, branch = CIRCLE_BRANCH_LEFT): 
+     left, right = circle_intersections(A, RA, B, RB); 
+     use_left = np.asarray(branch) == CIRCLE_BRANCH_LEFT; 
+     return np.where(use_left[..., np.newaxis], left, right); 
+## def 
+
+## solve_system
+ # Computes an intersection point of two circles numerically. This is a 
+ # drop-in replacement for solve_system_symbolic: the roots are tried in 
+ # turn (the left root first) and the first one satisfying cond_func is 
+ # returned, or None if there is no such root or the circles are concentric
+ # @param Axy       The center of the first circle
+ # @param RA        The radius of the first circle
+ # @param Bxy       The center of the second circle
+ # @param RB        The radius of the second circle
+ # @param cond_func A predicate selecting which root (x, y) to return
+ # @return          The first root [x, y] satisfying cond_func (or None)
+##
+def solve_system(Axy, RA, Bxy, RB, cond_func = lambda x, y: True):
+     A = [float(Axy[0]), float(Axy[1])]; 
+     B = [float(Bxy[0]), float(Bxy[1])]; 
+     left, right = circle_intersections(A, float(RA), B, float(RB)); 
+     for [x, y] in [left, right]: 
+          if np.isnan(x) or np.isnan(y): 
+               return None; 
+          elif cond_func(float(x), float(y)): 
+               return [float(x), float(y)]; 
+          ## if 
+     ## for 
+     return None; 
+## def 
+
 ## edist
  # Computes the Euclidean distance between two points
  # @param p0    The first 2D point
@@ -121,39 +222,95 @@ def sort_points_1D(points_list, sort_by_ycoords = False):
      return list(np.sort(points_list)); 
 ## def 
 
+## unique_point_array
+ # Computes the distinct points of an array of 2D points. The coordinates 
+ # are rounded to FPNUM_DIGITS digits (to avoid zero gaps from non-distinct 
+ # points that are numerically very close) by quantizing them to int64, and 
+ # each quantized point is packed into one int64 key when the coordinates 
+ # span less than 2^31 quanta, so the duplicates are found by one in-place 
+ # sort of the keys (otherwise the rows are sorted with np.lexsort). 
+ # @param points An array-like of 2D points with shape (n, 2)
+ # @return       A float array of the distinct rounded points, sorted first 
+ #               with respect to the first coordinates, then with respect 
+ #               to the second
+##
+def unique_point_array(points): 
+     points = np.asarray(points, dtype = np.float64).reshape(-1, 2); 
+     if len(points) == 0: 
+          return points.copy(); 
+     ## if 
+     quantized = np.rint(points * 10**FPNUM_DIGITS).astype(np.int64); 
+     qmin = quantized.min(axis = 0); 
+     if (quantized.max(axis = 0) - qmin).max() < 2**31: 
+          keys = ((quantized[:, 0] - qmin[0]) << 32) | (quantized[:, 1] - qmin[1]); 
+          keys.sort(); 
+          keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]; 
+          quantized = np.stack([(keys >> 32) + qmin[0], (keys & 0xFFFFFFFF) + qmin[1]], 
+                               axis = -1); 
+     else: 
+          quantized = quantized[np.lexsort((quantized[:, 1], quantized[:, 0]))]; 
+          keep = np.ones(len(quantized), dtype = bool); 
+          keep[1:] = np.any(quantized[1:] != quantized[:-1], axis = 1); 
+          quantized = quantized[keep]; 
+     ## if 
+     return quantized / float(10**FPNUM_DIGITS); 
+## def 
+
+## tileset_point_array
+ # Computes the sorted array of the distinct points of a TileSet (rounded 
+ # to FPNUM_DIGITS digits, as in unique_point_array). The pooled vertices of
+ # an indexed TileSet (see VertexPool) are distinct after the same rounding,
+ # so they are only sorted.
+ # @param tiles A TileSet object
+ # @return      The sorted (n, 2) array of the distinct points
+##
+def tileset_point_array(tiles): 
+     if tiles.vertex_ids is None: 
+          return unique_point_array(tiles.vertices); 
+     ## if 
+     quantized = np.rint(np.asarray(tiles.pooled_vertices(), dtype = np.float64) * \
+                         10**FPNUM_DIGITS); 
+     quantized = quantized[np.lexsort((quantized[:, 1], quantized[:, 0]))]; 
+     return quantized / float(10**FPNUM_DIGITS); 
+## def 
+
+## point_array
+ # Converts a list of 2D points to an (n, 2) float64 array (an array of 
+ # float64 points is returned as is, so it is not copied)
+ # @param points An (n, 2) array, or a list of 2D points
+ # @return       The (n, 2) array of the points
+##
+def point_array(points): 
+     if isinstance(points, np.ndarray): 
+          return points.astype(np.float64, copy = False).reshape(-1, 2); 
+     ## if 
+     return np.array([[float(pt[0]), float(pt[1])] for pt in points], 
+                     dtype = np.float64).reshape(-1, 2); 
+## def 
+
 ## unique_points
  # Computes a list of distinct tuples
  # @param points_list  A list of pairs
  # @param perform_sort Indicates whether to sort the list of points before the 
- #                     search for distinct pairs 
- #                     (note the list must be pre-sorted for this function 
- #                      to correctly determine the unique points in the list)
- # @return             A list of the distinct tuples in the list 
+ #                     search for distinct pairs (if not, only the 
+ #                     consecutive duplicate points are removed)
+ # @return             A list of the distinct tuples in the list (as 2D 
+ #                     vectors rounded to FPNUM_DIGITS digits)
+ # @see                unique_point_array
 ##
 def unique_points(points_list, perform_sort = True): 
 
+     points = np.array([[float(pt[0]), float(pt[1])] for pt in points_list], 
+                       dtype = np.float64).reshape(-1, 2); 
      if perform_sort == True: 
-          #points_list = sort_points_complex(points_list); 
-          points_list = sorted(points_list)
+          points = unique_point_array(points); 
+     else: 
+          points = np.round(points, FPNUM_DIGITS); 
+          keep = np.ones(len(points), dtype = bool); 
+          keep[1:] = np.any(points[1:] != points[:-1], axis = 1); 
+          points = points[keep]; 
      ## if 
-
-     ## Round floating point numbers to avoid zero gaps from non-distinct 
-     ## points that are numerically very close: 
-     points_list = map(round_vector, points_list)
-
-     (last_xc, last_yc) = points_list[0]; 
-     uidx = 1; 
-     while uidx < len(points_list): 
-          (px, py) = points_list[ uidx ]; 
-          if last_xc != px or last_yc != py: 
-               (last_xc, last_yc) = (px, py); 
-               uidx += 1; 
-          else: 
-               points_list.pop(uidx); 
-          ## if 
-     ## while 
-     
-     return points_list; 
+     return [vector([x, y]) for (x, y) in points.tolist()]; 
 
 ## def 
 
@@ -192,6 +349,212 @@ def unique_points_1D(points_list, perform_sort = True):
 
 ## def
 
+## disk_window
+ # Computes the window (bounding box) of a disk in the plane
+ # @param radius The radius of the disk
+ # @param center The center of the disk (defaults to the origin)
+ # @return       The window (xmin, ymin, xmax, ymax) containing the disk
+##
+def disk_window(radius, center = (0, 0)): 
+     cx, cy = float(center[0]), float(center[1]); 
+     return (cx - radius, cy - radius, cx + radius, cy + radius); 
+## def 
+
+## points_in_window
+ # Filters a list of points to those inside of a window
+ # @param points_list A list of 2D points
+ # @param window      A window (xmin, ymin, xmax, ymax)
+ # @return            The list of points inside the (closed) window
+##
+def points_in_window(points_list, window): 
+     (xmin, ymin, xmax, ymax) = window; 
+     return [pt for pt in points_list \
+             if xmin <= pt[0] and pt[0] <= xmax and ymin <= pt[1] and pt[1] <= ymax]; 
+## def 
+
+## polygon_boundary_mask
+ # Determines which points lie on the boundary of a polygon (up to a 
+ # distance tolerance)
+ # @param points  An (n, 2) array of points
+ # @param polygon A (k, 2) array of the polygon vertices
+ # @param tol     The distance tolerance
+ # @return        A boolean array which is True for the points within 
+ #                distance tol of an edge of the polygon
+##
+def polygon_boundary_mask(points, polygon, tol): 
+     points = np.asarray(points, dtype = np.float64).reshape(-1, 2); 
+     polygon = np.asarray(polygon, dtype = np.float64).reshape(-1, 2); 
+     mask = np.zeros(len(points), dtype = bool); 
+     for (A, B) in zip(polygon, np.roll(polygon, -1, axis = 0)): 
+          AB = B - A; 
+          t = np.zeros(len(points)); 
+          if AB.dot(AB) > 0: 
+               t = np.clip((points - A).dot(AB) / AB.dot(AB), 0.0, 1.0); 
+          ## if 
+          dists_sq = np.sum((points - A - t[:, np.newaxis] * AB)**2, axis = 1); 
+          mask |= dists_sq <= tol**2; 
+     ## for 
+     return mask; 
+## def 
+
+## lag_gaps
+ # Computes the gaps between the entries of a sorted array at all of the 
+ # lags h = 1, 2, ..., max_lag in one pass over the array
+ # @param sorted_values A sorted 1D array of n values
+ # @param max_lag       The maximal lag H
+ # @return              An (H, n) array whose row h - 1 holds the gaps 
+ #                      sorted_values[i] - sorted_values[i - h] in the 
+ #                      columns i >= h (and NaN in the columns i < h)
+##
+def lag_gaps(sorted_values, max_lag): 
+     sorted_values = np.asarray(sorted_values, dtype = np.float64); 
+     gaps = np.full((max_lag, len(sorted_values)), np.nan); 
+     for h in range(1, min(max_lag, len(sorted_values) - 1) + 1): 
+          np.subtract(sorted_values[h:], sorted_values[0:-h], out = gaps[h - 1, h:]); 
+     ## for 
+     return gaps; 
+## def 
+
+## pair_distance_blocks
+ # Generates the Euclidean distances between the distinct pairs of points 
+ # (each unordered pair once, skipping the zero distances) one block of 
+ # block_size x block_size pairs at a time, so the O(n^2) distances are 
+ # never all held in memory. With a cutoff rmax, only the pairs within 
+ # distance rmax are enumerated by querying a KD-tree of the points with 
+ # blocks of block_size points, which takes O(n k) time for k neighbors 
+ # of each point within rmax
+ # @param points        An (n, 2) array, or a list of 2D points
+ # @param edist_squared Whether to generate the squared distances
+ # @param block_size    The number of points in the row and column blocks
+ # @param rmax          An optional cutoff on the (non-squared) distances
+ # @param row_starts    An optional list of the first indices of the row 
+ #                      blocks to generate (defaults to all of the blocks, 
+ #                      see pair_row_blocks)
+ # @param points_tree   An optional prebuilt cKDTree of the points
+ # @return              A generator of 1D arrays of the distances
+##
+def pair_distance_blocks(points, edist_squared = False, block_size = PC_BLOCK_SIZE, 
+                         rmax = None, row_starts = None, points_tree = None): 
+     points = point_array(points); 
+     if row_starts is None: 
+          row_starts = range(0, len(points), block_size); 
+     ## if 
+     if rmax is not None: 
+          if points_tree is None: 
+               points_tree = cKDTree(points); 
+          ## if 
+          for i in row_starts: 
+               block_tree = cKDTree(points[i:i + block_size]); 
+               pairs = block_tree.sparse_distance_matrix(points_tree, rmax, 
+                                                         output_type = 'ndarray'); 
+               dists = pairs['v'][(pairs['i'] + i < pairs['j']) & (pairs['v'] != 0.0)]; 
+               yield dists * dists if edist_squared else dists; 
+          ## for 
+          return; 
+     ## if 
+     for i in row_starts: 
+          (xi, yi) = (points[i:i + block_size, 0:1], points[i:i + block_size, 1:2]); 
+          for j in range(i, len(points), block_size): 
+               dx = xi - points[j:j + block_size, 0]; 
+               dists = dx * dx; 
+               dy = yi - points[j:j + block_size, 1]; 
+               dists += dy * dy; 
+               if i == j: 
+                    dists = dists[np.triu_indices(len(dists), 1)]; 
+               else: 
+                    dists = dists.ravel(); 
+               ## if 
+               if not edist_squared: 
+                    np.sqrt(dists, out = dists); 
+               ## if 
+               yield dists[dists != 0.0]; 
+          ## for 
+     ## for 
+## def 
+
+## pair_row_blocks
+ # Returns the first indices of the row blocks of pair_distance_blocks 
+ # ordered so that any contiguous run of them holds a balanced share of the 
+ # pairs (the blocks near the top of the upper triangle of the pair matrix, 
+ # which hold the most pairs, are interleaved with the blocks near its 
+ # bottom) for splitting the blocks between the parallel workers
+ # @param num_points The number of points
+ # @param block_size The number of points in the blocks
+ # @return           A list of the first indices of the row blocks
+##
+def pair_row_blocks(num_points, block_size = PC_BLOCK_SIZE): 
+     row_starts = range(0, num_points, block_size); 
+     interleaved = []; 
+     for k in range((len(row_starts) + 1) // 2): 
+          interleaved.append(row_starts[k]); 
+          if len(row_starts) - 1 - k > k: 
+               interleaved.append(row_starts[len(row_starts) - 1 - k]); 
+          ## if 
+     ## for 
+     return interleaved; 
+## def 
+
+## descendant_extent_factor
+ # Computes the factor 1 + r + r^2 + ... + r^(steps-1) bounding the growth 
+ # of the descendants of a tile over several substitution steps, where r is 
+ # the maximal ratio of the size of a subtile to the size of its parent
+ # @param r     The maximal ratio of subtile to parent tile sizes
+ # @param steps The number of substitution steps (may be an array)
+ # @return      The factor (zero when steps is zero)
+##
+def descendant_extent_factor(r, steps): 
+     steps = np.maximum(steps, 0); 
+     if abs(r - 1.0) < 10**-FPNUM_DIGITS: 
+          return 1.0 * steps; 
+     ## if 
+     return (np.power(r, steps) - 1.0) / (r - 1.0); 
+## def 
+
+##
+ # The chunk function and list of items of the running parallel_map_chunks 
+ # call (inherited by the forked worker processes, so neither the function 
+ # nor the items are pickled)
+##
+_parallel_task = None; 
+
+## run_parallel_chunk
+ # Applies the chunk function of the running parallel_map_chunks call to 
+ # one chunk of its items (runs in the worker processes)
+ # @param bounds The (start, stop) indices of the chunk
+##
+def run_parallel_chunk(bounds): 
+     (chunk_func, items) = _parallel_task; 
+     return chunk_func(items[bounds[0]:bounds[1]]); 
+## def 
+
+## parallel_map_chunks
+ # Splits a list into contiguous chunks, applies a function to each chunk 
+ # in a pool of worker processes, and returns the results in the order of 
+ # the chunks (so the merged results do not depend on the scheduling). 
+ # The workers are forked, so the function and items are inherited rather 
+ # than pickled; the function should return NumPy arrays (or TileSet 
+ # objects) which are cheap to send back to the parent process. 
+ # @param chunk_func  A function mapping a sub-list of the items to a result
+ # @param items       The list of items
+ # @param num_workers The number of worker processes
+ # @return            The list of the results for the consecutive chunks
+##
+def parallel_map_chunks(chunk_func, items, num_workers): 
+     global _parallel_task; 
+     num_chunks = min(len(items), num_workers * PARALLEL_CHUNKS_PER_WORKER); 
+     splits = np.linspace(0, len(items), num_chunks + 1).astype(int); 
+     bounds = zip(splits[:-1].tolist(), splits[1:].tolist()); 
+     _parallel_task = (chunk_func, items); 
+     pool = multiprocessing.Pool(num_workers); 
+     try: 
+          return pool.map(run_parallel_chunk, bounds, 1); 
+     finally: 
+          pool.close(); 
+          pool.join(); 
+          _parallel_task = None; 
+     ## try 
+## def 
+
 ## Tiling
  # A super class intended to generate derived individual tiling classes 
  # implemented in the program
@@ -238,13 +601,609 @@ class Tiling(object):
      def get_initial_tile(self): 
           return []; 
 
-     ## get_tiles
-      # Computes the polygon tiles (list of list of 2D vectors) of the 
-      # tiling after N steps
+     ## get_root_tiles
+      # Returns the list of tiles at the root of the substitution tree 
+      # (i.e., after zero steps), or None for tilings which are not 
+      # generated by substituting each tile independently. Substitution 
+      # tilings which override this method (and the get_subtiles and 
+      # tile_to_points methods when their tiles are not objects with 
+      # to_subtiles and to_points methods) inherit get_tiles and iter_tiles.
       # (intended to be overridden by the sub-classes)
      ##
-     def get_tiles(self): 
-          return []; 
+     def get_root_tiles(self): 
+          return None; 
+     
+     ## num_substitution_steps
+      # Returns the number of substitution steps from the root tiles to 
+      # the tiles of the tiling (N - 1 by default)
+     ##
+     def num_substitution_steps(self): 
+          return self.N - 1; 
+     
+     ## get_subtiles
+      # Returns the list of subtiles of a tile after one more substitution 
+      # step (by default calls the tile object's to_subtiles method)
+     ##
+     def get_subtiles(self, tile): 
+          return tile.to_subtiles(); 
+     
+     ## get_subtile_steps
+      # Returns the subtiles of a tile paired with the number of 
+      # substitution steps each of them consumes (by default each subtile 
+      # is one step below the tile, but recurrences like the AmmannChair 
+      # tiling also place subtiles two steps below, and the subtiles which 
+      # overshoot the last step are then kept as tiles of the tiling)
+      # @return A list of (subtile, num_steps) pairs
+     ##
+     def get_subtile_steps(self, tile): 
+          return [(subtile, 1) for subtile in self.get_subtiles(tile)]; 
+     
+     ## tile_to_points
+      # Returns the list of 2D vertex points of a tile (by default calls 
+      # the tile object's to_points method, tiles without one are assumed 
+      # to already be lists or arrays of points)
+     ##
+     def tile_to_points(self, tile): 
+          if hasattr(tile, 'to_points'): 
+               return tile.to_points(); 
+          ## if 
+          return tile; 
+     
+     ## get_tile_type
+      # Returns the prototile type code of a tile (or zero if the tile 
+      # does not store one)
+     ##
+     def get_tile_type(self, tile): 
+          return getattr(tile, 'tile_type', 0); 
+     
+     ## get_next_tiling
+      # Gets the next list of tiles after one subsequent substitution step
+      # @param prev_tiles A list of the tiles after one step back
+      # @return           A list of tiles after one more step
+     ##
+     def get_next_tiling(self, prev_tiles): 
+          next_tiles = []; 
+          for tile in prev_tiles: 
+               next_tiles.extend(self.get_subtiles(tile)); 
+          ## for 
+          return next_tiles; 
+     ## def 
+     
+     ## tiles_to_tileset
+      # Converts a list of tiles (in the representation used by the 
+      # get_subtiles method) to a TileSet object
+     ##
+     def tiles_to_tileset(self, tile_list, dtype = np.float64): 
+          return TileSet.from_tiles([self.tile_to_points(tile) for tile in tile_list], 
+                                    [self.get_tile_type(tile) for tile in tile_list], 
+                                    dtype); 
+     ## def 
+     
+     ## set_level_cache
+      # Attaches a level cache (for example, a TilingCache object) to the 
+      # tiling. The get_tiles substitution loops then resume from the 
+      # deepest level of the tiling stored in the cache, and store each 
+      # intermediate level they compute, so that running the tiling for 
+      # N = 1, 2, ..., hi performs each substitution step only once. 
+      # @param level_cache An object with resume_level(tiling, max_level) 
+      #                    and save_level(tiling, level, arrays) methods, or 
+      #                    None to disable the level cache
+     ##
+     def set_level_cache(self, level_cache): 
+          self.level_cache = level_cache; 
+     ## def 
+     
+     ## resume_level
+      # Looks up the deepest cached level of the substitution 
+      # @param max_level The maximum number of substitution steps
+      # @return          A pair (level, arrays) as stored by store_level, or 
+      #                  (0, None) if there is no cached level
+     ##
+     def resume_level(self, max_level): 
+          level_cache = getattr(self, 'level_cache', None); 
+          if level_cache is None: 
+               return (0, None); 
+          ## if 
+          return level_cache.resume_level(self, max_level); 
+     ## def 
+     
+     ## caches_levels
+      # Returns whether a level cache is attached to the tiling (the 
+      # substitution loops only convert their levels to the arrays passed 
+      # to store_level when one is)
+     ##
+     def caches_levels(self): 
+          return getattr(self, 'level_cache', None) is not None; 
+     ## def 
+     
+     ## store_level
+      # Stores one level of the substitution in the level cache (if any)
+      # @param level  The number of substitution steps of the level
+      # @param arrays A dict of the named arrays describing the level
+     ##
+     def store_level(self, level, arrays): 
+          level_cache = getattr(self, 'level_cache', None); 
+          if level_cache is not None: 
+               level_cache.save_level(self, level, arrays); 
+          ## if 
+     ## def 
+     
+     ## set_num_workers
+      # Sets the number of worker processes used by the get_tiles 
+      # substitution loops (one, the default, runs them serially)
+      # @param num_workers The number of worker processes
+     ##
+     def set_num_workers(self, num_workers): 
+          self.num_workers = max(1, int(num_workers)); 
+     ## def 
+     
+     ## use_parallel
+      # Decides whether a substitution loop should hand the remaining steps 
+      # of a level to the worker processes (once the level holds enough 
+      # tiles to keep all of the workers busy)
+      # @param num_tiles The number of tiles in the current level
+     ##
+     def use_parallel(self, num_tiles): 
+          num_workers = getattr(self, 'num_workers', 1); 
+          return num_workers > 1 and num_tiles >= num_workers * PARALLEL_CHUNKS_PER_WORKER; 
+     ## def 
+     
+     ## substitute_tile_steps
+      # Substitutes a list of (tile, steps) pairs until no steps are left 
+      # (the tiles are kept in the same order as in get_tiles)
+      # @param tile_steps  The list of (tile, steps) pairs
+      # @param with_levels Whether to also return the number of substitution 
+      #                    loop iterations after which each tile was finished
+      # @return            The list of the resulting tiles (and the list of 
+      #                    their levels)
+     ##
+     def substitute_tile_steps(self, tile_steps, with_levels = False): 
+          (tile_list, tile_levels, level) = ([], [], 0); 
+          while len(tile_steps) > 0: 
+               next_tile_steps = []; 
+               for (tile, steps) in tile_steps: 
+                    if steps > 0: 
+                         next_tile_steps.extend([(subtile, steps - dsteps) \
+                              for (subtile, dsteps) in self.get_subtile_steps(tile)]); 
+                    else: 
+                         tile_list.append(tile); 
+                         tile_levels.append(level); 
+                    ## if 
+               ## for 
+               tile_steps = next_tile_steps; 
+               level += 1; 
+          ## while 
+          return (tile_list, tile_levels) if with_levels else tile_list; 
+     ## def 
+     
+     ## substitute_parallel
+      # Substitutes a list of (tile, steps) pairs in the worker processes. 
+      # Each worker substitutes a contiguous chunk of the list and returns 
+      # its tiles as a TileSet together with the level at which each tile 
+      # was finished. The serial loop finishes the tiles level by level, so 
+      # (when the subtiles take different numbers of steps) the tiles of 
+      # the chunks are merged by a stable sort on their levels, which puts 
+      # them in the same order as substitute_tile_steps on the whole list. 
+      # @param tile_steps The list of (tile, steps) pairs
+      # @return           A TileSet of the resulting tiles
+     ##
+     def substitute_parallel(self, tile_steps): 
+          def substitute_chunk(chunk): 
+               (tile_list, tile_levels) = self.substitute_tile_steps(chunk, True); 
+               return (self.tiles_to_tileset(tile_list), np.array(tile_levels, dtype = np.int64)); 
+          ## def 
+          chunk_results = parallel_map_chunks(substitute_chunk, tile_steps, self.num_workers); 
+          tiles = TileSet.concatenate([chunk_tiles for (chunk_tiles, levels) in chunk_results]); 
+          tile_levels = np.concatenate([levels for (chunk_tiles, levels) in chunk_results]); 
+          return tiles.take(np.argsort(tile_levels, kind = 'stable')); 
+     ## def 
+     
+     ## tiles_to_level_arrays
+      # Converts a list of tiles (in the representation used by the 
+      # get_subtiles method) to the arrays stored in the level cache. 
+      # The default implementation pickles the tile objects. 
+     ##
+     def tiles_to_level_arrays(self, tile_list): 
+          pickled_tiles = pickle.dumps(tile_list, pickle.HIGHEST_PROTOCOL); 
+          return {'pickled_tiles': np.frombuffer(pickled_tiles, dtype = np.uint8)}; 
+     
+     ## level_arrays_to_tiles
+      # Inverse of tiles_to_level_arrays
+     ##
+     def level_arrays_to_tiles(self, arrays): 
+          return pickle.loads(arrays['pickled_tiles'].tobytes()); 
+     
+     ## get_inflation_factor
+      # Returns the factor by which the plane is scaled (about the origin) 
+      # in each substitution step, i.e., the subtiles of a tile t dissect 
+      # the tile factor * t. The default of one is for the tilings whose 
+      # subtiles dissect their parent tile in place. 
+      # (intended to be overridden by the sub-classes which inflate)
+     ##
+     def get_inflation_factor(self): 
+          return 1.0; 
+     
+     ## get_descendant_extent
+      # Estimates how far the subtiles of a tile extend beyond the bounding 
+      # box of the inflated tile (used to cull the tiles outside of a 
+      # window). The ratios are measured over the first 
+      # WINDOW_CALIBRATION_STEPS substitution steps of the root tiles and 
+      # cached, so tilings whose subtiles dissect their inflated parent 
+      # tiles get an extent of zero (as do the tilings without root tiles, 
+      # whose windows are only applied to their final tiles). Sub-classes 
+      # may override this method with the exact constants of their 
+      # substitution rules. 
+      # @return A pair (g, r) such that each subtile lies inside the bounding 
+      #         box of its inflated parent widened by g times the size of 
+      #         the inflated parent, and the subtile is at most r times the 
+      #         size of the inflated parent
+     ##
+     def get_descendant_extent(self): 
+          if getattr(self, 'descendant_extent', None) is not None: 
+               return self.descendant_extent; 
+          ## if 
+          (g, r) = (0.0, 0.0); 
+          inflation = self.get_inflation_factor(); 
+          tile_list = self.get_root_tiles(); 
+          if tile_list is None: 
+               tile_list = []; 
+          ## if 
+          for n in range(0, WINDOW_CALIBRATION_STEPS): 
+               next_tiles = []; 
+               for tile in tile_list: 
+                    (pmin, pmax) = self.tile_bounds(tile); 
+                    (pmin, pmax) = (inflation * pmin, inflation * pmax); 
+                    size = max(pmax - pmin); 
+                    if size <= 0: 
+                         continue; 
+                    ## if 
+                    for (subtile, dsteps) in self.get_subtile_steps(tile): 
+                         (smin, smax) = self.tile_bounds(subtile); 
+                         g = max(g, max(max(pmin - smin), max(smax - pmax)) / size); 
+                         r = max(r, max(smax - smin) / size); 
+                         next_tiles.append(subtile); 
+                    ## for 
+               ## for 
+               tile_list = next_tiles[0:WINDOW_CALIBRATION_TILES]; 
+          ## for 
+          g = 0.0 if g < 10**-FPNUM_DIGITS else g; 
+          self.descendant_extent = (g, r); 
+          return self.descendant_extent; 
+     ## def 
+     
+     ## tile_bounds
+      # Returns the corners (xmin, ymin) and (xmax, ymax) of the bounding box 
+      # of a tile as a pair of float arrays
+     ##
+     def tile_bounds(self, tile): 
+          points = np.array([[float(pt[0]), float(pt[1])] for pt in self.tile_to_points(tile)]); 
+          return (points.min(axis = 0), points.max(axis = 0)); 
+     
+     ## tile_in_window
+      # Determines whether a tile, or any of its descendants after a number 
+      # of substitution steps, can intersect a window
+      # @param tile   A tile (in the representation used by get_subtiles)
+      # @param steps  The number of substitution steps left for the tile
+      # @param window A window (xmin, ymin, xmax, ymax), or None
+      # @return       False only if no descendant of the tile meets the window
+     ##
+     def tile_in_window(self, tile, steps, window): 
+          if window is None: 
+               return True; 
+          ## if 
+          (g, r) = self.get_descendant_extent(); 
+          scale = self.get_inflation_factor() ** max(steps, 0); 
+          (pmin, pmax) = self.tile_bounds(tile); 
+          (pmin, pmax) = (scale * pmin, scale * pmax); 
+          margin = g * max(pmax - pmin) * descendant_extent_factor(r, steps) + \
+                   10**-FPNUM_DIGITS; 
+          return pmin[0] - margin <= window[2] and window[0] <= pmax[0] + margin and \
+                 pmin[1] - margin <= window[3] and window[1] <= pmax[1] + margin; 
+     ## def 
+     
+     ## window_tile_mask
+      # A vectorized version of tile_in_window for the tiles in a TileSet
+      # @param tiles  A TileSet object
+      # @param steps  The number of substitution steps left for the tiles 
+      #               (an integer, or an array with one entry per tile)
+      # @param window A window (xmin, ymin, xmax, ymax)
+      # @return       A boolean array which is False for the tiles whose 
+      #               descendants can not intersect the window
+     ##
+     def window_tile_mask(self, tiles, steps, window): 
+          if len(tiles) == 0: 
+               return np.zeros(0, dtype = bool); 
+          ## if 
+          (g, r) = self.get_descendant_extent(); 
+          steps = np.maximum(np.asarray(steps), 0); 
+          scale = np.power(self.get_inflation_factor(), steps * np.ones(len(tiles)))[:, np.newaxis]; 
+          vertices = np.asarray(tiles.vertices, dtype = np.float64); 
+          pmin = scale * np.minimum.reduceat(vertices, tiles.offsets[:-1], axis = 0); 
+          pmax = scale * np.maximum.reduceat(vertices, tiles.offsets[:-1], axis = 0); 
+          margin = g * np.max(pmax - pmin, axis = 1) * descendant_extent_factor(r, steps) + \
+                   10**-FPNUM_DIGITS; 
+          return (pmin[:, 0] - margin <= window[2]) & (window[0] <= pmax[:, 0] + margin) & \
+                 (pmin[:, 1] - margin <= window[3]) & (window[1] <= pmax[:, 1] + margin); 
+     ## def 
+     
+     ## window_culler
+      # Returns a function cull(tiles, steps) which computes the 
+      # window_tile_mask of a (num_tiles, k_vertices, 2) array of tiles 
+      # (as used by AffineSubstitutionEngine.substitute), or None if no 
+      # window is given
+     ##
+     def window_culler(self, window): 
+          if window is None: 
+               return None; 
+          ## if 
+          return lambda tiles, steps: \
+                 self.window_tile_mask(TileSet.from_array(tiles), steps, window); 
+     ## def 
+     
+     ## window_select
+      # Restricts a TileSet to the tiles whose descendants after a number of 
+      # substitution steps can intersect a window (or returns the TileSet 
+      # unchanged if no window is given)
+     ##
+     def window_select(self, tiles, steps, window): 
+          if window is None: 
+               return tiles; 
+          ## if 
+          return tiles.select(self.window_tile_mask(tiles, steps, window)); 
+     ## def 
+     
+     ## get_tiles
+      # Computes the polygon tiles (list of list of 2D vectors, or a 
+      # TileSet object) of the tiling after N steps. The default 
+      # implementation substitutes the root tiles level by level, starting 
+      # from the deepest level in the level cache (see set_level_cache). 
+      # With several workers (see set_num_workers), the remaining steps 
+      # of the first level holding enough tiles are run in parallel. 
+      # (intended to be overridden by the sub-classes which are not 
+      #  defined by get_root_tiles)
+      # @param window An optional window (xmin, ymin, xmax, ymax). If given, 
+      #               the supertiles whose descendants can not intersect the 
+      #               window are pruned at each level, so only the tiles 
+      #               near the window are generated.
+     ##
+     def get_tiles(self, window = None): 
+          if self.get_root_tiles() is None: 
+               return []; 
+          ## if 
+          num_steps = self.num_substitution_steps(); 
+          (level, level_arrays) = (0, None) if window is not None else \
+                                  self.resume_level(num_steps); 
+          if level_arrays is None: 
+               tile_steps = [(tile, num_steps) for tile in self.get_root_tiles()]; 
+          else: 
+               tile_steps = [(tile, num_steps - level) \
+                             for tile in self.level_arrays_to_tiles(level_arrays)]; 
+          ## if 
+          tile_list = []; 
+          while len(tile_steps) > 0: 
+               if window is None and self.use_parallel(len(tile_steps)): 
+                    return TileSet.concatenate([self.tiles_to_tileset(tile_list), 
+                                                self.substitute_parallel(tile_steps)]); 
+               elif window is not None: 
+                    tiles = self.tiles_to_tileset([tile for (tile, steps) in tile_steps]); 
+                    mask = self.window_tile_mask(tiles, [steps for (tile, steps) in tile_steps], 
+                                                 window); 
+                    tile_steps = [ts for (ts, inwin) in zip(tile_steps, mask) if inwin]; 
+               ## if 
+               next_tile_steps = []; 
+               for (tile, steps) in tile_steps: 
+                    if steps > 0: 
+                         next_tile_steps.extend([(subtile, steps - dsteps) \
+                              for (subtile, dsteps) in self.get_subtile_steps(tile)]); 
+                    else: 
+                         tile_list.append(tile); 
+                    ## if 
+               ## for 
+               tile_steps = next_tile_steps; 
+               level += 1; 
+               if window is None and self.caches_levels() and level <= num_steps and \
+                  all([steps == num_steps - level for (tile, steps) in tile_steps]): 
+                    self.store_level(level, self.tiles_to_level_arrays( 
+                                     [tile for (tile, steps) in tile_steps])); 
+               ## if 
+          ## while 
+          return self.tiles_to_tileset(tile_list); 
+     ## def 
+     
+     ## iter_tiles
+      # Generates the tiles of the tiling after N steps by walking the 
+      # substitution tree depth-first, so that only the tiles on the current 
+      # path (and their siblings) are held in memory at once instead of a 
+      # whole level of the tiling. For tilings without get_root_tiles the 
+      # tiles returned by get_tiles are streamed instead.
+      # @param chunk_size If None, each tile is yielded as a list of 2D 
+      #                   points. Otherwise, the tiles are yielded in 
+      #                   TileSet chunks of (at most) chunk_size tiles.
+      # @param window     An optional window (xmin, ymin, xmax, ymax) used 
+      #                   to prune the subtrees which can not intersect it
+      # @return           A generator over the tiles (or chunks of tiles)
+     ##
+     def iter_tiles(self, chunk_size = None, window = None): 
+          root_tiles = self.get_root_tiles(); 
+          if root_tiles is None: 
+               tileset = self.get_tileset(window = window); 
+               if chunk_size is None: 
+                    for tile in tileset: 
+                         yield tile; 
+                    ## for 
+               else: 
+                    for start in range(0, len(tileset), chunk_size): 
+                         yield tileset[start:start + chunk_size]; 
+                    ## for 
+               ## if 
+               return; 
+          ## if 
+          num_steps = self.num_substitution_steps(); 
+          stack = [(tile, num_steps) for tile in reversed(root_tiles)]; 
+          chunk = []; 
+          while len(stack) > 0: 
+               (tile, steps) = stack.pop(); 
+               if not self.tile_in_window(tile, steps, window): 
+                    continue; 
+               elif steps > 0: 
+                    subtiles = self.get_subtile_steps(tile); 
+                    stack.extend([(subtile, steps - dsteps) \
+                                  for (subtile, dsteps) in reversed(subtiles)]); 
+               elif chunk_size is None: 
+                    yield self.tile_to_points(tile); 
+               else: 
+                    chunk.append(tile); 
+                    if len(chunk) >= chunk_size: 
+                         yield self.tiles_to_tileset(chunk); 
+                         chunk = []; 
+                    ## if 
+               ## if 
+          ## while 
+          if chunk_size is not None and len(chunk) > 0: 
+               yield self.tiles_to_tileset(chunk); 
+          ## if 
+     ## def 
+     
+     ## get_tileset
+      # Returns the tiles of the tiling after N steps as a TileSet object 
+      # (subclasses which already return a TileSet from get_tiles are 
+      #  passed through unchanged)
+      # @param dtype  The floating point type of the stored tile vertices
+      # @param window An optional window (xmin, ymin, xmax, ymax) passed to 
+      #               get_tiles (tilings which are not generated from root 
+      #               tiles are computed in full and then restricted to the 
+      #               tiles which intersect the window)
+      # @return       A TileSet containing the tiles of the tiling
+      # @see          TileSet
+     ##
+     def get_tileset(self, dtype = np.float64, window = None): 
+          if window is None: 
+               tiles = self.get_tiles(); 
+          elif self.get_root_tiles() is None: 
+               tiles = self.get_tileset(dtype); 
+               return tiles.select(self.window_tile_mask(tiles, 0, window)); 
+          else: 
+               tiles = self.get_tiles(window = window); 
+          ## if 
+          if isinstance(tiles, TileSet) and tiles.dtype == dtype: 
+               return tiles; 
+          elif isinstance(tiles, TileSet): 
+               return TileSet(tiles.vertices, tiles.offsets, tiles.tile_types, dtype, 
+                              tiles.exact); 
+          ## if 
+          return TileSet.from_tiles(tiles, dtype = dtype); 
+     ## def 
+     
+     ## get_supertiles
+      # Computes the supertiles of the tiling a number of substitution steps 
+      # above its tiles, inflated into the coordinates of the tiling, so each 
+      # supertile covers the tiles of the tiling descending from it (the 
+      # coarse levels of detail of the images of large tilings). Tilings 
+      # without root tiles only return their tiles. 
+      # @param depth  The number of substitution steps left for the supertiles
+      # @param window An optional window (xmin, ymin, xmax, ymax) used to 
+      #               prune the supertiles whose tiles can not intersect it
+      # @return       A TileSet of the supertiles
+     ##
+     def get_supertiles(self, depth, window = None): 
+          if depth <= 0 or self.get_root_tiles() is None: 
+               return self.get_tileset(window = window); 
+          ## if 
+          tile_steps = [(tile, self.num_substitution_steps()) for tile in self.get_root_tiles()]; 
+          return self.supertiles_to_tileset(self.substitute_to_depth(tile_steps, depth, window)); 
+     ## def 
+     
+     ## substitute_to_depth
+      # Substitutes a list of (tile, steps) pairs until each of the tiles has 
+      # at most depth steps left, pruning the tiles which can not intersect a
+      # window at each level. The pairs returned for a window can be passed 
+      # back in for any smaller window within it and any smaller depth (for
+      # example, for the images of a zoomable pyramid, whose windows are 
+      # nested). 
+      # @param tile_steps The list of (tile, steps) pairs
+      # @param depth      The number of substitution steps left for the tiles
+      # @param window     An optional window (xmin, ymin, xmax, ymax)
+      # @return           The list of the (tile, steps) pairs of the supertiles
+     ##
+     def substitute_to_depth(self, tile_steps, depth, window = None): 
+          supertile_steps = []; 
+          while len(tile_steps) > 0: 
+               if window is not None: 
+                    tiles = self.tiles_to_tileset([tile for (tile, steps) in tile_steps]); 
+                    mask = self.window_tile_mask(tiles, [steps for (tile, steps) in tile_steps], 
+                                                 window); 
+                    tile_steps = [ts for (ts, inwin) in zip(tile_steps, mask) if inwin]; 
+               ## if 
+               next_tile_steps = []; 
+               for (tile, steps) in tile_steps: 
+                    if steps > depth: 
+                         next_tile_steps.extend([(subtile, steps - dsteps) \
+                              for (subtile, dsteps) in self.get_subtile_steps(tile)]); 
+                    else: 
+                         supertile_steps.append((tile, steps)); 
+                    ## if 
+               ## for 
+               tile_steps = next_tile_steps; 
+          ## while 
+          return supertile_steps; 
+     ## def 
+     
+     ## supertiles_to_tileset
+      # Converts a list of (tile, steps) pairs to a TileSet of the tiles 
+      # inflated by the steps left for each of them (see get_supertiles)
+     ##
+     def supertiles_to_tileset(self, tile_steps): 
+          tiles = self.tiles_to_tileset([tile for (tile, steps) in tile_steps]); 
+          steps_left = np.array([max(steps, 0) for (tile, steps) in tile_steps], dtype = float); 
+          scales = np.power(self.get_inflation_factor(), steps_left); 
+          vertices = tiles.vertices * np.repeat(scales, tiles.lengths)[:, np.newaxis]; 
+          return TileSet(vertices, tiles.offsets, tiles.tile_types); 
+     ## def 
+     
+     ## get_unique_points
+      # Computes the distinct points of the tiling after N steps (the same 
+      # points as Tiling.tiling_to_points(self.get_tileset())) one supertile 
+      # at a time. The root tiles are first substituted into (at least) 
+      # DEDUP_SUPERTILES supertiles, and the vertices of the descendants of 
+      # each supertile are deduplicated locally. The descendants dissect 
+      # the (inflated) supertile, so a point strictly inside one supertile 
+      # can not coincide with a point of another, and only the points on 
+      # the supertile boundaries are deduplicated across the supertiles. 
+      # The tilings without root tiles, whose subtiles overhang their 
+      # parent tiles, or with mixed step sizes deduplicate all vertices.
+      # @return A sorted list of the distinct 2D points
+     ##
+     def get_unique_points(self): 
+          root_tiles = self.get_root_tiles(); 
+          if root_tiles is None or self.get_descendant_extent()[0] > 0: 
+               return Tiling.tiling_to_points(self.get_tileset(), True); 
+          ## if 
+          tile_steps = [(tile, self.num_substitution_steps()) for tile in root_tiles]; 
+          while len(tile_steps) < DEDUP_SUPERTILES and \
+                all([steps > 1 for (tile, steps) in tile_steps]): 
+               tile_steps = [(subtile, steps - dsteps) for (tile, steps) in tile_steps \
+                             for (subtile, dsteps) in self.get_subtile_steps(tile)]; 
+          ## while 
+          if len(set([steps for (tile, steps) in tile_steps])) != 1 or tile_steps[0][1] <= 0: 
+               return Tiling.tiling_to_points(self.get_tileset(), True); 
+          ## if 
+          scale = self.get_inflation_factor()**tile_steps[0][1]; 
+          tol = 10.0**(1 - FPNUM_DIGITS); 
+          (interior_points, boundary_points) = ([], []); 
+          for (tile, steps) in tile_steps: 
+               tiles = self.tiles_to_tileset(self.substitute_tile_steps([(tile, steps)])); 
+               points = tileset_point_array(tiles); 
+               polygon = [[scale * float(pt[0]), scale * float(pt[1])] \
+                          for pt in self.tile_to_points(tile)]; 
+               on_boundary = polygon_boundary_mask(points, polygon, tol); 
+               interior_points.append(points[~on_boundary]); 
+               boundary_points.append(points[on_boundary]); 
+          ## for 
+          points = np.concatenate(interior_points + \
+                                  [unique_point_array(np.concatenate(boundary_points))]); 
+          points = points[np.lexsort((points[:, 1], points[:, 0]))]; 
+          return [vector([x, y]) for (x, y) in points.tolist()]; 
+     ## def 
      
      ## get_tile_color
       # Returns the color of the tile polygon
@@ -287,6 +1246,45 @@ class Tiling(object):
      
      ## def 
      
+     ## get_tile_type_color
+      # Returns the color of the tiles of a prototile type in the images 
+      # saved by save_tiling_image
+      # @param tile_type The prototile type code of the tiles
+      # @see             Tiling.get_tile_color
+     ##
+     def get_tile_type_color(self, tile_type): 
+          return self.get_tile_color(None); 
+     
+     ## save_tiling_image
+      # Saves an image of the tiling which draws all of the tiles in one 
+      # batch (colored by their prototile types) and each distinct tiling 
+      # point once, which scales to much larger tilings than get_tiling_image
+      # @param tiles      A list of polygonal tiles or a TileSet object
+      # @param image_path The path of the image
+      # @see              Tiling.get_tile_type_color
+      # @see              Tiling.get_tile_edge_color
+     ##
+     def save_tiling_image(self, tiles, image_path): 
+          ## matplotlib is only imported by the tilings which render images: 
+          from TilingImage import save_tileset_image 
+          tileset = TileSet.from_tiles(tiles); 
+          points = tileset_point_array(tileset); 
+          save_tileset_image(tileset, image_path, self.get_tile_face_colors(tileset), 
+                             self.get_tile_edge_color(), points); 
+     ## def 
+     
+     ## get_tile_face_colors
+      # Returns the (num_tiles, 4) array of the RGBA colors of the tiles of a 
+      # TileSet (looked up in a palette of the prototile types of the tiles)
+      # @see Tiling.get_tile_type_color
+     ##
+     def get_tile_face_colors(self, tileset): 
+          from matplotlib.colors import to_rgba_array 
+          type_codes = np.unique(tileset.tile_types); 
+          palette = to_rgba_array([self.get_tile_type_color(ttype) for ttype in type_codes]); 
+          return palette[np.searchsorted(type_codes, tileset.tile_types)]; 
+     ## def 
+     
      ## transform_points
       # Applies an affine transformation to a list of points
       # @param points_list A list of points
@@ -316,28 +1314,70 @@ class Tiling(object):
      
      ## tiling_to_points
       # Extracts the individual points from a list of polygonal tiles
-      # @param tiles 
+      # @param tiles      A list of polygonal tiles or a TileSet object
       # @param get_unique An optional parameter for whether to compute a list 
       #                   of only the distinct points in the tiling 
       #                   (i.e., since the tiles may contain overlapping points)
+      #                   For TileSets with exact coordinates the duplicate 
+      #                   points are compared exactly instead of rounded, 
+      #                   and indexed TileSets (see VertexPool) only sort 
+      #                   their distinct points
       # @return           A list of 2D vectors corresponding to the tiling 
       #                   vertices in the tiles
      ##
      @staticmethod 
      def tiling_to_points(tiles, get_unique = True): 
           tiling_points = []; 
-          for (idx, tile) in enumerate(tiles): 
-               tiling_points.extend(tile); 
-          ## for 
+          if isinstance(tiles, TileSet) and tiles.exact is not None and get_unique: 
+               return [vector([float(x), float(y)]) for (x, y) in tiles.unique_vertices()]; 
+          elif isinstance(tiles, TileSet) and get_unique: 
+               return [vector([x, y]) for (x, y) in tileset_point_array(tiles).tolist()]; 
+          elif isinstance(tiles, TileSet): 
+               tiling_points = tiles.vertex_list(); 
+          else: 
+               for (idx, tile) in enumerate(tiles): 
+                    tiling_points.extend(tile); 
+               ## for 
+          ## if 
           if get_unique: 
                tiling_points = unique_points(tiling_points, perform_sort = True); 
           ## if 
           return tiling_points; 
      ## def 
      
+     ## stream_to_points
+      # Extracts the distinct points from a stream of tiles (for example, 
+      # the TileSet chunks generated by iter_tiles) without holding all of 
+      # the tiles in memory at once. The points are rounded and sorted as in 
+      # unique_points.
+      # @param tile_chunks An iterable of TileSet objects or lists of tiles
+      # @param max_pending The number of buffered points which triggers a 
+      #                    merge into the set of distinct points
+      # @return            A sorted list of the distinct 2D points
+     ##
+     @staticmethod 
+     def stream_to_points(tile_chunks, max_pending = 4 * TILE_CHUNK_SIZE): 
+          upoints = np.zeros((0, 2)); 
+          pending, num_pending = [], 0; 
+          for chunk in tile_chunks: 
+               chunk = TileSet.from_tiles(chunk); 
+               cpoints = unique_point_array(chunk.vertices); 
+               pending.append(cpoints); 
+               num_pending += len(cpoints); 
+               if num_pending >= max_pending: 
+                    upoints = unique_point_array(np.concatenate([upoints] + pending)); 
+                    pending, num_pending = [], 0; 
+               ## if 
+          ## for 
+          upoints = unique_point_array(np.concatenate([upoints] + pending)); 
+          return [vector([x, y]) for (x, y) in upoints.tolist()]; 
+     ## def 
+     
      ## compute_pc_edists
       # Computes the pair correlation data points, or a list of the O(n^2) 
-      # Euclidean distances between distinct points in the tiling
+      # Euclidean distances between distinct points in the tiling (each 
+      # unordered pair is counted twice). See PairHistogram for binning the 
+      # distances of large tilings in bounded memory
       # @param tiling_points A list of 2D tiling point vectors
       # @param edist_squared An optional parameter denoting whether to square 
       #                      the returned distances
@@ -348,25 +1388,13 @@ class Tiling(object):
      @staticmethod 
      def compute_pc_edists(tiling_points, edist_squared = False, sort_edists = False): 
           
-          edist_pow = 0.5; 
-          if edist_squared: 
-               edist_pow = 1.0; 
-          ## if 
-          
-          edists = []; 
-          for pt1 in tiling_points: 
-               for pt2 in tiling_points: 
-                    next_edist = edist(pt1, pt2, edist_pow); 
-                    if next_edist != 0.0:
-                         edists.append(next_edist); 
-               ## for 
-          ## for 
-          
+          dist_blocks = list(pair_distance_blocks(tiling_points, edist_squared)); 
+          edists = np.repeat(np.concatenate([np.zeros(0)] + dist_blocks), 2); 
           if sort_edists: 
-               edists = sort_points_1D(edists); 
+               edists.sort(); 
           ## if 
           
-          return edists; 
+          return edists.tolist(); 
      
      ## def 
      
@@ -379,16 +1407,11 @@ class Tiling(object):
      @staticmethod
      def compute_sorted_angles(tiling_points): 
      
-          angles = []; 
-          for xyv in tiling_points: 
-               x, y = xyv[0], xyv[1];
-               angle = math.atan2(y, x) / (2 * pifp); 
-               angles.append(angle); 
-          ## for 
+          points = point_array(tiling_points); 
+          angles = np.arctan2(points[:, 1], points[:, 0]) / (2 * pifp); 
           #angles = unique_points_1D(angles, perform_sort = True); 
-          #angles = list(np.sort(np.unique(angles)))
-          angles = sorted(list(angles))
-          return angles; 
+          angles.sort(); 
+          return angles.tolist(); 
      
      ## def 
      
@@ -405,11 +1428,7 @@ class Tiling(object):
           #normalize_factor = len(angles); 
           normalize_factor = 1.0; 
           #normalize_factor = 1.0 / float(len(angles));
-          angle_gaps = []; 
-          for i in range(1, len(angles)): 
-               gap = (angles[i] - angles[i-1]) / normalize_factor; 
-               angle_gaps.append(gap); 
-          ## for 
+          angle_gaps = np.diff(angles) / normalize_factor; 
           angle_gaps = filter_nonzero(angle_gaps)
           return angle_gaps;
      
@@ -424,22 +1443,20 @@ class Tiling(object):
      @staticmethod
      def compute_sorted_slopes(tiling_points): 
      
-          slopes = []; 
-          for xyv in tiling_points: 
-               x, y = xyv[0], xyv[1];
-               if x != 0: 
-                    slopes.append(y / float(x)); 
-          ## for 
+          points = point_array(tiling_points); 
+          points = points[points[:, 0] != 0]; 
+          slopes = points[:, 1] / points[:, 0]; 
           #slopes = unique_points_1D(slopes, perform_sort = True); 
-          #slopes = sorted(list(np.unique(slopes)))
-          slopes = sorted(list(slopes))
-          return slopes; 
+          slopes.sort(); 
+          return slopes.tolist(); 
      
      ## def 
      
      ## compute_slope_gaps
       # Computes the gaps between the sorted slopes of a list of tiling points
       # @param tiling_points A list of 2D vectors representing tiling points
+      # @param h             The lag of the gaps (the gaps between the slopes 
+      #                      h places apart in the sorted slope list)
       # @return              The slope gap distribution data of the differences 
       #                      between neighboring points in the sorted slope list
      ##
@@ -450,28 +1467,43 @@ class Tiling(object):
           normalize_factor = 1.0; 
           #normalize_factor = 1 / (250.0 ** 2); 
           #normalize_factor = 1 / float(len(tiling_points))
-          slope_gaps = []; 
-          for i in range(h, len(slopes)): 
-               gap = (slopes[i] - slopes[i-h]) / normalize_factor; 
-               slope_gaps.append(gap); 
-          ## for 
+          slopes = np.asarray(slopes, dtype = np.float64); 
+          slope_gaps = (slopes[h:] - slopes[0:-h]) / normalize_factor; 
           slope_gaps = filter_nonzero(slope_gaps)
           return slope_gaps;
      
      ## def 
      
+     ## compute_slope_lag_gaps
+      # Computes the gaps between the sorted slopes of a list of tiling points 
+      # at all of the lags h = 1, 2, ..., max_lag (see lag_gaps)
+      # @param tiling_points A list of 2D vectors representing tiling points
+      # @param max_lag       The maximal lag H
+      # @return              An (H, n) array of the gaps of the n slopes 
+      #                      (padded with NaN)
+     ##
+     @staticmethod 
+     def compute_slope_lag_gaps(tiling_points, max_lag): 
+          return lag_gaps(Tiling.compute_sorted_slopes(tiling_points), max_lag); 
+     
+     ## compute_joint_slope_gaps
+      # Computes the joint gaps (slopes[i] - slopes[i - h1], 
+      # slopes[i] - slopes[i - h2]) between the sorted slopes of a list of 
+      # tiling points
+      # @param tiling_points A list of 2D vectors representing tiling points
+      # @param h1            The lag of the first coordinates
+      # @param h2            The lag of the second coordinates
+      # @return              An (m, 2) array of the joint gaps
+     ##
      @staticmethod 
      def compute_joint_slope_gaps(tiling_points, h1, h2): 
           
           slopes = Tiling.compute_sorted_slopes(tiling_points); 
           normalize_factor = 1.0; 
-          slope_gaps = []; 
-          for i in range(max(h1, h2), len(slopes)): 
-               gap_coord1 = (slopes[i] - slopes[i-h1]) / normalize_factor; 
-               gap_coord2 = (slopes[i] - slopes[i-h2]) / normalize_factor; 
-               slope_gaps.append((gap_coord1, gap_coord2)); 
-          ## for 
-          return slope_gaps;
+          hmax = max(h1, h2); 
+          gaps = lag_gaps(slopes, hmax); 
+          slope_gaps = np.column_stack((gaps[h1 - 1, hmax:], gaps[h2 - 1, hmax:])); 
+          return slope_gaps / normalize_factor;
      
      ## def 
      
@@ -0,0 +1,295 @@
+#### TilingCache.py
+#### Defines a persistent on-disk cache of the tiles and points of the tilings
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import os
+import sys
+import hashlib
+import inspect
+import numbers
+import zipfile
+import numpy as np
+
+from Tiling import Tiling
+from TileSet import TileSet
+from HistogramPyramid import HistogramPyramid
+
+##
+ # The default directory of the cached tiling files (next to the images
+ # written by tiling_pc_plots.py)
+##
+DEFAULT_CACHE_DIR = "./output/tiling-cache";
+
+##
+ # Version of the cache file layout (bumping it invalidates all of the
+ # existing cache entries)
+##
+TILING_CACHE_VERSION = 1;
+
+## tiling_source_hash
+ # Computes a hash of the source code of the modules which define the class
+ # of a tiling and its base classes (so that editing a tiling module, or the
+ # Tiling base class, invalidates its cached tiles)
+ # @param tiling A Tiling object
+ # @return       A hex digest string
+##
+def tiling_source_hash(tiling):
+     sha = hashlib.sha1();
+     for cls in inspect.getmro(type(tiling)):
+          module = sys.modules.get(cls.__module__);
+          module_path = getattr(module, '__file__', None);
+          if module_path is None:
+               continue;
+          ## if
+          module_path = os.path.splitext(module_path)[0] + ".py";
+          if os.path.exists(module_path):
+               with open(module_path, 'rb') as module_file:
+                    sha.update(module_file.read());
+               ## with
+          ## if
+     ## for
+     return sha.hexdigest();
+## def
+
+##
+ # The attributes of the tiling objects which hold runtime settings or 
+ # cached values rather than parameters of the tiling (so they are left out 
+ # of the cache keys)
+##
+RUNTIME_ATTRIBUTES = ('num_workers', 'level_cache', 'descendant_extent');
+
+## tiling_parameters
+ # Returns the scalar parameters (strings, booleans and numbers) stored in a
+ # tiling object, for example the N and the Pentagon AA, BB, b, c and e values
+ # (excluding the RUNTIME_ATTRIBUTES)
+ # @param tiling A Tiling object
+ # @return       A sorted list of (name, value string) pairs
+##
+def tiling_parameters(tiling):
+     params = [];
+     for (name, value) in sorted(vars(tiling).items()):
+          if isinstance(value, (str, bool, numbers.Number)) and \
+             name not in RUNTIME_ATTRIBUTES:
+               params.append((name, str(value)));
+          ## if
+     ## for
+     return params;
+## def
+
+## TilingCache
+ # A cache of the TileSet and distinct points of tilings stored as compressed
+ # .npz files. The entries are keyed by the tiling name, N, the parameters of
+ # the tiling and the window used to generate it. Each file also records a
+ # hash of the tiling source code, so an entry made stale by a change to the
+ # code is detected on loading and rebuilt. The cache also stores the 
+ # intermediate levels of the substitutions (see Tiling.set_level_cache), 
+ # which do not depend on N, so a sweep over N only performs each 
+ # substitution step once. The fine histograms of the statistics computed 
+ # for the tilings are stored next to the tiles (see save_histogram).
+##
+class TilingCache(object):
+
+     ## __init__
+      # Initialization function for the TilingCache class
+      # @param cache_dir The directory of the cache files (created on demand)
+     ##
+     def __init__(self, cache_dir = DEFAULT_CACHE_DIR):
+          self.cache_dir = cache_dir;
+     ## def
+
+     ## cache_path
+      # Returns the path of the cache file of a tiling
+      # @param tiling A Tiling object
+      # @param window An optional window (xmin, ymin, xmax, ymax)
+     ##
+     def cache_path(self, tiling, window = None):
+          key = repr((TILING_CACHE_VERSION, tiling_parameters(tiling), window));
+          key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16];
+          file_name = "%s-N.%03d-%s.npz" % (tiling.name, tiling.N, key_hash);
+          return os.path.join(self.cache_dir, file_name);
+     ## def
+
+     ## level_path
+      # Returns the path of the cache file of an intermediate level of a 
+      # tiling (keyed by all of the parameters of the tiling except for N)
+      # @param tiling A Tiling object
+      # @param level  The number of substitution steps of the level
+     ##
+     def level_path(self, tiling, level):
+          params = [(name, value) for (name, value) in tiling_parameters(tiling) \
+                    if name != 'num_steps'];
+          key = repr((TILING_CACHE_VERSION, params));
+          key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16];
+          file_name = "%s-L.%03d-%s.npz" % (tiling.name, level, key_hash);
+          return os.path.join(self.cache_dir, file_name);
+     ## def
+
+     ## read_arrays
+      # Reads the arrays stored in a cache file
+      # @param cache_path The path of the cache file
+      # @param tiling     The Tiling object the file was written for
+      # @return           A dict of the arrays, or None if the file does not 
+      #                   exist, can not be read, or is stale
+     ##
+     def read_arrays(self, cache_path, tiling):
+          if not os.path.exists(cache_path):
+               return None;
+          ## if
+          try:
+               with np.load(cache_path) as cache_data:
+                    if str(cache_data['source_hash']) != tiling_source_hash(tiling):
+                         return None;
+                    ## if
+                    return dict([(name, cache_data[name]) for name in cache_data.files \
+                                 if name != 'source_hash']);
+               ## with
+          except (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile):
+               return None;
+          ## try
+     ## def
+
+     ## write_arrays
+      # Writes a dict of arrays to a cache file (under a temporary name 
+      # first, so concurrent runs never read a partially written file)
+      # @param cache_path The path of the cache file
+      # @param tiling     The Tiling object the file is written for
+      # @param arrays     A dict of the named arrays to store
+      # @param compressed Whether to compress the file (defaults to True)
+     ##
+     def write_arrays(self, cache_path, tiling, arrays, compressed = True):
+          if not os.path.isdir(self.cache_dir):
+               os.makedirs(self.cache_dir);
+          ## if
+          arrays = dict(arrays);
+          arrays['source_hash'] = np.array(tiling_source_hash(tiling));
+          temp_path = "%s.%d.tmp" % (cache_path, os.getpid());
+          with open(temp_path, 'wb') as cache_file:
+               if compressed:
+                    np.savez_compressed(cache_file, **arrays);
+               else:
+                    np.savez(cache_file, **arrays);
+               ## if
+          ## with
+          os.rename(temp_path, cache_path);
+     ## def
+
+     ## load_level
+      # Loads the arrays of an intermediate level of a tiling
+      # @return A dict of arrays, or None if the level is not cached
+     ##
+     def load_level(self, tiling, level):
+          return self.read_arrays(self.level_path(tiling, level), tiling);
+
+     ## save_level
+      # Stores the arrays of an intermediate level of a tiling (uncompressed,
+      # since the levels are written on every run which extends them)
+     ##
+     def save_level(self, tiling, level, arrays):
+          self.write_arrays(self.level_path(tiling, level), tiling, arrays, False);
+
+     ## resume_level
+      # Finds the deepest cached level of a tiling up to some maximum level
+      # @param tiling    A Tiling object
+      # @param max_level The maximum number of substitution steps
+      # @return          A pair (level, arrays), or (0, None) if no level 
+      #                  is cached
+     ##
+     def resume_level(self, tiling, max_level):
+          for level in range(max_level, 0, -1):
+               arrays = self.load_level(tiling, level);
+               if arrays is not None:
+                    return (level, arrays);
+               ## if
+          ## for
+          return (0, None);
+     ## def
+
+     ## histogram_path
+      # Returns the path of the stored histogram of a statistic of a tiling
+      # @param tiling    A Tiling object
+      # @param hist_type The statistic type (for example "pc-edist")
+      # @param window    An optional window (xmin, ymin, xmax, ymax)
+     ##
+     def histogram_path(self, tiling, hist_type, window = None):
+          key = repr((TILING_CACHE_VERSION, tiling_parameters(tiling), window));
+          key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16];
+          file_name = "%s-N.%03d-%s-%s-hist.npz" % (tiling.name, tiling.N, hist_type, key_hash);
+          return os.path.join(self.cache_dir, file_name);
+     ## def
+
+     ## save_histogram
+      # Stores the HistogramPyramid of a statistic of a tiling
+      # @param tiling    A Tiling object
+      # @param hist_type The statistic type (for example "pc-edist")
+      # @param pyramid   The HistogramPyramid of the statistic
+      # @param window    An optional window (xmin, ymin, xmax, ymax)
+     ##
+     def save_histogram(self, tiling, hist_type, pyramid, window = None):
+          self.write_arrays(self.histogram_path(tiling, hist_type, window), tiling,
+                            pyramid.to_arrays());
+
+     ## load_histogram
+      # Loads the stored HistogramPyramid of a statistic of a tiling
+      # @return The HistogramPyramid, or None if there is no valid stored 
+      #         histogram
+     ##
+     def load_histogram(self, tiling, hist_type, window = None):
+          arrays = self.read_arrays(self.histogram_path(tiling, hist_type, window), tiling);
+          return HistogramPyramid.from_arrays(arrays) if arrays is not None else None;
+
+     ## load
+      # Loads the cached tiles and points of a tiling
+      # @param tiling A Tiling object
+      # @param window An optional window (xmin, ymin, xmax, ymax)
+      # @param dtype  The floating point type of the TileSet vertices
+      # @return       A (TileSet, points array) pair, or None if there is no
+      #               valid (up to date and readable) cache entry
+     ##
+     def load(self, tiling, window = None, dtype = np.float64):
+          cache_data = self.read_arrays(self.cache_path(tiling, window), tiling);
+          if cache_data is None:
+               return None;
+          ## if
+          tiles = TileSet(cache_data['vertices'], cache_data['offsets'],
+                          cache_data['tile_types'], dtype);
+          return (tiles, cache_data['points']);
+     ## def
+
+     ## save
+      # Stores the tiles and points of a tiling in the cache
+      # @param tiling A Tiling object
+      # @param tiles  The TileSet of the tiling
+      # @param points The array of distinct points of the tiling
+      # @param window An optional window (xmin, ymin, xmax, ymax)
+     ##
+     def save(self, tiling, tiles, points, window = None):
+          arrays = {'vertices': tiles.vertices, 'offsets': tiles.offsets,
+                    'tile_types': tiles.tile_types,
+                    'points': np.asarray(points, dtype = np.float64).reshape(-1, 2)};
+          self.write_arrays(self.cache_path(tiling, window), tiling, arrays);
+     ## def
+
+     ## get
+      # Returns the tiles and distinct points of a tiling, loading them from
+      # the cache when possible, and otherwise generating and caching them
+      # @param tiling A Tiling object
+      # @param window An optional window (xmin, ymin, xmax, ymax) passed to
+      #               Tiling.get_tileset
+      # @param dtype  The floating point type of the TileSet vertices
+      # @return       A (TileSet, points array) pair where the points are the
+      #               same as the list returned by Tiling.tiling_to_points
+     ##
+     def get(self, tiling, window = None, dtype = np.float64):
+          cached = self.load(tiling, window, dtype);
+          if cached is not None:
+               return cached;
+          ## if
+          tiles = tiling.get_tileset(dtype, window = window);
+          points = np.array([[float(pt[0]), float(pt[1])] \
+                             for pt in Tiling.tiling_to_points(tiles, True)]);
+          self.save(tiling, tiles, points, window);
+          return (tiles, points);
+     ## def
+
+## class
@@ -0,0 +1,108 @@
+#### TilingImage.py
+#### Renders the images of large tilings in one batch through matplotlib
+#### collections instead of one Sage graphics object per tile
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+
+##
+ # The default size (in inches) and resolution of the tiling images
+##
+TILING_IMAGE_SIZE = 10;
+TILING_IMAGE_DPI = 200;
+
+## tileset_polygons
+ # Returns the polygons of a TileSet in the format of a PolyCollection: a
+ # (num_tiles, k_vertices, 2) array when all of the tiles have the same
+ # number of vertices, and otherwise a list of per-tile vertex array views
+ # @param tileset A TileSet object
+##
+def tileset_polygons(tileset):
+     polygons = tileset.as_array();
+     if polygons is None:
+          polygons = np.split(tileset.vertices, tileset.offsets[1:-1]);
+     ## if
+     return polygons;
+## def
+
+## draw_tileset
+ # Draws all of the tiles of a TileSet with a single PolyCollection (with
+ # the face colors given per tile) and a set of points with a single
+ # scatter call on a set of matplotlib axes
+ # @param ax          The matplotlib axes
+ # @param tileset     A TileSet object
+ # @param face_colors An (num_tiles, 4) array of the RGBA colors of the tiles,
+ #                    or one color for all of the tiles
+ # @param edge_color  The color of the tile borders
+ # @param points      An optional (n, 2) array of the points to draw (for
+ #                    example, the distinct tile vertices)
+ # @param point_color The color of the points
+ # @param line_width  The width of the tile borders (in points)
+ # @param point_size  The area of the point markers (in points^2)
+##
+def draw_tileset(ax, tileset, face_colors, edge_color, points, point_color,
+                 line_width = 0.5, point_size = 2):
+     tile_polys = PolyCollection(tileset_polygons(tileset), facecolors = face_colors,
+                                 edgecolors = edge_color, linewidths = line_width);
+     ax.add_collection(tile_polys);
+     if points is not None and len(points) > 0:
+          ax.scatter(points[:, 0], points[:, 1], s = point_size, c = point_color,
+                     linewidths = 0, zorder = 2);
+     ## if
+## def
+
+## save_tileset_image
+ # Draws a TileSet (see draw_tileset) and saves the image of the whole
+ # TileSet with the Agg rasterizer
+ # @param tileset     A TileSet object
+ # @param image_path  The path of the image
+ # @param face_colors The colors of the tiles (see draw_tileset)
+ # @param edge_color  The color of the tile borders
+ # @param points      An optional (n, 2) array of the points to draw
+ # @param point_color The color of the points
+ # @param size        The width and height of the image in inches
+ # @param dpi         The resolution of the image
+##
+def save_tileset_image(tileset, image_path, face_colors, edge_color = 'darkgray',
+                       points = None, point_color = 'darkblue',
+                       size = TILING_IMAGE_SIZE, dpi = TILING_IMAGE_DPI):
+     fig = Figure(figsize = (size, size));
+     FigureCanvasAgg(fig);
+     ax = fig.add_subplot(111);
+     draw_tileset(ax, tileset, face_colors, edge_color, points, point_color);
+     ax.autoscale_view();
+     ax.set_aspect('equal');
+     ax.set_axis_off();
+     fig.savefig(image_path, dpi = dpi, bbox_inches = 'tight');
+## def
+
+## save_window_image
+ # Draws the part of a TileSet within a square window into a square image
+ # of a fixed number of pixels (with a transparent background, as the
+ # tiles of a zoomable image pyramid)
+ # @param tileset     A TileSet object
+ # @param image_path  The path of the image
+ # @param window      The window (xmin, ymin, xmax, ymax) of the image
+ # @param face_colors The colors of the tiles (see draw_tileset)
+ # @param edge_color  The color of the tile borders
+ # @param points      An optional (n, 2) array of the points to draw
+ # @param point_color The color of the points
+ # @param pixels      The width and height of the image in pixels
+##
+def save_window_image(tileset, image_path, window, face_colors, edge_color = 'darkgray',
+                      points = None, point_color = 'darkblue', pixels = 256):
+     fig = Figure(figsize = (1, 1), dpi = pixels);
+     FigureCanvasAgg(fig);
+     ax = fig.add_axes([0, 0, 1, 1]);
+     pixel_pts = 72.0 / pixels;
+     draw_tileset(ax, tileset, face_colors, edge_color, points, point_color,
+                  line_width = 0.75 * pixel_pts, point_size = (3 * pixel_pts)**2);
+     ax.set_xlim(window[0], window[2]);
+     ax.set_ylim(window[1], window[3]);
+     ax.set_axis_off();
+     fig.savefig(image_path, dpi = pixels, transparent = True);
+## def
@@ -0,0 +1,397 @@
+#### TilingPyramid.py
+#### Exports the images of large tilings as zoomable pyramids of PNG tiles
+#### (in the z/x/y layout of web map tiles) with a static HTML viewer
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import os
+import json
+import numpy as np
+
+from Tiling import tileset_point_array, parallel_map_chunks, PARALLEL_CHUNKS_PER_WORKER
+from TilingImage import save_window_image
+
+##
+ # The width and height in pixels of the tiles of the pyramids
+##
+PYRAMID_TILE_PIXELS = 256;
+
+##
+ # The smallest typical size in pixels of the tiles drawn at a zoom level
+ # (the coarser zoom levels draw the supertiles of the tiling instead)
+##
+PYRAMID_MIN_TILE_PIXELS = 12.0;
+
+##
+ # The typical size in pixels of the tiles of the tiling at the deepest
+ # zoom level chosen by default
+##
+PYRAMID_LEAF_TILE_PIXELS = 32.0;
+
+##
+ # The number of supertiles up to which the sizes of the coarse levels of
+ # the substitution are measured to estimate the sizes of the finer levels
+##
+PYRAMID_CALIBRATION_TILES = 2048;
+
+##
+ # The largest zoom level chosen for the pyramids by default
+##
+PYRAMID_MAX_ZOOM = 10;
+
+## PYRAMID_VIEWER_HTML
+ # The static viewer of the pyramids (the PYRAMID_INFO placeholder is
+ # replaced by the JSON description of the pyramid). The view is panned by
+ # dragging and zoomed with the mouse wheel, and the tiles of the nearest
+ # zoom level are scaled between the levels.
+##
+PYRAMID_VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Tiling Viewer</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; background: #ffffff; }
+  #view { position: absolute; inset: 0; cursor: grab; }
+  #view img { position: absolute; user-select: none; -webkit-user-drag: none; }
+  #info { position: absolute; left: 8px; top: 8px; font: 12px sans-serif;
+          background: rgba(255, 255, 255, 0.8); padding: 4px 6px; }
+</style>
+</head>
+<body>
+<div id="view"></div>
+<div id="info"></div>
+<script>
+var PYRAMID = PYRAMID_INFO;
+var view = document.getElementById("view");
+var info = document.getElementById("info");
+var scale = Math.min(window.innerWidth, window.innerHeight) / PYRAMID.tile_pixels;
+var offsetX = (window.innerWidth - scale * PYRAMID.tile_pixels) / 2;
+var offsetY = (window.innerHeight - scale * PYRAMID.tile_pixels) / 2;
+var images = {};
+
+function render() {
+  var z = Math.max(0, Math.min(PYRAMID.max_zoom, Math.ceil(Math.log2(scale))));
+  var tileSize = scale * PYRAMID.tile_pixels / Math.pow(2, z);
+  var x0 = Math.max(0, Math.floor(-offsetX / tileSize));
+  var y0 = Math.max(0, Math.floor(-offsetY / tileSize));
+  var x1 = Math.min(Math.pow(2, z) - 1, Math.floor((window.innerWidth - offsetX) / tileSize));
+  var y1 = Math.min(Math.pow(2, z) - 1, Math.floor((window.innerHeight - offsetY) / tileSize));
+  var visible = {};
+  for (var x = x0; x <= x1; x++) {
+    for (var y = y0; y <= y1; y++) {
+      var key = z + "/" + x + "/" + y;
+      var img = images[key];
+      if (!img) {
+        img = document.createElement("img");
+        img.onerror = function() { this.style.visibility = "hidden"; };
+        img.src = key + ".png";
+        images[key] = img;
+      }
+      img.style.left = (offsetX + x * tileSize) + "px";
+      img.style.top = (offsetY + y * tileSize) + "px";
+      img.style.width = img.style.height = (tileSize + 0.5) + "px";
+      if (img.parentNode !== view) { view.appendChild(img); }
+      visible[key] = true;
+    }
+  }
+  for (var key in images) {
+    if (!visible[key] && images[key].parentNode === view) { view.removeChild(images[key]); }
+  }
+  info.textContent = PYRAMID.name + " (N = " + PYRAMID.num_steps + "), zoom " + z +
+                     " of " + PYRAMID.max_zoom + ", supertile depth " + PYRAMID.depths[z];
+}
+
+var dragging = null;
+view.addEventListener("mousedown", function(e) { dragging = [e.clientX, e.clientY]; });
+window.addEventListener("mouseup", function() { dragging = null; });
+window.addEventListener("mousemove", function(e) {
+  if (dragging) {
+    offsetX += e.clientX - dragging[0];
+    offsetY += e.clientY - dragging[1];
+    dragging = [e.clientX, e.clientY];
+    render();
+  }
+});
+view.addEventListener("wheel", function(e) {
+  e.preventDefault();
+  var factor = Math.exp(-e.deltaY * 0.002);
+  offsetX = e.clientX - (e.clientX - offsetX) * factor;
+  offsetY = e.clientY - (e.clientY - offsetY) * factor;
+  scale *= factor;
+  render();
+}, { passive: false });
+window.addEventListener("resize", render);
+render();
+</script>
+</body>
+</html>
+""";
+
+## TilingPyramid
+ # A zoomable image pyramid of a tiling. Zoom level z covers the bounding
+ # square of the tiling with 2^z x 2^z images of PYRAMID_TILE_PIXELS pixels,
+ # stored as z/x/y.png (with y = 0 at the top, as the web map tiles). Each
+ # zoom level is drawn from the supertiles of the tiling (see
+ # Tiling.get_supertiles) at the smallest substitution depth whose tiles are
+ # still PYRAMID_MIN_TILE_PIXELS wide, so the coarse zoom levels draw a few
+ # large supertiles instead of rasterizing millions of tiles smaller than a
+ # pixel. The images are rendered quadrant by quadrant: the supertiles of
+ # each image are substituted for its window only (the supertiles which can
+ # not intersect the window are pruned) starting from the supertiles kept 
+ # for its parent image, and the quadrants are rendered in parallel.
+##
+class TilingPyramid(object):
+
+     ## __init__
+      # Initialization function for the TilingPyramid class
+      # @param tiling      The Tiling object
+      # @param max_zoom    The deepest zoom level (by default, the zoom level
+      #                    drawing the tiles of the tiling about
+      #                    PYRAMID_LEAF_TILE_PIXELS wide)
+      # @param tile_pixels The width and height of the images in pixels
+     ##
+     def __init__(self, tiling, max_zoom = None, tile_pixels = PYRAMID_TILE_PIXELS):
+          self.tiling = tiling;
+          self.tile_pixels = tile_pixels;
+          self.leaf_tiles = None;
+          self.leaf_bounds = None;
+          self.num_levels = tiling.num_substitution_steps();
+          if tiling.get_root_tiles() is None:
+               self.leaf_tiles = tiling.get_tileset();
+               self.num_levels = 0;
+               vertices = np.asarray(self.leaf_tiles.vertices, dtype = np.float64);
+               starts = self.leaf_tiles.offsets[:-1];
+               self.leaf_bounds = (np.minimum.reduceat(vertices, starts, axis = 0),
+                                   np.maximum.reduceat(vertices, starts, axis = 0));
+          ## if
+          top_tiles = self.get_level_tiles(self.num_levels);
+          (pmin, pmax) = (top_tiles.vertices.min(axis = 0), top_tiles.vertices.max(axis = 0));
+          self.extent = max(max(pmax - pmin), 10**-6) * (1.0 + 10**-6);
+          self.origin = (0.5 * (pmin[0] + pmax[0] - self.extent),
+                         0.5 * (pmin[1] + pmax[1] + self.extent));
+          self.calibrate_level_sizes(top_tiles);
+          if max_zoom is None:
+               leaf_pixels = self.level_size(0) * tile_pixels / self.extent;
+               max_zoom = int(np.ceil(np.log2(max(1.0, PYRAMID_LEAF_TILE_PIXELS / leaf_pixels))));
+               max_zoom = min(max_zoom, PYRAMID_MAX_ZOOM);
+          ## if
+          self.max_zoom = int(max_zoom);
+     ## def
+
+     ## median_tile_size
+      # Static method that returns the median width of the bounding boxes of
+      # the tiles of a TileSet
+     ##
+     @staticmethod
+     def median_tile_size(tiles):
+          vertices = tiles.vertices;
+          pmin = np.minimum.reduceat(vertices, tiles.offsets[:-1], axis = 0);
+          pmax = np.maximum.reduceat(vertices, tiles.offsets[:-1], axis = 0);
+          return float(np.median(np.max(pmax - pmin, axis = 1)));
+     ## def
+
+     ## calibrate_level_sizes
+      # Measures the typical tile sizes of the coarsest levels of the
+      # substitution (up to PYRAMID_CALIBRATION_TILES supertiles), and the
+      # mean ratio of the tile sizes of consecutive levels, which is used
+      # to estimate the sizes of the finer levels
+      # @param top_tiles The supertiles at the root of the substitution
+     ##
+     def calibrate_level_sizes(self, top_tiles):
+          (self.level_sizes, depth, tiles) = ({}, self.num_levels, top_tiles);
+          while True:
+               self.level_sizes[depth] = TilingPyramid.median_tile_size(tiles);
+               if depth == 0 or len(tiles) > PYRAMID_CALIBRATION_TILES:
+                    break;
+               ## if
+               depth -= 1;
+               tiles = self.get_level_tiles(depth);
+          ## while
+          num_measured = self.num_levels - depth;
+          self.size_ratio = 1.0;
+          if num_measured > 0 and self.level_sizes[depth] > 0:
+               self.size_ratio = (self.level_sizes[depth] /
+                                  self.level_sizes[self.num_levels]) ** (1.0 / num_measured);
+          ## if
+          self.size_ratio = min(self.size_ratio, 1.0);
+     ## def
+
+     ## level_size
+      # Returns the (measured or estimated) typical size of the supertiles
+      # at a substitution depth
+     ##
+     def level_size(self, depth):
+          if depth in self.level_sizes:
+               return self.level_sizes[depth];
+          ## if
+          depth_measured = min(self.level_sizes.keys());
+          return self.level_sizes[depth_measured] * \
+                 self.size_ratio ** (depth_measured - depth);
+     ## def
+
+     ## zoom_depth
+      # Returns the substitution depth of the supertiles drawn at a zoom
+      # level (the finest depth whose tiles are at least
+      # PYRAMID_MIN_TILE_PIXELS wide, or zero to draw the tiles of the tiling)
+     ##
+     def zoom_depth(self, z):
+          pixels_per_unit = self.tile_pixels * 2**z / self.extent;
+          depth = 0;
+          while depth < self.num_levels and \
+                self.level_size(depth) * pixels_per_unit < PYRAMID_MIN_TILE_PIXELS:
+               depth += 1;
+          ## while
+          return depth;
+     ## def
+
+     ## tile_window
+      # Returns the window (xmin, ymin, xmax, ymax) of the image z/x/y
+     ##
+     def tile_window(self, z, x, y):
+          width = self.extent / 2**z;
+          (xmin, ymax) = (self.origin[0] + x * width, self.origin[1] - y * width);
+          return (xmin, ymax - width, xmin + width, ymax);
+     ## def
+
+     ## get_level_tiles
+      # Returns all of the supertiles at a substitution depth
+     ##
+     def get_level_tiles(self, depth):
+          if self.leaf_tiles is not None:
+               return self.leaf_tiles;
+          ## if
+          return self.tiling.get_supertiles(depth);
+     ## def
+
+     ## window_tiles
+      # Computes the supertiles drawn in the image z/x/y starting from the
+      # supertiles kept for its parent image (whose window contains the 
+      # window of the image), so each image only continues the culled 
+      # substitution of its parent instead of restarting it from the root.
+      # The tiles of the tilings without a substitution tree are selected 
+      # by their bounding boxes.
+      # @param parent The list of the (tile, steps) pairs kept for the parent
+      #               image (or the array of the indices of the leaf tiles), 
+      #               or None at zoom level zero
+      # @return       A pair of the tiles kept for the image (in the same 
+      #               format as parent) and the TileSet of the tiles drawn
+     ##
+     def window_tiles(self, z, x, y, parent):
+          window = self.tile_window(z, x, y);
+          if self.leaf_tiles is not None:
+               indices = np.arange(len(self.leaf_tiles)) if parent is None else parent;
+               (pmin, pmax) = (self.leaf_bounds[0][indices], self.leaf_bounds[1][indices]);
+               indices = indices[(pmin[:, 0] <= window[2]) & (window[0] <= pmax[:, 0]) & \
+                                 (pmin[:, 1] <= window[3]) & (window[1] <= pmax[:, 1])];
+               return (indices, self.leaf_tiles.take(indices));
+          ## if
+          if parent is None:
+               parent = [(tile, self.num_levels) for tile in self.tiling.get_root_tiles()];
+          ## if
+          tile_steps = self.tiling.substitute_to_depth(parent, self.zoom_depth(z), window);
+          if len(tile_steps) == 0:
+               return (tile_steps, None);
+          ## if
+          return (tile_steps, self.tiling.supertiles_to_tileset(tile_steps));
+     ## def
+
+     ## render_tile
+      # Saves the image z/x/y of the pyramid (the tiling points are only
+      # drawn with the tiles of the tiling, at depth zero, and the 
+      # directory of the image is created with its first image)
+      # @param tiles      The TileSet of the tiles drawn in the image
+      # @param output_dir The directory of the pyramid
+     ##
+     def render_tile(self, z, x, y, tiles, output_dir):
+          image_dir = os.path.join(output_dir, str(z), str(x));
+          if not os.path.isdir(image_dir):
+               try:
+                    os.makedirs(image_dir);
+               except OSError:
+                    if not os.path.isdir(image_dir):
+                         raise;
+                    ## if
+               ## try
+          ## if
+          points = tileset_point_array(tiles) if self.zoom_depth(z) == 0 else None;
+          save_window_image(tiles, os.path.join(image_dir, "%d.png" % y), self.tile_window(z, x, y),
+                            self.tiling.get_tile_face_colors(tiles),
+                            self.tiling.get_tile_edge_color(), points,
+                            pixels = self.tile_pixels);
+     ## def
+
+     ## render_quadrant
+      # Renders the image z/x/y and then the four images of the next zoom 
+      # level within it (recursively, down to max_zoom) from the tiles kept
+      # for the image. The empty images are not saved, and none of the 
+      # images within them are rendered.
+      # @param parent     The tiles kept for the parent image (see window_tiles)
+      # @param output_dir The directory of the pyramid
+      # @return           The number of images saved
+     ##
+     def render_quadrant(self, z, x, y, parent, output_dir):
+          (kept_tiles, tiles) = self.window_tiles(z, x, y, parent);
+          if tiles is None or len(tiles) == 0:
+               return 0;
+          ## if
+          self.render_tile(z, x, y, tiles, output_dir);
+          num_saved = 1;
+          if z < self.max_zoom:
+               for (dx, dy) in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+                    num_saved += self.render_quadrant(z + 1, 2 * x + dx, 2 * y + dy,
+                                                      kept_tiles, output_dir);
+               ## for
+          ## if
+          return num_saved;
+     ## def
+
+     ## export
+      # Renders all of the images of the pyramid quadrant by quadrant (see
+      # render_quadrant) and writes the index.html viewer. With several 
+      # workers, the coarse zoom levels are rendered until there are enough 
+      # quadrants to split between the worker processes. 
+      # @param output_dir  The directory of the pyramid
+      # @param num_workers The number of worker processes
+      # @return            The number of images saved
+     ##
+     def export(self, output_dir, num_workers = 1):
+          (quadrants, num_saved) = ([(0, 0, 0, None)], 0);
+          while num_workers > 1 and 0 < len(quadrants) and \
+                len(quadrants) < num_workers * PARALLEL_CHUNKS_PER_WORKER and \
+                quadrants[0][0] < self.max_zoom:
+               next_quadrants = [];
+               for (z, x, y, parent) in quadrants:
+                    (kept_tiles, tiles) = self.window_tiles(z, x, y, parent);
+                    if tiles is None or len(tiles) == 0:
+                         continue;
+                    ## if
+                    self.render_tile(z, x, y, tiles, output_dir);
+                    num_saved += 1;
+                    next_quadrants.extend([(z + 1, 2 * x + dx, 2 * y + dy, kept_tiles) \
+                                           for (dx, dy) in [(0, 0), (1, 0), (0, 1), (1, 1)]]);
+               ## for
+               quadrants = next_quadrants;
+          ## while
+          render_chunk = lambda chunk: np.array([self.render_quadrant(z, x, y, parent, output_dir) \
+                                                 for (z, x, y, parent) in chunk]);
+          if num_workers > 1 and len(quadrants) > 1:
+               rendered = parallel_map_chunks(render_chunk, quadrants, num_workers);
+          else:
+               rendered = [render_chunk(quadrants)];
+          ## if
+          num_saved += int(sum([chunk.sum() for chunk in rendered]));
+          if not os.path.isdir(output_dir):
+               os.makedirs(output_dir);
+          ## if
+          pyramid_info = {'name': self.tiling.name, 'num_steps': self.tiling.N,
+                          'max_zoom': self.max_zoom, 'tile_pixels': self.tile_pixels,
+                          'depths': [self.zoom_depth(z) for z in range(0, self.max_zoom + 1)]};
+          with open(os.path.join(output_dir, "index.html"), "w") as html_file:
+               html_file.write(PYRAMID_VIEWER_HTML.replace("PYRAMID_INFO",
+                                                           json.dumps(pyramid_info)));
+          ## with
+          return num_saved;
+     ## def
+
+## class
@@ -5,8 +5,12 @@
 #### Author: Maxie D. Schmidt
 #### Created: 2016.11.07 
 
+import numpy as np
 from sage.all import *
 from Tiling import Tiling, edist, X, Y, midpoint2
+from TileSet import TileSet
+from AlgebraicCoords import ZPHI, PHI, PHI_SQUARED, ExactCoords, \
+                            tiles_of_type, merge_subtiles
 
 ## 
  # Python constants to denote the distinct tile types in the substitution tiling
@@ -102,12 +106,16 @@ class TubingenTriangle_Tiling(Tiling):
       # @param num_steps_N     The number of substitution steps in the tiling
       # @param tiling_name_str Optional tiling name string 
       #                        (defaults to "TubingenTriangle")
+      # @param exact           Whether to compute the tiles with exact 
+      #                        coordinates in Z[phi] (defaults to False, 
+      #                        only valid when phi is the golden ratio)
      ##
      def __init__(self, num_steps_N, tiling_name_str = "TubingenTriangle", 
-                  phi = n(golden_ratio)): 
+                  phi = n(golden_ratio), exact = False): 
           self.num_steps = num_steps_N; 
           self.tiling_name = tiling_name_str; 
           self.phi = phi
+          self.exact = exact; 
 
           s = phi #25.0
           itA, itC = vector([0, 0]), vector([s, 0])
@@ -116,6 +124,7 @@ class TubingenTriangle_Tiling(Tiling):
           #itBy = sqrt(1-(self.phi**2)/4.0) * s
           itBx = 1 / 2.0 / phi
           itBy = sqrt(1-1/4.0/(phi**2))
+          self.EXACT_SCALE = (0.5, float(itBy)); 
           self.INIT_TILE = [
                itA, # pa
                vector([itBx, itBy]), # pb
@@ -157,29 +166,123 @@ class TubingenTriangle_Tiling(Tiling):
           return next_tiles;
      ## def 
      
+     ## subdivide_exact
+      # Static method that performs one substitution step on the exact 
+      # (Z[phi] coefficient) representation of the tiles
+      # @param tile_types The array of tile types (ATILE or BTILE)
+      # @param offsets    The array of offsets of the tiles into coeffs
+      # @param coeffs     The (num_vertices, 2, 2) exact vertex coefficients
+      # @return           The tile types, offsets and coefficients after one 
+      #                   more step (in the same order as get_next_tiling)
+     ##
+     @staticmethod
+     def subdivide_exact(tile_types, offsets, coeffs): 
+          aidx, atiles = tiles_of_type(tile_types, offsets, coeffs, ATILE, 3); 
+          A, B, C = [ZPHI.mul(atiles[:, vidx], PHI) for vidx in range(0, 3)]; 
+          mp1 = B + ZPHI.divide(C - B, PHI_SQUARED); 
+          mp2 = A + ZPHI.divide(C - A, PHI_SQUARED); 
+          subtiles = [(aidx, ATILE, [mp1, mp2, C]), (aidx, BTILE, [A, mp1, mp2]), 
+                      (aidx, ATILE, [B, mp1, A])]; 
+          bidx, btiles = tiles_of_type(tile_types, offsets, coeffs, BTILE, 3); 
+          A, B, C = [ZPHI.mul(btiles[:, vidx], PHI) for vidx in range(0, 3)]; 
+          mp = B + ZPHI.divide(A - B, PHI_SQUARED); 
+          subtiles += [(bidx, ATILE, [C, mp, A]), (bidx, BTILE, [B, C, mp])]; 
+          return merge_subtiles(subtiles); 
+     ## def 
+     
+     ## get_root_tiles
+      # Returns the initial triangle at the root of the substitution tree
+     ##
+     def get_root_tiles(self): 
+          init_tile = self.get_initial_tile(); 
+          return [TubingenTriangleTile(ATILE, init_tile[1], init_tile[0], 
+                                       init_tile[2], self.phi)]; 
+     
+     ## num_substitution_steps
+      # Returns the number of substitution steps applied to the initial tile
+     ##
+     def num_substitution_steps(self): 
+          return self.num_steps; 
+     
+     ## get_inflation_factor
+      # Returns the factor phi by which each substitution step scales the 
+      # tiles
+     ##
+     def get_inflation_factor(self): 
+          return float(self.phi); 
+     
      ## get_tiles
       # Gets the polygonal GoldenTriangle tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A list of tiles in the computed substitution tiling
      ##
-     def get_tiles(self): 
+     def get_tiles(self, window = None): 
           
-          init_tile = self.get_initial_tile(); 
-          init_tt_tile = TubingenTriangleTile(ATILE, init_tile[1], init_tile[0], 
-                                              init_tile[2], self.phi); 
-          tile_list = [init_tt_tile.to_list_repr()]; 
-          for n in range(1, self.num_steps + 1): 
+          if self.exact: 
+               return self.get_tiles_exact(window); 
+          elif window is not None: 
+               return Tiling.get_tiles(self, window); 
+          ## if 
+          (start, level_arrays) = self.resume_level(self.num_steps); 
+          if level_arrays is None: 
+               init_tile = self.get_initial_tile(); 
+               init_tt_tile = TubingenTriangleTile(ATILE, init_tile[1], init_tile[0], 
+                                                   init_tile[2], self.phi); 
+               tile_list = [init_tt_tile.to_list_repr()]; 
+          else: 
+               tile_list = self.level_arrays_to_tiles(level_arrays); 
+          ## if 
+          for n in range(start + 1, self.num_steps + 1): 
                next_tiles_list = self.get_next_tiling(tile_list); 
                tile_list = next_tiles_list; 
+               if self.caches_levels(): 
+                    self.store_level(n, self.tiles_to_level_arrays(tile_list)); 
+               ## if 
           ## for 
           
-          rtiles_list = []; 
-          for (idx, tt_tile) in enumerate(tile_list): 
-               tt_tile2 = TubingenTriangleTile.from_list_repr(tt_tile)
-               rtiles_list.append(tt_tile2.to_points()); 
-          ## for 
-          return rtiles_list; 
+          tt_tiles = map(TubingenTriangleTile.from_list_repr, tile_list)
+          return TileSet.from_tile_objects(tt_tiles); 
 
      ## def 
+     
+     ## get_tiles_exact
+      # Gets the polygonal Tubingen triangle tiles after N steps where the 
+      # vertex coordinates are computed exactly in Z[phi]
+      # @param window An optional window (xmin, ymin, xmax, ymax) outside of 
+      #               which the supertiles are culled at each step
+      # @return       A TileSet with exact vertex coordinates
+     ##
+     def get_tiles_exact(self, window = None): 
+          (start, level_arrays) = (0, None) if window is not None else \
+                                  self.resume_level(self.num_steps); 
+          if level_arrays is None: 
+               init_tile = self.get_initial_tile(); 
+               init_points = [init_tile[1], init_tile[0], init_tile[2]]; 
+               coeffs = ExactCoords.from_points(ZPHI, init_points, self.EXACT_SCALE).coeffs; 
+               tile_types = np.array([ATILE], dtype = np.uint8); 
+               offsets = np.array([0, 3]); 
+          else: 
+               tile_types, offsets = level_arrays['tile_types'], level_arrays['offsets']; 
+               coeffs = level_arrays['coeffs']; 
+          ## if 
+          for n in range(start + 1, self.num_steps + 1): 
+               tile_types, offsets, coeffs = \
+                    TubingenTriangle_Tiling.subdivide_exact(tile_types, offsets, coeffs); 
+               if window is not None: 
+                    exact = ExactCoords(ZPHI, coeffs, self.EXACT_SCALE); 
+                    tiles = self.window_select(TileSet.from_exact(exact, offsets, tile_types), 
+                                               self.num_steps - n, window); 
+                    tile_types, offsets, coeffs = \
+                         tiles.tile_types, tiles.offsets, tiles.exact.coeffs; 
+               else: 
+                    self.store_level(n, {'tile_types': tile_types, 'offsets': offsets, 
+                                         'coeffs': coeffs}); 
+               ## if 
+          ## for 
+          exact = ExactCoords(ZPHI, coeffs, self.EXACT_SCALE); 
+          return TileSet.from_exact(exact, offsets, tile_types); 
+     ## def 
 
 ## class 
 
@@ -0,0 +1,142 @@
+#### VertexPool.py
+#### Defines an indexed pool of the distinct vertices of a tiling, which the
+#### tiles reference by integer vertex IDs instead of by coordinates
+#### Author: Maxie D. Schmidt
+#### Created: 2026.10.18
+
+import numpy as np
+from sage.all import vector
+
+from Tiling import FPNUM_DIGITS
+from TileSet import TileSet
+
+## VertexPool
+ # A deduplicated pool of 2D vertices built up during the substitution. Each
+ # point added to the pool is looked up by its coordinates quantized to 
+ # FPNUM_DIGITS digits, so a vertex shared by several tiles is stored once 
+ # (with the coordinates it was first computed with) and the tiles only 
+ # hold its integer ID. The new points of a subdivision which lie on the 
+ # segment between two vertices (for example, the points at 1/3 and 2/3 of 
+ # an edge) are created through edge_point, which caches them by the IDs of 
+ # the segment endpoints, so the points on an edge shared by two tiles are 
+ # computed once.
+##
+class VertexPool(object):
+
+     ## __init__
+      # Initialization function for the VertexPool class
+     ##
+     def __init__(self):
+          self.coords = [];
+          self.vertex_ids = {};
+          self.edge_points = {};
+          self.scale = 10**FPNUM_DIGITS;
+          self.points_array = np.zeros((0, 2));
+     ## def
+
+     ## add
+      # Adds a point to the pool (unless it is already in the pool)
+      # @param point A 2D point
+      # @return      The vertex ID of the point
+     ##
+     def add(self, point):
+          (x, y) = (float(point[0]), float(point[1]));
+          key = (int(round(x * self.scale)), int(round(y * self.scale)));
+          vid = self.vertex_ids.get(key);
+          if vid is None:
+               vid = len(self.coords);
+               self.vertex_ids[key] = vid;
+               self.coords.append((x, y));
+          ## if
+          return vid;
+     ## def
+
+     ## add_points
+      # Adds a list of points to the pool
+      # @param points A list of 2D points
+      # @return       The list of the vertex IDs of the points
+     ##
+     def add_points(self, points):
+          return [self.add(point) for point in points];
+
+     ## edge_point
+      # Returns the ID of the point (1 - t) * P_i + t * P_j on the segment
+      # between two vertices of the pool (the segment is cached in both
+      # directions, so the tiles on either side of an edge share its points)
+      # @param i The vertex ID of the first endpoint P_i
+      # @param j The vertex ID of the second endpoint P_j
+      # @param t The position of the point along the segment
+      # @return  The vertex ID of the point
+     ##
+     def edge_point(self, i, j, t):
+          key = (i, j, round(t, FPNUM_DIGITS)) if i <= j else \
+                (j, i, round(1.0 - t, FPNUM_DIGITS));
+          vid = self.edge_points.get(key);
+          if vid is None:
+               ((xi, yi), (xj, yj)) = (self.coords[i], self.coords[j]);
+               vid = self.add(((1.0 - t) * xi + t * xj, (1.0 - t) * yi + t * yj));
+               self.edge_points[key] = vid;
+          ## if
+          return vid;
+     ## def
+
+     ## point
+      # Returns the coordinates of a vertex as a Sage vector
+      # @param vid The vertex ID
+     ##
+     def point(self, vid):
+          return vector(self.coords[vid]);
+
+     ## points
+      # Returns the (num_points, 2) array of the coordinates in the pool 
+      # (the array is extended by the points added since the last call, 
+      # doubling its capacity as needed, and a view of it is returned)
+     ##
+     def points(self):
+          num_array = getattr(self, 'num_array', 0);
+          if num_array < len(self.coords):
+               if len(self.points_array) < len(self.coords):
+                    capacity = max(2 * len(self.points_array), len(self.coords));
+                    points_array = np.empty((capacity, 2), dtype = np.float64);
+                    points_array[0:num_array] = self.points_array[0:num_array];
+                    self.points_array = points_array;
+               ## if
+               self.points_array[num_array:len(self.coords)] = self.coords[num_array:];
+               self.num_array = len(self.coords);
+          ## if
+          return self.points_array[0:len(self.coords)];
+     ## def
+
+     ## __len__
+      # Returns the number of distinct vertices in the pool
+     ##
+     def __len__(self):
+          return len(self.coords);
+
+     ## tiles_to_tileset
+      # Static method that converts a list of tile objects referencing the
+      # vertices of a pool (through their pool and vertex_ids attributes)
+      # into an indexed TileSet of the pool points referenced by the tiles 
+      # (so a TileSet of some of the tiles, like a chunk computed by a worker
+      # process, does not carry the rest of the pool)
+      # @param tile_list A list of tile objects referencing one VertexPool
+      # @param dtype     The floating point type of the TileSet vertices
+      # @return          The corresponding TileSet object
+     ##
+     @staticmethod
+     def tiles_to_tileset(tile_list, dtype = np.float64):
+          if len(tile_list) == 0:
+               return TileSet(np.zeros((0, 2)), np.zeros(1, dtype = np.int64),
+                              dtype = dtype);
+          ## if
+          vertex_ids = np.array([vid for tile in tile_list for vid in tile.vertex_ids],
+                                dtype = np.int64);
+          (used_ids, vertex_ids) = np.unique(vertex_ids, return_inverse = True);
+          offsets = np.zeros(len(tile_list) + 1, dtype = np.int64);
+          offsets[1:] = np.cumsum([len(tile.vertex_ids) for tile in tile_list]);
+          tile_types = [tile.tile_type for tile in tile_list];
+          return TileSet(tile_list[0].pool.points()[used_ids], offsets, tile_types, dtype,
+                         vertex_ids = vertex_ids);
+     ## def
+
+## class
@@ -134,28 +134,17 @@ class WaltonChair_Tiling(Tiling):
           return next_tiles; 
      ## def 
      
-     ## get_tiles
-      # Gets the polygonal Domino tiles after N steps
-      # @return A list of tiles in the computed substitution tiling
+     ## get_root_tiles
+      # Returns the tile objects at the root of the substitution tree 
+      # (the polygonal tiles after N steps are computed by Tiling.get_tiles)
      ##
-     def get_tiles(self): 
+     def get_root_tiles(self): 
           
           init_tile = WaltonChairTile(WTILE, self.INIT_TILE[0], \
                                    self.INIT_TILE[1], self.INIT_TILE[2], \
                                    self.INIT_TILE[3], self.INIT_TILE[4], \
-                                   self.INIT_TILE[5]);  
-          tile_list = [init_tile]; 
-          for n in range(1, self.N): 
-               next_tiles_list = self.get_next_tiling(tile_list); 
-               tile_list = next_tiles_list;
-          ## for 
-          
-          rtiles_list = []; 
-          for (idx, stile) in enumerate(tile_list): 
-               rtiles_list.append(stile.to_points()); 
-          ## for 
-          return rtiles_list; 
-
+                                   self.INIT_TILE[5]);
+          return [init_tile]; 
      ## def 
 
 ## class 
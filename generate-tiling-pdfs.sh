@@ -14,12 +14,12 @@ mkdir -p $COMPFORMIMGS
 #### Generate the histogram images: 
 for N in `seq $2 $3`; 
 do 
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N -q
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N -a
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N -d
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N -l
-     $SAGE -python tiling_pc_plots.py -t $TILING -s -n $N -g
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N -q
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N -a
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N -d
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N -l
+     $SAGE -python tiling_pc_plots.py -t $TILING -s -k -n $N -g
 done
 
 echo "Copying and renaming comparsion form images ... "
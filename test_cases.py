@@ -3,8 +3,30 @@
 #### Author: Maxie D. Schmidt
 #### Created: 2016.04.01
 
+import os
 import unittest
+import shutil
+import tempfile
 from Tiling import *
+from TileSet import TileSet
+from SubstitutionEngine import AffineSubstitutionEngine
+from AffineTransformOp import LRUCache, compose_ops
+from AlgebraicCoords import ZPHI, ZSQRT2, PHI, PHI_SQUARED, SQRT2
+from Penrose import Penrose_Tiling
+from AmmannChair import AmmannChair_Tiling
+from AmmannChair2 import AmmannChair2_Tiling
+from GoldenTriangle import GoldenTriangle_Tiling
+from Fibonacci2D import Fibonacci2D_Tiling
+from IntegerLattice import IntegerLattice_Tiling
+from TilingCache import TilingCache
+from VertexPool import VertexPool
+from PairHistogram import PairHistogram
+from HistogramPyramid import HistogramPyramid
+from Histogram2D import JointHistogram
+from BinnedKDE import BinnedKDE
+from TilingImage import tileset_polygons
+from TilingPyramid import TilingPyramid
+from LocalSageHistogram import HistogramEngine
 from ConfigParser import ConfigParser
 
 ## TestTilingMethods
@@ -77,6 +99,20 @@ class TestTilingMethods(unittest.TestCase):
           self.assertEqual(unique_points(a4), [vector([0, 1])]);
           self.assertEqual(unique_points(a4), unique_points(a5));
      ## def
+
+     ## test_unique_point_array
+      # Tests the vectorized Tiling.unique_point_array function (including
+      # points which only differ by rounding and far apart coordinates)
+     ##
+     def test_unique_point_array(self):
+          points = [[1, -2], [0.5, 3], [1 + 10**-9, -2], [-4, 0], [0.5, 3 - 10**-9]];
+          expected = [[-4, 0], [0.5, 3], [1, -2]];
+          self.assertEqual(unique_point_array(points).tolist(), expected);
+          far_points = [[10**7, 1], [-10**7, 1], [10**7, 1]];
+          self.assertEqual(unique_point_array(far_points).tolist(),
+                           [[-10**7, 1], [10**7, 1]]);
+          self.assertEqual(unique_point_array([]).shape, (0, 2));
+     ## def
      
      ## test_unique_points_1D
       # Tests the Tiling.unique_points_1D function
@@ -102,6 +138,492 @@ class TestTilingMethods(unittest.TestCase):
           self.assertEqual(Tiling.tiling_to_points(tiles, True), expected); 
      ## def
      
+     ## test_solve_system
+      # Tests the numerical circle intersection routines
+     ##
+     def test_solve_system(self):
+          self.assertEqual(solve_system([0, 0], 5, [8, 0], 5), [4.0, 3.0]);
+          self.assertEqual(solve_system([0, 0], 5, [8, 0], 5, lambda x, y: y < 0), 
+                           [4.0, -3.0]);
+          self.assertEqual(solve_system([0, 0], 1, [5, 0], 1), [2.5, 0.0]);
+          self.assertIsNone(solve_system([0, 0], 1, [0, 0], 2));
+          self.assertIsNone(solve_system([0, 0], 5, [8, 0], 5, lambda x, y: x > 5));
+          points = solve_circles([[0, 0], [0, 0]], [5, 1], [[8, 0], [2, 0]], [5, 1], 
+                                 [CIRCLE_BRANCH_RIGHT, CIRCLE_BRANCH_LEFT]);
+          self.assertEqual(points.tolist(), [[4.0, -3.0], [1.0, 0.0]]);
+     ## def
+     
+     ## test_tileset
+      # Tests the TileSet container against the list of tiles representation
+     ##
+     def test_tileset(self):
+          tiles = [ [vector([0, 0])], 
+                    [vector([1, 0]), vector([0, 0]), vector([2, 1])], 
+                    [vector([2, 1]), vector([3, 1])] 
+                  ];
+          tileset = TileSet.from_tiles(tiles, tile_types = [1, 2, 3]);
+          self.assertEqual(len(tileset), 3);
+          self.assertEqual(tileset.num_vertices, 6);
+          self.assertEqual(list(tileset.offsets), [0, 1, 4, 6]);
+          self.assertEqual(list(tileset.tile_types), [1, 2, 3]);
+          self.assertEqual(tileset[1], tiles[1]);
+          self.assertEqual(tileset[-1], tiles[2]);
+          self.assertEqual(tileset.to_list(), tiles);
+          self.assertIsNone(tileset.as_array());
+          self.assertEqual(tileset[1:].to_list(), tiles[1:]);
+          self.assertEqual(len(TileSet.concatenate([tileset, tileset])), 6);
+          self.assertEqual(tileset.take([2, 0, 1]).to_list(), [tiles[2], tiles[0], tiles[1]]);
+          self.assertEqual(list(tileset.take([2, 0, 1]).tile_types), [3, 1, 2]);
+          self.assertEqual(Tiling.tiling_to_points(tileset, True), 
+                           Tiling.tiling_to_points(tiles, True));
+     ## def
+     
+     ## test_vertex_pool
+      # Tests the VertexPool edge point cache and the indexed TileSets built
+      # from the tiles referencing a pool
+     ##
+     def test_vertex_pool(self):
+          pool = VertexPool();
+          (a, b) = pool.add_points([vector([0, 0]), vector([3, 0])]);
+          self.assertEqual(pool.add(vector([10**-9, 0])), a);
+          p = pool.edge_point(a, b, 1.0 / 3.0);
+          self.assertEqual(pool.edge_point(b, a, 2.0 / 3.0), p);
+          self.assertEqual(list(pool.point(p)), [1.0, 0.0]);
+          self.assertEqual(len(pool), 3);
+          tiling = Fibonacci2D_Tiling(5, "Fibonacci2D");
+          tiles = tiling.get_tileset();
+          self.assertIsNotNone(tiles.vertex_ids);
+          self.assertEqual(len(tiles.pooled_vertices()),
+                           len(unique_point_array(tiles.vertices)));
+          self.assertEqual(Tiling.tiling_to_points(tiles),
+                           Tiling.tiling_to_points(TileSet(tiles.vertices, tiles.offsets)));
+          self.assertEqual(tiles.select(tiles.tile_types == 1).to_list(),
+                           [tile for (tile, ttype) in zip(tiles, tiles.tile_types) if ttype == 1]);
+          self.assertIsNotNone(tiles[1:5].vertex_ids);
+          tile_list = tiling.substitute_tile_steps([(tiling.get_root_tiles()[0], 3)]);
+          chunk = tiling.tiles_to_tileset(tile_list[0:2]);
+          self.assertEqual(chunk.vertex_ids.max() + 1, len(np.unique(chunk.vertex_ids)));
+          self.assertEqual(chunk.to_list(), [tile.to_points() for tile in tile_list[0:2]]);
+          self.assertEqual(tiles[1:5].to_list(), tiles.to_list()[1:5]);
+     ## def
+
+     ## test_pair_histogram
+      # Tests the blocked pair distance kernel and the PairHistogram class
+     ##
+     def test_pair_histogram(self):
+          points = [vector([0, 0]), vector([3, 4]), vector([0, 0]), vector([6, 8])];
+          self.assertEqual(sorted(np.concatenate(list(pair_distance_blocks(points, False, 3)))),
+                           [5.0, 5.0, 5.0, 10.0, 10.0]);
+          self.assertEqual(Tiling.compute_pc_edists(points[0:2], True, True), [25.0, 25.0]);
+          pc_hist = PairHistogram.from_points(points, num_bins = 10);
+          self.assertEqual(pc_hist.counts.tolist(), [0, 0, 0, 0, 0, 3, 0, 0, 0, 2]);
+          self.assertAlmostEqual(pc_hist.quantiles([0.5])[0], 5.0 + 5.0 / 6.0);
+          self.assertEqual(sorted(np.concatenate(list(pair_distance_blocks(points, True, 3, 6.0)))),
+                           [25.0, 25.0, 25.0]);
+          pc_hist = PairHistogram.from_points(points, num_bins = 10, rmax = 6.0);
+          self.assertEqual((pc_hist.num_pairs, pc_hist.num_overflow), (3, 2));
+          grid = [vector([x, y]) for x in range(20) for y in range(20)];
+          sampled = PairHistogram.sample_points(grid, 4000, seed = 1);
+          self.assertEqual(sampled.counts.tolist(),
+                           PairHistogram.sample_points(grid, 4000, seed = 1).counts.tolist());
+          (densities, edges, half_widths) = sampled.coarse_histogram(8, [0, 8]);
+          exact = PairHistogram.from_points(grid).coarse_histogram(8, [0, 8])[0];
+          self.assertTrue(np.all(np.abs(densities - exact) <= 3 * half_widths + 1e-9));
+          anchored = PairHistogram.sample_points(grid, 50, rmax = 1.5, seed = 1);
+          self.assertEqual(set(np.round(anchored.centers()[anchored.counts > 0])), set([1.0]));
+          self.assertEqual(anchored.num_pairs + anchored.num_overflow, 50 * 399);
+          self.assertEqual(pair_row_blocks(10, 2), [0, 8, 2, 6, 4]);
+          grid = np.array([[x, y] for x in range(50) for y in range(50)], dtype = float);
+          self.assertEqual(PairHistogram.from_points(grid, num_workers = 2).counts.tolist(),
+                           PairHistogram.from_points(grid).counts.tolist());
+     ## def
+
+     ## test_lag_gaps
+      # Tests the vectorized slope and angle gap kernels
+     ##
+     def test_lag_gaps(self):
+          gaps = lag_gaps([0, 1, 3, 6, 10], 2);
+          self.assertEqual(gaps[0, 1:].tolist(), [1, 2, 3, 4]);
+          self.assertEqual(gaps[1, 2:].tolist(), [3, 5, 7]);
+          self.assertTrue(np.isnan(gaps[1, 0:2]).all());
+          points = [vector([1, 0]), vector([2, 2]), vector([0, 5]), vector([1, 3]), vector([4, 2])];
+          self.assertEqual(Tiling.compute_sorted_slopes(points), [0.0, 0.5, 1.0, 3.0]);
+          self.assertEqual(Tiling.compute_slope_gaps(points, 2), [1.0, 2.5]);
+          self.assertEqual(Tiling.compute_joint_slope_gaps(points, 1, 2).tolist(),
+                           [[0.5, 1.0], [2.0, 2.5]]);
+          self.assertEqual(Tiling.compute_angle_gaps([vector([1, 0]), vector([0, 1])]), [0.25]);
+          self.assertEqual(filter_nonzero([0.5, 0.00001, -0.2]), [0.5, -0.2]);
+     ## def
+
+     ## test_histogram_engine
+      # Tests the HistogramEngine against numpy.histogram
+     ##
+     def test_histogram_engine(self):
+          data = [0.5, 1.0, 1.5, 2.0, 2.0, 3.0, 4.0, -1.0];
+          engine = HistogramEngine(data);
+          for (bins, xran) in [(4, [0, 4]), (3, None), ([0.0, 1.0, 2.5, 3.0], None)]:
+               (expected, expected_edges) = np.histogram(data, bins = bins, range = xran,
+                                                         density = True);
+               (densities, edges) = engine.histogram(bins, xran);
+               self.assertTrue(np.allclose(densities, expected));
+               self.assertTrue(np.allclose(edges, expected_edges));
+          ## for
+          weighted = HistogramEngine([3.0, 1.0, 2.0], [1, 2, 5]);
+          self.assertEqual(weighted.histogram(2, [1, 3], False)[0].tolist(), [2.0, 6.0]);
+     ## def
+
+     ## test_boundary_dedup
+      # Tests the supertile boundary deduplication in Tiling.get_unique_points
+     ##
+     def test_boundary_dedup(self):
+          square = [[0, 0], [1, 0], [1, 1], [0, 1]];
+          mask = polygon_boundary_mask([[0.5, 0], [0.5, 0.5], [1, 1], [2, 0]], square, 10**-6);
+          self.assertEqual(mask.tolist(), [True, False, True, False]);
+          for tiling in [Penrose_Tiling(6, "Penrose"), Fibonacci2D_Tiling(5, "Fibonacci2D")]:
+               self.assertEqual(tiling.get_unique_points(),
+                                Tiling.tiling_to_points(tiling.get_tileset(), True));
+          ## for
+     ## def
+
+     ## test_affine_substitution_engine
+      # Tests the batched AffineSubstitutionEngine against the pointwise 
+      # Tiling.transform_full_points_list routine
+     ##
+     def test_affine_substitution_engine(self):
+          op1 = AffineTransformOp(0.5 * matrix([[1, 0], [0, 1]]), vector([0, 0]));
+          op2 = AffineTransformOp(0.5 * matrix([[0, 1], [-1, 0]]), vector([0, 1]));
+          tiles = [[vector([0, 0]), vector([1, 0]), vector([1, 1])]];
+          expected = Tiling.transform_full_points_list(tiles, op1) + \
+                     Tiling.transform_full_points_list(tiles, op2);
+          engine = AffineSubstitutionEngine([op1, op2]);
+          self.assertEqual(TileSet.from_array(engine.next_tiles(tiles)).to_list(), 
+                           expected);
+          self.assertEqual(engine.substitute(tiles[0], 3).shape, (8, 3, 2));
+          engine2 = AffineSubstitutionEngine([op1], [op2]);
+          self.assertEqual(engine2.substitute(tiles[0], 4).shape, (8, 3, 2));
+     ## def
+     
+     ## test_exact_coords
+      # Tests the exact Z[phi] and Z[sqrt(2)] arithmetic and that the exact 
+      # Penrose tiles agree with the floating point tiles
+     ##
+     def test_exact_coords(self):
+          self.assertEqual(list(ZPHI.mul(PHI, PHI)), list(PHI_SQUARED));
+          self.assertEqual(list(ZPHI.divide(PHI_SQUARED, PHI)), list(PHI));
+          self.assertEqual(list(ZSQRT2.divide(ZSQRT2.element(2, 0), SQRT2)), [0, 1]);
+          self.assertRaises(ArithmeticError, ZSQRT2.divide, ZSQRT2.element(1, 0), SQRT2);
+          self.assertEqual(list(ZPHI.from_float(ZPHI.generator - 3)), [-3, 1]);
+          ftiles = Penrose_Tiling(4).get_tiles();
+          etiles = Penrose_Tiling(4, exact = True).get_tiles();
+          self.assertEqual(list(etiles.tile_types), list(ftiles.tile_types));
+          self.assertTrue(np.allclose(etiles.vertices, ftiles.vertices));
+          self.assertEqual(len(Tiling.tiling_to_points(etiles, True)), 
+                           len(Tiling.tiling_to_points(ftiles, True)));
+     ## def
+     
+     ## test_affine_transform_op
+      # Tests the array-backed AffineTransformOp class and the cache of 
+      # composed transformations
+     ##
+     def test_affine_transform_op(self):
+          op1 = AffineTransformOp(0.5 * matrix([[0, 1], [-1, 0]]), vector([0, 1]));
+          op2 = AffineTransformOp(matrix([[2, 0], [0, 3]]), vector([1, 1]));
+          point = vector([1.0, 2.0]);
+          self.assertEqual(op1.apply_to_point(point), vector([1.0, 0.5]));
+          self.assertEqual(op1.apply(op2).apply_to_point(point), 
+                           op2.apply_to_point(op1.apply_to_point(point)));
+          self.assertEqual(op1.apply_to_points([[1.0, 2.0], [0.0, 0.0]]).tolist(), 
+                           [[1.0, 0.5], [0.0, 1.0]]);
+          word = compose_ops(op1, op2, op1);
+          self.assertIs(compose_ops(op1, op2, op1), word);
+          self.assertEqual(word.apply_to_point(point), 
+                           op1.apply_to_point(op2.apply_to_point(op1.apply_to_point(point))));
+          simp = lambda obj: obj;
+          op2s = AffineTransformOp(matrix([[2, 0], [0, 3]]), vector([1, 1]), simp);
+          self.assertIs(op2s.apply(op1).simp_func, simp);
+          self.assertIsNone(op1.apply(op2s).simp_func);
+          self.assertIsNot(compose_ops(op1, op2s), compose_ops(op1, op2));
+          self.assertIs(compose_ops(op1, op2s).simp_func, simp);
+          self.assertIsNone(compose_ops(op1, op2).simp_func);
+          cache = LRUCache(2);
+          cache.put(1, 'a'); cache.put(2, 'b'); cache.get(1); cache.put(3, 'c');
+          self.assertIsNone(cache.get(2));
+          self.assertEqual(cache.get(1), 'a');
+     ## def
+     
+     ## test_iter_tiles
+      # Tests that the depth-first iter_tiles generator yields the same tiles 
+      # as get_tiles (possibly in a different order), and that the distinct 
+      # points computed from the stream of tiles are correct
+     ##
+     def test_iter_tiles(self):
+          sort_tiles = lambda tiles: sorted([tuple(np.round(np.asarray(tile, dtype = float), 
+                                                            FPNUM_DIGITS).ravel()) 
+                                             for tile in tiles]);
+          for tiling in [Penrose_Tiling(3), AmmannChair_Tiling(6)]:
+               tiles = tiling.get_tiles();
+               chunks = list(tiling.iter_tiles(chunk_size = 4));
+               self.assertTrue(all([len(chunk) <= 4 for chunk in chunks]));
+               self.assertEqual(sort_tiles(TileSet.concatenate(chunks)), sort_tiles(tiles));
+               self.assertEqual(sort_tiles(tiling.iter_tiles()), sort_tiles(tiles));
+               points = Tiling.stream_to_points(tiling.iter_tiles(chunk_size = 4));
+               self.assertEqual(len(points), 
+                                len(np.unique(np.round(tiles.vertices, FPNUM_DIGITS), axis = 0)));
+          ## for
+     ## def
+     
+     ## test_window_culling
+      # Tests that the tiles generated with a window are exactly the tiles 
+      # of the full tiling which intersect the window
+     ##
+     def test_window_culling(self):
+          sort_tiles = lambda tiles: sorted([tuple(np.round(np.asarray(tile, dtype = float), 
+                                                            FPNUM_DIGITS).ravel()) 
+                                             for tile in tiles]);
+          window = disk_window(0.25, (0.1, 0.05));
+          self.assertEqual(window, (-0.15, -0.2, 0.35, 0.3));
+          self.assertEqual(points_in_window([vector([0, 0]), vector([0.4, 0])], window), 
+                           [vector([0, 0])]);
+          for tiling in [Penrose_Tiling(5), AmmannChair2_Tiling(6), AmmannChair_Tiling(9)]:
+               tiles = tiling.get_tileset();
+               expected = tiles.select(tiling.window_tile_mask(tiles, 0, window));
+               wtiles = tiling.get_tileset(window = window);
+               self.assertTrue(0 < len(wtiles) and len(wtiles) < len(tiles));
+               self.assertEqual(sort_tiles(wtiles), sort_tiles(expected));
+               self.assertEqual(sort_tiles(tiling.iter_tiles(window = window)), 
+                                sort_tiles(expected));
+          ## for
+          lattice_tiles = IntegerLattice_Tiling(1).get_tileset(window = (0, 0, 10, 10));
+          self.assertEqual(len(lattice_tiles), 45);
+     ## def
+     
+     ## test_tiling_cache
+      # Tests that the cached tiles and points of a tiling match the 
+      # generated ones, and that stale cache entries are rebuilt
+     ##
+     def test_tiling_cache(self):
+          cache_dir = tempfile.mkdtemp();
+          try:
+               cache = TilingCache(cache_dir);
+               tiling = Penrose_Tiling(3);
+               self.assertIsNone(cache.load(tiling));
+               (tiles, points) = cache.get(tiling);
+               (ctiles, cpoints) = cache.load(tiling);
+               self.assertTrue(np.array_equal(ctiles.vertices, tiles.vertices));
+               self.assertEqual(list(ctiles.tile_types), list(tiles.tile_types));
+               self.assertEqual(len(cpoints), len(Tiling.tiling_to_points(tiles, True)));
+               self.assertNotEqual(cache.cache_path(Penrose_Tiling(4)), cache.cache_path(tiling));
+               self.assertNotEqual(cache.cache_path(tiling, (0, 0, 1, 1)), cache.cache_path(tiling));
+               cache_path = cache.cache_path(tiling);
+               tiling.set_num_workers(3);
+               self.assertEqual(cache.cache_path(tiling), cache_path);
+               cache_data = dict(np.load(cache.cache_path(tiling)));
+               cache_data['source_hash'] = np.array('stale');
+               with open(cache.cache_path(tiling), 'wb') as cache_file:
+                    np.savez_compressed(cache_file, **cache_data);
+               ## with
+               self.assertIsNone(cache.load(tiling));
+               cache.get(tiling);
+               self.assertIsNotNone(cache.load(tiling));
+          finally:
+               shutil.rmtree(cache_dir);
+          ## try
+     ## def
+
+     ## test_tiling_image
+      # Tests the polygons and the image of the batch tiling renderer
+     ##
+     def test_tiling_image(self):
+          tiles = TileSet.from_tiles([[V(0, 0), V(1, 0), V(0, 1)], 
+                                      [V(1, 0), V(1, 1), V(0, 1), V(0.5, 1.5)]]);
+          polygons = tileset_polygons(tiles);
+          self.assertEqual([poly.tolist() for poly in polygons], 
+                           [tiles.tile_vertices(idx).tolist() for idx in range(0, 2)]);
+          tiling = Penrose_Tiling(3);
+          self.assertEqual(tileset_polygons(tiling.get_tileset()).shape[1:], (3, 2));
+          image_dir = tempfile.mkdtemp();
+          try:
+               image_path = os.path.join(image_dir, "tiling.png");
+               tiling.save_tiling_image(tiling.get_tileset(), image_path);
+               self.assertTrue(os.path.getsize(image_path) > 0);
+          finally:
+               shutil.rmtree(image_dir);
+          ## try
+     ## def
+
+     ## test_tiling_pyramid
+      # Tests that the supertiles cover the tiles of the tiling, and exports 
+      # a small image pyramid with its viewer
+     ##
+     def test_tiling_pyramid(self):
+          polygon_area = lambda tiles: sum([abs(np.dot(poly[:, 0], np.roll(poly[:, 1], -1)) - \
+                                                np.dot(poly[:, 1], np.roll(poly[:, 0], -1))) \
+                                            for poly in tileset_polygons(tiles)]) / 2.0;
+          for tiling in [Penrose_Tiling(6), GoldenTriangle_Tiling(6, "GoldenTriangle")]:
+               (tiles, supertiles) = (tiling.get_tileset(), tiling.get_supertiles(2));
+               self.assertTrue(len(supertiles) < len(tiles));
+               self.assertAlmostEqual(polygon_area(supertiles), polygon_area(tiles));
+               self.assertTrue(np.allclose(supertiles.vertices.min(axis = 0), 
+                                           tiles.vertices.min(axis = 0)));
+          ## for
+          image_dir = tempfile.mkdtemp();
+          try:
+               tiling_pyramid = TilingPyramid(Penrose_Tiling(5), max_zoom = 1);
+               self.assertTrue(tiling_pyramid.zoom_depth(0) >= tiling_pyramid.zoom_depth(1));
+               self.assertEqual(tiling_pyramid.export(image_dir), 5);
+               self.assertTrue(os.path.isfile(os.path.join(image_dir, "1", "1", "0.png")));
+               self.assertTrue(os.path.isfile(os.path.join(image_dir, "index.html")));
+          finally:
+               shutil.rmtree(image_dir);
+          ## try
+          image_dir = tempfile.mkdtemp();
+          try:
+               lattice_pyramid = TilingPyramid(IntegerLattice_Tiling(1), max_zoom = 1);
+               points = lattice_pyramid.leaf_tiles.vertices;
+               window = lattice_pyramid.tile_window(1, 1, 1);
+               in_window = (points[:, 0] >= window[0]) & (points[:, 0] <= window[2]) & \
+                           (points[:, 1] >= window[1]) & (points[:, 1] <= window[3]);
+               self.assertEqual(len(lattice_pyramid.window_tiles(1, 1, 1, None)[1]), 
+                                np.count_nonzero(in_window));
+               self.assertEqual(lattice_pyramid.export(image_dir), 4);
+               self.assertFalse(os.path.isfile(os.path.join(image_dir, "1", "0", "0.png")));
+          finally:
+               shutil.rmtree(image_dir);
+          ## try
+     ## def
+
+     ## test_histogram_pyramid
+      # Tests the HistogramPyramid class and storing it in the TilingCache
+     ##
+     def test_histogram_pyramid(self):
+          pyramid = HistogramPyramid.from_values([1.0, 2.0, 2.0, 5.0], 7, num_bins = 8);
+          self.assertEqual(pyramid.counts.tolist(), [1, 0, 2, 0, 0, 0, 0, 1]);
+          self.assertEqual(pyramid.level(2).tolist(), [3, 1]);
+          self.assertEqual(pyramid.centers(2).tolist(), [2.0, 4.0]);
+          self.assertEqual((pyramid.mean(), pyramid.variance()), (2.5, 2.25));
+          heavy_tail = np.concatenate([np.linspace(0.0, 1.0, 9999), [1e12]]);
+          pyramid = HistogramPyramid.from_values(heavy_tail, num_bins = 1024);
+          self.assertEqual((pyramid.xmin, pyramid.num_underflow, pyramid.num_overflow), (heavy_tail[9], 9, 9));
+          self.assertLess(pyramid.xmax, 1.0);
+          self.assertEqual(pyramid.stats[2], 1e12);
+          pyramid = HistogramPyramid.from_values(heavy_tail, num_bins = 4, xran = [0.25, 0.75]);
+          self.assertEqual(pyramid.counts.sum() + pyramid.num_underflow + pyramid.num_overflow, 
+                           10000);
+          self.assertAlmostEqual(pyramid.quantiles([0.5])[0], 0.5, places = 3);
+          self.assertEqual(pyramid.quantiles([0.1, 0.9]), [0.25, 0.75]);
+          restored = HistogramPyramid.from_arrays(pyramid.to_arrays());
+          self.assertEqual((restored.num_underflow, restored.num_overflow), 
+                           (pyramid.num_underflow, pyramid.num_overflow));
+          pc_hist = PairHistogram.from_points([vector([0, 0]), vector([3, 4]), vector([6, 8])],
+                                              num_bins = 4);
+          self.assertEqual(pc_hist.stats.tolist(), [3, 5, 10, 20, 150]);
+          cache_dir = tempfile.mkdtemp();
+          try:
+               cache = TilingCache(cache_dir);
+               tiling = Penrose_Tiling(3);
+               self.assertIsNone(cache.load_histogram(tiling, "pc-edist"));
+               cache.save_histogram(tiling, "pc-edist", HistogramPyramid.from_pair_histogram(pc_hist, 3));
+               stored = cache.load_histogram(tiling, "pc-edist");
+               self.assertEqual(stored.counts.tolist(), [0, 0, 2, 1]);
+               self.assertEqual((stored.xmax, stored.num_points), (10.0, 3));
+               self.assertIsNone(cache.load_histogram(tiling, "slopegaps"));
+          finally:
+               shutil.rmtree(cache_dir);
+          ## try
+     ## def
+
+     ## test_binned_kde
+      # Tests the FFT binned kernel density estimate against the direct sum
+      # of the Gaussian kernels of the values
+     ##
+     def test_binned_kde(self):
+          values = np.array([0.0, 0.3, 1.0, 1.0, 1.7, 2.5]);
+          kde = BinnedKDE(values, bandwidth = 0.4, xran = (0, 2.5), num_grid = 2048);
+          xs = np.linspace(-0.5, 3.0, 15);
+          direct = np.exp(-0.5 * ((xs[:, None] - values[None, :]) / 0.4)**2).sum(axis = 1) / \
+                   (np.sqrt(2 * np.pi) * 0.4 * len(values));
+          self.assertTrue(np.allclose(kde.evaluate(xs), direct, atol = 1e-4));
+          weighted_kde = BinnedKDE([0.0, 0.3, 1.0, 1.7, 2.5], [1, 1, 2, 1, 1], 
+                                   bandwidth = 0.4, xran = (0, 2.5), num_grid = 2048);
+          self.assertTrue(np.allclose(weighted_kde.density, kde.density));
+          self.assertTrue(BinnedKDE(values).bandwidth > BinnedKDE(values, bandwidth = "silverman").bandwidth);
+          narrow_kde = BinnedKDE([0, 0.5, 1], bandwidth = 1e-4, xran = (0, 1), num_grid = 1000);
+          dx = narrow_kde.grid[1] - narrow_kde.grid[0];
+          self.assertAlmostEqual(narrow_kde.density.sum() * dx, 1.0);
+          cauchy = np.tan(np.pi * (np.linspace(0.0, 1.0, 20001)[1:-1] - 0.5));
+          heavy_kde = BinnedKDE(cauchy, xran = (-1, 1));
+          self.assertLess(heavy_kde.bandwidth, 0.1);
+          (xs, ys) = np.array(list(heavy_kde.range_points(-1, 1))).T;
+          self.assertGreater(len(xs), 1000);
+          self.assertAlmostEqual(ys[len(ys) // 2] / ys[0], 2.0, delta = 0.1);
+     ## def
+
+     ## test_joint_histogram
+      # Tests accumulating the JointHistogram of the joint slope gaps in chunks
+     ##
+     def test_joint_histogram(self):
+          points = [vector([x, (x * x) % 7]) for x in range(-20, 21)];
+          gaps = Tiling.compute_joint_slope_gaps(points, 1, 2);
+          (xedges, yedges) = (np.linspace(0, 2, 9), np.linspace(0, 4, 5));
+          expected = np.histogram2d(gaps[:, 0], gaps[:, 1], bins = (xedges, yedges))[0];
+          for sparse in [False, True]:
+               joint_hist = JointHistogram(xedges, yedges, sparse);
+               for chunk in np.array_split(gaps, 3):
+                    joint_hist.add(chunk);
+               ## for
+               self.assertEqual(joint_hist.grid().tolist(), expected.tolist());
+          ## for
+          merged = JointHistogram(xedges, yedges).merge(joint_hist);
+          self.assertEqual(merged.bin_values([[0.1, 0.1], [5, 5]]).tolist(),
+                           [expected[0, 0], 0.0]);
+     ## def
+
+     ## test_level_cache
+      # Tests that the tilings resumed from the cached intermediate levels
+      # match the tilings generated from the initial tiles
+     ##
+     def test_level_cache(self):
+          cache_dir = tempfile.mkdtemp();
+          try:
+               cache = TilingCache(cache_dir);
+               for tiling_class in [Penrose_Tiling, AmmannChair_Tiling, GoldenTriangle_Tiling]:
+                    for N in [2, 4, 5, 3]:
+                         expected = tiling_class(N).get_tileset();
+                         tiling = tiling_class(N);
+                         tiling.set_level_cache(cache);
+                         tiles = tiling.get_tileset();
+                         self.assertTrue(np.allclose(tiles.vertices, expected.vertices));
+                         self.assertEqual(list(tiles.tile_types), list(expected.tile_types));
+                    ## for
+                    self.assertEqual(cache.resume_level(tiling_class(9), 9)[0],
+                                     tiling_class(5).num_substitution_steps());
+               ## for
+          finally:
+               shutil.rmtree(cache_dir);
+          ## try
+     ## def
+
+     ## test_parallel_substitution
+      # Tests that the tilings generated by several worker processes match
+      # the serially generated tilings (including the order of the tiles)
+     ##
+     def test_parallel_substitution(self):
+          for tiling in [Penrose_Tiling(6), GoldenTriangle_Tiling(7)]:
+               expected = tiling.get_tileset();
+               tiling.set_num_workers(2);
+               tiles = tiling.get_tileset();
+               self.assertTrue(np.array_equal(tiles.vertices, expected.vertices));
+               self.assertEqual(list(tiles.tile_types), list(expected.tile_types));
+          ## for
+          ## the subtiles of the AmmannChair tiles take one or two steps: 
+          tiling = AmmannChair_Tiling(9);
+          expected = Tiling.get_tiles(tiling);
+          tiling.set_num_workers(2);
+          self.assertTrue(np.array_equal(Tiling.get_tiles(tiling).vertices, expected.vertices));
+          chunks = parallel_map_chunks(lambda chunk: np.array(chunk) ** 2, range(0, 10), 3);
+          self.assertEqual(np.concatenate(chunks).tolist(), [k ** 2 for k in range(0, 10)]);
+     ## def
+     
      ## test_config_parser
       # Tests that the parsing functions are working correctly in the 
       # ConfigParser class
@@ -8,14 +8,19 @@ import time
 import numpy as np
 import pprint 
 import statistics as statpdf
-from LocalSageHistogram import LocalHistogram
+from LocalSageHistogram import LocalHistogram, HistogramEngine
 import matplotlib.pyplot as plt
 from scipy.stats.mstats import mquantiles
 
 from optparse import OptionParser, SUPPRESS_HELP, make_option
 from sage.all import *
 
-from Tiling import Tiling
+from Tiling import Tiling, NUMCPUS, TILE_CHUNK_SIZE, disk_window, points_in_window
+from TilingCache import TilingCache, DEFAULT_CACHE_DIR
+from PairHistogram import PairHistogram
+from HistogramPyramid import HistogramPyramid
+from BinnedKDE import BinnedKDE
+from TilingPyramid import TilingPyramid
 from ConfigParserLocal import ConfigParser as ConfigParserLocal
 
 from AmmannChair import AmmannChair_Tiling
@@ -110,6 +115,40 @@ argspec_option_list = [
                  action = "store_true", metavar = "COMPUTE-IMAGE-ONLY", 
                  dest = "image_only", default = False, 
                  help = "Compute and save the image of the tiling only before exiting"), 
+     make_option("-m", "--stream-tiles", 
+                 action = "store_true", metavar = "STREAM-TILES", 
+                 dest = "stream_tiles", default = False, 
+                 help = "Generate the tiles one supertile at a time to save memory (slower for large N)"), 
+     make_option("-x", "--exact-coords", 
+                 action = "store_true", metavar = "EXACT-COORDS", 
+                 dest = "exact_coords", default = False, 
+                 help = "Use exact Z[phi] or Z[sqrt(2)] coordinates (Penrose, PenroseKD, TubingenTriangle, and Ammann tilings only)"), 
+     make_option("-k", "--cache-tiles", 
+                 action = "store_true", metavar = "CACHE-TILES", 
+                 dest = "cache_tiles", default = False, 
+                 help = "Load (or save) the generated tiles, points, intermediate substitution levels, and fine histograms in the cache directory " + DEFAULT_CACHE_DIR), 
+     make_option("-w", "--window", metavar = "WINDOW", 
+                 dest = "window", default = None, 
+                 help = "Only generate the tiles near a window \"xmin,ymin,xmax,ymax\" or a disk of radius R about the origin"), 
+     make_option("-j", "--workers", metavar = "NUM-WORKERS", 
+                 dest = "num_workers", default = NUMCPUS, action = 'store', 
+                 help = "Number of worker processes used to generate the tilings and pair correlations (defaults to %d)" % NUMCPUS), 
+     make_option("-r", "--sample-pairs", metavar = "NUM-SAMPLES", 
+                 dest = "pc_samples", default = 0, action = 'store', 
+                 help = "Estimate the pair correlation from random pairs (or random anchor points with all neighbors within the -p plot range) instead of all pairs"), 
+     make_option("-u", "--sample-seed", metavar = "SEED", 
+                 dest = "pc_seed", default = 0, action = 'store', 
+                 help = "Seed of the random pairs sampled with -r (defaults to 0)"), 
+     make_option("-e", "--replot", 
+                 action = "store_true", metavar = "REPLOT", 
+                 dest = "replot", default = False, 
+                 help = "Regenerate the histogram images from the fine histogram stored by a previous run with -k (in " + DEFAULT_CACHE_DIR + ") without generating the tiling"), 
+     make_option("-z", "--kde-bandwidth", metavar = "BANDWIDTH", 
+                 dest = "kde_bandwidth", default = "scott", action = 'store', 
+                 help = "Bandwidth of the kernel density estimate of the pdf: a number, or the rule \"scott\" (default) or \"silverman\""), 
+     make_option("-o", "--tile-pyramid", metavar = "MAX-ZOOM", 
+                 dest = "pyramid_zoom", default = None, action = 'store', 
+                 help = "Export the tiling image as a zoomable pyramid of PNG tiles with an HTML viewer up to a zoom level (or \"auto\")"), 
      make_option("-v", "--verbose", 
                  action = "store_true", 
                  dest = "verbose", 
@@ -117,7 +156,7 @@ argspec_option_list = [
                  
 ]; 
 
-argspec_usage = "%prog [-v] [-h] [--version] [-s] [-q] [-d] [-n NUM-STEPS] [-t TSPEC] [-b NUM-BINS]"; 
+argspec_usage = "%prog [-v] [-h] [--version] [-s] [-q] [-d] [-m] [-x] [-k] [-w WINDOW] [-j NUM-WORKERS] [-r NUM-SAMPLES] [-u SEED] [-e] [-z BANDWIDTH] [-o MAX-ZOOM] [-n NUM-STEPS] [-t TSPEC] [-b NUM-BINS]"; 
 argspec_version = "%prog 1.0" 
 
 #num_bins_arr = [10, 15, 25, 35, 50, 75, 85, 100, 125, 150, 175, 200, 250, 500, 750, 1000, 2000, 5000, 7500, 10000];
@@ -151,6 +190,26 @@ if __name__ == "__main__":
      use_slope_gaps = bool(cmdline_opts.use_slope_gaps); 
      conf_file_path = str(cmdline_opts.conf_file_path); 
      no_plot_ranges = not bool(cmdline_opts.use_plot_ranges)
+     exact_coords = bool(cmdline_opts.exact_coords); 
+     stream_tiles = bool(cmdline_opts.stream_tiles); 
+     cache_tiles = bool(cmdline_opts.cache_tiles); 
+     num_workers = int(cmdline_opts.num_workers); 
+     pc_samples = int(cmdline_opts.pc_samples); 
+     pc_seed = int(cmdline_opts.pc_seed); 
+     replot = bool(cmdline_opts.replot); 
+     pyramid_zoom = cmdline_opts.pyramid_zoom; 
+     if pyramid_zoom not in [None, "auto"]: 
+          pyramid_zoom = int(pyramid_zoom); 
+     ## if 
+     kde_bandwidth = str(cmdline_opts.kde_bandwidth); 
+     if kde_bandwidth not in ["scott", "silverman"]: 
+          kde_bandwidth = float(kde_bandwidth); 
+     ## if 
+     window = None; 
+     if cmdline_opts.window != None: 
+          window_spec = map(float, str(cmdline_opts.window).split(",")); 
+          window = disk_window(window_spec[0]) if len(window_spec) == 1 else tuple(window_spec); 
+     ## if 
      
      tiling = Tiling(num_steps, "<Unknown Tiling>");
      inflation_factor = 1.0
@@ -164,7 +223,7 @@ if __name__ == "__main__":
           tiling = GoldenTriangle_Tiling(num_steps, tiling_type); 
           inflation_factor = n(sqrt(golden_ratio))
      elif tiling_type == "Penrose": 
-          tiling = Penrose_Tiling(num_steps, tiling_type); 
+          tiling = Penrose_Tiling(num_steps, tiling_type, exact = exact_coords); 
           inflation_factor = n(golden_ratio)
      elif tiling_type == "Sphinx": 
           tiling = Sphinx_Tiling(num_steps, tiling_type); 
@@ -220,19 +279,19 @@ if __name__ == "__main__":
           tiling = SaddleConnectionGoldenL(num_steps, tiling_type);
           inflation_factor = 1.0
      elif tiling_type == "AmmannRhomb": 
-          tiling = Ammann_Tiling(num_steps, tiling_type, RHOMB_TILE);
+          tiling = Ammann_Tiling(num_steps, tiling_type, RHOMB_TILE, exact = exact_coords);
           inflation_factor = n(1 + sqrt(2))
      elif tiling_type == "AmmannTriangle": 
-          tiling = Ammann_Tiling(num_steps, tiling_type, TRIANGLE_TILE);
+          tiling = Ammann_Tiling(num_steps, tiling_type, TRIANGLE_TILE, exact = exact_coords);
           inflation_factor = n(1 + sqrt(2))
      elif tiling_type == "AmmannSquare": 
-          tiling = Ammann_Tiling(num_steps, tiling_type, SQUARE_TILE);
+          tiling = Ammann_Tiling(num_steps, tiling_type, SQUARE_TILE, exact = exact_coords);
           inflation_factor = n(1 + sqrt(2))
      elif tiling_type == "AmmannEightStar": 
-          tiling = Ammann_Tiling(num_steps, tiling_type, 8);
+          tiling = Ammann_Tiling(num_steps, tiling_type, 8, exact = exact_coords);
           inflation_factor = n(1 + sqrt(2))
      elif tiling_type == "AmmannOctagon": 
-          tiling = Ammann_Tiling(num_steps, tiling_type, 88);
+          tiling = Ammann_Tiling(num_steps, tiling_type, 88, exact = exact_coords);
           inflation_factor = n(1 + sqrt(2))
      elif tiling_type == "IntegerLattice": 
           tiling = IntegerLattice_Tiling(num_steps, tiling_type);
@@ -280,7 +339,7 @@ if __name__ == "__main__":
           tiling = AmmannA4_Tiling(num_steps, tiling_type);
           inflation_factor = 1.0 # TODO
      elif tiling_type == "PenroseKD": 
-          tiling = PenroseKD_Tiling(num_steps, tiling_type);
+          tiling = PenroseKD_Tiling(num_steps, tiling_type, exact = exact_coords);
           inflation_factor = 1.0 # TODO
      elif tiling_type == "DiamondTriangle": 
           tiling = DiamondTriangle_Tiling(num_steps, tiling_type);
@@ -307,7 +366,8 @@ if __name__ == "__main__":
           tiling = PChairs_Tiling(num_steps, tiling_type);
           inflation_factor = 3.0 / 2.0 * n(sqrt(2))
      elif tiling_type == "TubingenTriangle": 
-          tiling = TubingenTriangle_Tiling(num_steps, tiling_type);
+          tiling = TubingenTriangle_Tiling(num_steps, tiling_type, 
+                                           exact = exact_coords);
           inflation_factor = n(golden_ratio)
      #elif tiling_type == "AmmannBeenker": 
      #     tiling = ABRhombTriangle_Tiling(num_steps, tiling_type);
@@ -349,24 +409,73 @@ if __name__ == "__main__":
      print "   Using Plot Ranges: %s" % ("No" if no_plot_ranges else "Yes")
      
      start_time = time.time(); 
-     tiles = tiling.get_tiles(); 
+     tiling.set_num_workers(num_workers); 
+     tiles, tiling_points = None, None; 
+     tiling_cache, stored_hist = TilingCache(), None; 
+     if replot: 
+          stored_hist = tiling_cache.load_histogram(tiling, hist_type_desc, window); 
+          if stored_hist is None: 
+               print "   No stored %s histogram of the tiling to replot ... Exiting" \
+                     % hist_type_desc; 
+               sys.exit(1); 
+          ## if 
+          tiling_points = []; 
+     elif cache_tiles: 
+          tiling.set_level_cache(tiling_cache); 
+          (tiles, cached_points) = tiling_cache.get(tiling, window); 
+          tiling_points = [vector([x, y]) for (x, y) in cached_points]; 
+     ## if 
      
-     if save_image or image_only: 
-          tiling_image = tiling.get_tiling_image(tiles); 
+     if (save_image or image_only) and not replot: 
+          if tiles is None: 
+               tiles = tiling.get_tileset(window = window); 
+          ## if 
           image_path = "./output/%s-N.%03d-tiling.png" % (tiling.name, num_steps); 
-          tiling_image.save(image_path); 
-          tiling_image.show()
+          tiling.save_tiling_image(tiles, image_path); 
           print "   Saved tiling image to \"%s\" ... " % image_path; 
      ## if 
+     if pyramid_zoom is not None and not replot: 
+          tiling_pyramid = TilingPyramid(tiling, None if pyramid_zoom == "auto" else pyramid_zoom); 
+          pyramid_dir = "./output/%s-N.%03d-pyramid" % (tiling.name, num_steps); 
+          num_images = tiling_pyramid.export(pyramid_dir, num_workers); 
+          print "   Saved %d tiling pyramid images (zoom levels 0-%d) and the viewer \"%s/index.html\" ... " \
+                % (num_images, tiling_pyramid.max_zoom, pyramid_dir); 
+     ## if 
      if image_only: 
           sys.exit(0);
      ##
      
-     tiling_points = Tiling.tiling_to_points(tiles, True); 
-     num_tiling_points = len(tiling_points); 
+     if tiling_points is None and stream_tiles and tiles is None and not exact_coords \
+        and window is None: 
+          tiling_points = tiling.get_unique_points(); 
+     elif tiling_points is None and stream_tiles and tiles is None and not exact_coords: 
+          tile_chunks = tiling.iter_tiles(chunk_size = TILE_CHUNK_SIZE, window = window); 
+          tiling_points = Tiling.stream_to_points(tile_chunks); 
+     elif tiling_points is None: 
+          if tiles is None: 
+               tiles = tiling.get_tileset(window = window); 
+          ## if 
+          tiling_points = Tiling.tiling_to_points(tiles, True); 
+     ## if 
+     if window != None: 
+          tiling_points = points_in_window(tiling_points, window); 
+     ## if 
+     num_tiling_points = len(tiling_points) if stored_hist is None else stored_hist.num_points; 
      
-     hist_data = []; 
-     if use_angle_gaps: 
+     scaling_factor = 1.0;
+     if tiling_type == "IntegerLattice":
+          scaling_factor = (LARGE_RADIUSR ** 2); 
+     ## if 
+     hist_data, pc_hist, pc_rmax = [], None, None; 
+     if stored_hist is not None: 
+          print "   Replotting the stored histogram of %d values" % int(stored_hist.stats[0]); 
+          if not no_plot_ranges and \
+             ((stored_hist.num_overflow > 0 and pxmax > stored_hist.xmax) or \
+              (stored_hist.num_underflow > 0 and pxmin < stored_hist.xmin)): 
+               print "   WARNING: The stored histogram only covers the values in [%g, %g]" \
+                     % (stored_hist.xmin, stored_hist.xmax); 
+          ## if 
+     elif use_angle_gaps: 
           hist_data = Tiling.compute_angle_gaps(tiling_points); 
      elif use_angles: 
           hist_data = Tiling.compute_sorted_angles(tiling_points); 
@@ -375,26 +484,65 @@ if __name__ == "__main__":
      elif use_slope_gaps:
           hist_data = Tiling.compute_slope_gaps(tiling_points); 
      else: 
-          hist_data = Tiling.compute_pc_edists(tiling_points, use_edist_squared, True); 
+          ## only the pairs within the configured plot range (plus one of the 
+          ## widest bins, which the cdf histograms extend past pxmax) are needed: 
+          if not no_plot_ranges: 
+               pc_rmax = (pxmax + (pxmax - pxmin) / float(min(num_bins_arr))) / \
+                         (scaling_factor * (inflation_factor ** num_steps)) 
+               pc_rmax = sqrt(pc_rmax) if use_edist_squared else pc_rmax 
+               print "   Pair Correlation Cutoff: %g" % pc_rmax 
+          ## if 
+          if pc_samples > 0: 
+               pc_hist = PairHistogram.sample_points(tiling_points, pc_samples, 
+                                                     use_edist_squared, pc_rmax, pc_seed); 
+               print "   Sampled %d %s (seed %d)" \
+                     % (pc_samples, "pairs" if pc_rmax is None else "anchor points", pc_seed); 
+          else: 
+               pc_hist = PairHistogram.from_points(tiling_points, use_edist_squared, 
+                                                   rmax = pc_rmax, num_workers = num_workers); 
+          ## if 
      ## if 
 
      ## re-scale the data if necessary: 
-     scaling_factor = 1.0;
-     if tiling_type == "IntegerLattice":
-          scaling_factor = (LARGE_RADIUSR ** 2); 
-     elif hist_type_desc == "anglegaps" or hist_type_desc == "slopegaps": 
+     if stored_hist is None and tiling_type != "IntegerLattice" and \
+        (hist_type_desc == "anglegaps" or hist_type_desc == "slopegaps"): 
           scaling_factor = (num_steps ** 2) / float( len(hist_data) ); 
      ## 
-     temp_hist_data = hist_data
-     hist_data = []
-     for (idx, hd) in enumerate(temp_hist_data): 
-          hist_data += [scaling_factor * hd * (inflation_factor ** num_steps)]; 
-     ## for 
-     hist_data = list(np.sort(hist_data))
+     if stored_hist is not None: 
+          hist_pyramid = stored_hist 
+     elif pc_hist is not None: 
+          ## the pair distances are binned in the fine bins of pc_hist: 
+          pc_hist.rescale(scaling_factor * (inflation_factor ** num_steps)); 
+          hist_pyramid = HistogramPyramid.from_pair_histogram(pc_hist, num_tiling_points) 
+     else: 
+          temp_hist_data = hist_data
+          hist_data = []
+          for (idx, hd) in enumerate(temp_hist_data): 
+               hist_data += [scaling_factor * hd * (inflation_factor ** num_steps)]; 
+          ## for 
+          hist_data, hist_weights = list(np.sort(hist_data)), None 
+          [q05, q15, q80] = list(mquantiles(np.array(hist_data), prob = [0.05, 0.15, 0.80])) 
+          ## the fine bins span the configured plot range (plus one of the widest 
+          ## bins on each side, as for pc_rmax), or else the quantile-clipped range 
+          ## of the heavy-tailed values: 
+          pyramid_xran = None 
+          if not no_plot_ranges: 
+               bin_width = (pxmax - pxmin) / float(min(num_bins_arr)) 
+               pyramid_xran = [pxmin - bin_width, pxmax + bin_width] 
+          ## if 
+          hist_pyramid = HistogramPyramid.from_values(hist_data, num_tiling_points, 
+                                                      xran = pyramid_xran) 
+     ## if 
+     if stored_hist is None and cache_tiles: # store the fine histogram for replotting with -e 
+          tiling_cache.save_histogram(tiling, hist_type_desc, hist_pyramid, window); 
+     ## if 
+     if stored_hist is not None or pc_hist is not None: 
+          hist_data, hist_weights = hist_pyramid.centers(), hist_pyramid.counts 
+          [q05, q15, q80] = hist_pyramid.quantiles([0.05, 0.15, 0.80]) 
+     ## if 
 
      if no_plot_ranges: # plot the most natural range based on quantiles
-          [qlower, qupper] = list(mquantiles(np.array(hist_data), prob = [0.15, 0.80]))
-          pxmin, pxmax = qlower, qupper
+          pxmin, pxmax = q15, q80
      print "   [XMIN, XMAX]: [%g, %g]" % (pxmin, pxmax)
 
      ## smooth approximating curves:
@@ -411,6 +559,15 @@ if __name__ == "__main__":
      print "   Total time to compute histogram data: %g seconds" \
            % (end_time - start_time); 
      
+     ## the data is sorted once for the histograms with all of the bin counts: 
+     hist_engine = HistogramEngine(hist_data, hist_weights) 
+     
+     ## the smooth pdf estimate is computed once on a fine grid over the plot range: 
+     hist_kde = BinnedKDE(hist_data, bandwidth = kde_bandwidth, xran = [pxmin, pxmax], 
+                          engine = hist_engine) 
+     kde_pdf_points = hist_kde.range_points(pxmin, pxmax) 
+     print "   KDE Bandwidth: %g" % hist_kde.bandwidth 
+     
      for nbins in num_bins_arr: 
 
           num_bins, hmin, hmax = nbins, pxmin, pxmax
@@ -418,7 +575,10 @@ if __name__ == "__main__":
           coarsebins = list(np.arange(hmin - bin_size, hmax + bin_size, bin_size))
           
           ## add higher bin resolution at the beginning of the distribution:
-          [lowerdist_max] = mquantiles(np.array(hist_data), prob = [0.05])
+          lowerdist_max = q05
+          if pc_rmax is not None: # the pairs beyond the cutoff are not binned
+               lowerdist_max = min(lowerdist_max, hmax)
+          ##
           rbinsize = bin_size / 4.0
           refinedbins = list(np.arange(hmin - rbinsize, lowerdist_max + rbinsize, rbinsize))
           histbins = np.sort(np.unique(refinedbins + coarsebins))
@@ -432,22 +592,21 @@ if __name__ == "__main__":
                                     thickness = 1.0, aspect_ratio = 'automatic', 
                                     legend_label = 'Coarse Histogram Distribution (pdf)', 
                                     cumulative = False, probability = False, 
-                                    xran = [hmin, hmax])
+                                    xran = [hmin, hmax], engine = hist_engine)
           lhistcdf = LocalHistogram(hist_data, bins = histbins, rgbcolor = 'green', 
                                     thickness = 1.0, aspect_ratio = 'automatic', 
                                     legend_label = 'Coarse Histogram Distribution (cdf)', 
                                     cumulative = True, probability = False, 
-                                    xran = [hmin, hmax])
+                                    xran = [hmin, hmax], engine = hist_engine)
           plthistpdf, histx, histy = lhistpdf.get_histogram_plot(), \
                                      lhistpdf.histx, lhistpdf.histy
           plthistcdf = lhistcdf.get_histogram_plot()
-          approx_pdf_points = lhistcdf.compute_derivative_list()
-          approx_pdf_plot = list_plot(approx_pdf_points, linestyle = '-.', 
+          approx_pdf_plot = list_plot(kde_pdf_points, linestyle = '-.', 
                                       rgbcolor = Color('purple').darker(0.4), 
                                       plotjoined = True, 
                                       thickness = 1.5, ymin = 0, 
-                                      legend_label = 'Approximate Derivative of cdf(x) / pdf(x)')
-          plthistcdf += approx_pdf_plot
+                                      legend_label = 'Kernel Density Estimate of pdf(x)')
+          plthistpdf += approx_pdf_plot
           
           #hist = histogram(hist_data, 
           #                 bins = histbins, weights = None, 
@@ -508,7 +667,16 @@ if __name__ == "__main__":
                             % (tiling.name, num_bins, num_steps, hist_type_desc);
           hist_title =  "%s(N:=%d) %s:\n" % (tiling.name, num_steps, print_desc) 
           hist_title += "#bins=%d, #tiling points = %d\n" \
-                        % (num_bins, len(tiling_points)); 
+                        % (num_bins, num_tiling_points); 
+          if pc_hist is not None and pc_hist.num_batches > 1: 
+               (pdf_densities, pdf_edges, pdf_errors) = \
+                    pc_hist.coarse_histogram(num_bins, [hmin, hmax]); 
+               max_rel_error = pdf_errors.max() / max(pdf_densities.max(), 1e-300); 
+               print "   Max 95%% confidence half-width of the pdf bins: %g (%g%% of the peak)" \
+                     % (pdf_errors.max(), 100.0 * max_rel_error); 
+               hist_title += "Sampled: %d (95%% CI: +/-%.3g%% of peak)\n" \
+                             % (pc_samples, 100.0 * max_rel_error); 
+          ## if 
           #hist_title += "$\\mu = %04g$, $\\sigma = %04g$/n" % (mean(hist_data), std(hist_data))
           hist_title += "Time Taken: %g sec (%g mins)\n" % (time_taken, time_taken / 60.0)
           hist_end_time = time.time(); 